@@ -0,0 +1,30 @@
+import logging
+import time
+from typing import Any
+
+from natnet_py import DirectClient
+from utils import data_callback, parse, init_logging
+
+
+def main(args: Any = None) -> None:
+    args = parse()
+    init_logging(args.log_level)
+    client = DirectClient(address=args.client)
+    connected = client.connect(
+        timeout=5.0, server_address=args.server,
+        discovery_address=args.discovery, sync=not args.no_sync)
+    if connected:
+        cb = data_callback(client)
+        start = time.monotonic()
+        while time.monotonic() - start < args.duration:
+            data = client.get_data(timeout=1.0, last=True)
+            if not data:
+                break
+            if not args.silent:
+                cb(*data)
+        logging.info(client.frame_statistics.snapshot())
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import asyncio
+import logging
+import sys
+import time
+from typing import Any
+
+from natnet_py import AsyncClient
+from natnet_py.shm import SharedMemoryPublisher, SharedMemoryReader
+from utils import parse, init_logging
+
+
+async def publish(args: Any) -> None:
+    client = AsyncClient(address=args.client, queue=-1, sync=not args.no_sync)
+    if await client.connect(server_address=args.server,
+                            discovery_address=args.discovery, timeout=args.timeout):
+        publisher = SharedMemoryPublisher("natnet")
+        task = asyncio.create_task(publisher.run(client))
+        await client.wait(duration=args.duration)
+        task.cancel()
+        logging.info(f"Published {publisher.published} frames")
+        publisher.close()
+    await client.close()
+
+
+def read(args: Any) -> None:
+    reader = SharedMemoryReader("natnet")
+    start = time.monotonic()
+    while time.monotonic() - start < args.duration:
+        for name, state in reader.get_all().items():
+            if not args.silent:
+                logging.info(f"{name}: {state.position} {state.orientation}")
+        time.sleep(0.1)
+    reader.close()
+
+
+def main() -> None:
+    # Run first with "publish" and then, in other processes, with "read"
+    mode = sys.argv.pop(1) if len(sys.argv) > 1 else "publish"
+    args = parse()
+    init_logging(args.log_level)
+    if mode == "read":
+        read(args)
+    else:
+        asyncio.run(publish(args))
+
+
+if __name__ == "__main__":
+    main()
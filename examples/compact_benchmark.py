@@ -0,0 +1,97 @@
+import argparse
+import math
+import random
+import time
+
+from natnet_py import protocol
+from natnet_py.compact import CompactDecoder, CompactEncoder
+
+
+def make_frames(bodies: int, frames: int, moving: float,
+                rate: float) -> list[protocol.MoCapData]:
+    random.seed(0)
+    poses = {i: [random.uniform(-5, 5), random.uniform(-5, 5), random.uniform(0, 2),
+                 random.uniform(-math.pi, math.pi)] for i in range(bodies)}
+    movers = set(random.sample(range(bodies), round(moving * bodies)))
+    msgs = []
+    dt = 1 / rate
+    for n in range(frames):
+        rbs = []
+        for i, pose in poses.items():
+            if i in movers:
+                pose[0] += 1.0 * dt * math.cos(pose[3])
+                pose[1] += 1.0 * dt * math.sin(pose[3])
+                pose[3] += 0.5 * dt
+            # measurement noise
+            x, y, z = (c + random.gauss(0, 1e-5) for c in pose[:3])
+            yaw = pose[3]
+            rbs.append(protocol.RigidBodyData(
+                id=i, position=(x, y, z),
+                orientation=(0.0, 0.0, math.sin(yaw / 2), math.cos(yaw / 2)),
+                tracking_valid=True, error=2e-4))
+        ticks = int(n * dt * 1e9)
+        suffix = protocol.FrameSuffixData(
+            timecode=0, timecode_sub=0, timestamp=n * dt,
+            stamp_camera_mid_exposure=ticks, stamp_data_received=ticks + 3_000_000,
+            stamp_transmit=ticks + 3_100_000)
+        msgs.append(protocol.MoCapData(frame_number=n, rigid_bodies=rbs, suffix_data=suffix))
+    return msgs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the compact codec with native NatNet encoding")
+    parser.add_argument("--bodies", default=10, type=int, help="Number of rigid bodies")
+    parser.add_argument("--frames", default=2000, type=int, help="Number of frames")
+    parser.add_argument("--moving", default=0.5, type=float,
+                        help="Fraction of moving rigid bodies")
+    parser.add_argument("--rate", default=120.0, type=float, help="Frame rate")
+    parser.add_argument("--keyframe_interval", default=100, type=int)
+    parser.add_argument("--position_resolution", default=1e-5, type=float)
+    parser.add_argument("--quaternion_bits", default=15, type=int)
+    args = parser.parse_args()
+    protocol.set_version(3, 1)
+    msgs = make_frames(args.bodies, args.frames, args.moving, args.rate)
+
+    start = time.perf_counter()
+    native = [protocol.pack(msg) for msg in msgs]
+    native_encode = time.perf_counter() - start
+    start = time.perf_counter()
+    for data in native:
+        protocol.unpack(protocol.Buffer(data))
+    native_decode = time.perf_counter() - start
+
+    encoder = CompactEncoder(keyframe_interval=args.keyframe_interval,
+                             position_resolution=args.position_resolution,
+                             quaternion_bits=args.quaternion_bits)
+    decoder = CompactDecoder()
+    start = time.perf_counter()
+    compact = [encoder.encode(msg) for msg in msgs]
+    compact_encode = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = [decoder.decode(data) for data in compact]
+    compact_decode = time.perf_counter() - start
+
+    position_error = 0.0
+    angle_error = 0.0
+    for msg, out in zip(msgs, decoded):
+        assert out is not None
+        for a, b in zip(msg.rigid_bodies, out.rigid_bodies):
+            position_error = max(position_error, *(abs(p - q) for p, q in zip(
+                a.position, b.position)))
+            dot = abs(sum(p * q for p, q in zip(a.orientation, b.orientation)))
+            angle_error = max(angle_error, 2 * math.acos(min(1.0, dot)))
+
+    n = len(msgs)
+    print(f"{args.bodies} rigid bodies ({args.moving:.0%} moving), {n} frames")
+    print(f"{'':8} {'bytes/frame':>12} {'encode [us]':>12} {'decode [us]':>12}")
+    print(f"{'native':8} {sum(map(len, native)) / n:12.1f} "
+          f"{1e6 * native_encode / n:12.1f} {1e6 * native_decode / n:12.1f}")
+    print(f"{'compact':8} {sum(map(len, compact)) / n:12.1f} "
+          f"{1e6 * compact_encode / n:12.1f} {1e6 * compact_decode / n:12.1f}")
+    print(f"max position error {position_error:.2e} m, "
+          f"max angle error {math.degrees(angle_error):.2e} deg")
+
+
+if __name__ == "__main__":
+    main()
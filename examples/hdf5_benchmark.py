@@ -0,0 +1,117 @@
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+from typing import Any
+
+import h5py
+
+from natnet_py import protocol
+from natnet_py.hdf5_writer import HDF5Writer
+
+# compression, level
+SETTINGS: list[tuple[str | None, int | None]] = [
+    (None, None), ("gzip", 1), ("gzip", 4), ("gzip", 9), ("lzf", None),
+    ("blosc", 5), ("lz4", None), ("zstd", 3)]
+
+
+def make_frames(bodies: int, markers: int, duration: float,
+                rate: float) -> list[tuple[int, protocol.MoCapData]]:
+    random.seed(0)
+    poses = {i: [random.uniform(-5, 5), random.uniform(-5, 5), random.uniform(0, 2),
+                 random.uniform(-math.pi, math.pi)] for i in range(bodies)}
+    frames = []
+    dt = 1 / rate
+    for n in range(round(duration * rate)):
+        rbs = []
+        lms = []
+        for i, pose in poses.items():
+            pose[0] += 1.0 * dt * math.cos(pose[3])
+            pose[1] += 1.0 * dt * math.sin(pose[3])
+            pose[3] += 0.5 * dt
+            # measurement noise
+            x, y, z = (c + random.gauss(0, 1e-5) for c in pose[:3])
+            yaw = pose[3]
+            rbs.append(protocol.RigidBodyData(
+                id=i, position=(x, y, z),
+                orientation=(0.0, 0.0, math.sin(yaw / 2), math.cos(yaw / 2)),
+                tracking_valid=True, error=2e-4))
+            lms.extend(protocol.LabeledMarkerData(
+                id=(i << 16) + j, position=(x + 0.05 * j, y, z + 0.01), size=0.014,
+                param=0, residual=2e-4) for j in range(markers))
+        ticks = int(n * dt * 1e9)
+        suffix = protocol.FrameSuffixData(
+            timecode=0, timecode_sub=0, timestamp=n * dt,
+            stamp_camera_mid_exposure=ticks, stamp_data_received=ticks + 3_000_000,
+            stamp_transmit=ticks + 3_100_000)
+        frames.append((time.time_ns() + ticks + 3_500_000, protocol.MoCapData(
+            frame_number=n, rigid_bodies=rbs, labeled_markers=lms, suffix_data=suffix)))
+    return frames
+
+
+def read_all(path: str) -> int:
+    size = 0
+
+    def read(name: str, obj: Any) -> None:
+        nonlocal size
+        if isinstance(obj, h5py.Dataset):
+            size += obj[()].nbytes
+
+    with h5py.File(path, "r") as f:
+        f.visititems(read)
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the write throughput, file size and read speed "
+                    "of HDF5 recordings with different compression filters and chunk sizes")
+    parser.add_argument("--bodies", default=10, type=int, help="Number of rigid bodies")
+    parser.add_argument("--markers", default=4, type=int,
+                        help="Number of labeled markers per rigid body")
+    parser.add_argument("--duration", default=60.0, type=float,
+                        help="Duration of the session [s]")
+    parser.add_argument("--rate", default=240.0, type=float, help="Frame rate [Hz]")
+    parser.add_argument("--chunk_sizes", default=[1024], type=int, nargs="+",
+                        help="Chunk sizes to compare")
+    args = parser.parse_args()
+
+    frames = make_frames(args.bodies, args.markers, args.duration, args.rate)
+    try:
+        import hdf5plugin  # noqa: F401
+        settings = SETTINGS
+    except ImportError:
+        print("hdf5plugin not installed: skipping blosc, lz4 and zstd")
+        settings = [s for s in SETTINGS if s[0] not in ("blosc", "lz4", "zstd")]
+    print(f"{len(frames)} frames, {args.bodies} rigid bodies, "
+          f"{args.bodies * args.markers} labeled markers")
+    print(f"{'compression':12} {'chunk':>6} {'write [fps]':>12} {'x real-time':>12} "
+          f"{'size [MB]':>10} {'ratio':>6} {'read [MB/s]':>12}")
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "session.h5")
+        for chunk_size in args.chunk_sizes:
+            reference = 0
+            for compression, level in settings:
+                start = time.perf_counter()
+                writer = HDF5Writer(path, chunk_size=chunk_size, flush_period=0.1,
+                                    max_buffered=10 ** 9, compression=compression,
+                                    compression_level=level)
+                for stamp, msg in frames:
+                    writer.add(stamp, msg)
+                writer.close()
+                duration = time.perf_counter() - start
+                size = os.path.getsize(path)
+                reference = reference or size
+                start = time.perf_counter()
+                data = read_all(path)
+                read = time.perf_counter() - start
+                name = f"{compression or 'none'}{'' if level is None else f'-{level}'}"
+                print(f"{name:12} {chunk_size:6d} {len(frames) / duration:12.0f} "
+                      f"{args.duration / duration:12.1f} {size / 1e6:10.2f} "
+                      f"{reference / size:6.2f} {data / 1e6 / read:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
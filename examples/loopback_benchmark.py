@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import time
+
+from natnet_py import AsyncClient, Server, protocol
+from natnet_py.loopback import LoopbackNetwork
+from natnet_py.stats import LatencySummary
+
+
+class BenchmarkServer(Server):
+    """Streams a number of frames as fast as possible to the first client"""
+
+    def __init__(self, bodies: int, frames: int, network: LoopbackNetwork):
+        super().__init__(rate=120, network=network)
+        self.bodies = bodies
+        self.frames = frames
+        self.client_ready = asyncio.Event()
+        """set once the client listens for data"""
+
+    def get_rigid_bodies_data(self) -> list[protocol.RigidBodyData]:
+        return [protocol.RigidBodyData(id=i, position=(0.1 * i, 0.2, 0.3),
+                                       orientation=(0.0, 0.0, 0.0, 1.0),
+                                       tracking_valid=True, error=1e-4)
+                for i in range(self.bodies)]
+
+    def get_rigid_bodies_def(self) -> list[protocol.RigidBodyDescription]:
+        return [protocol.RigidBodyDescription(name=f"rb{i}", id=i) for i in range(self.bodies)]
+
+    async def stream_mocap_data(self) -> None:
+        # the client registers with its connection request, but binds its data endpoint later
+        await self.client_ready.wait()
+        for _ in range(self.frames):
+            self.send_data(protocol.pack(self.get_mocap_data()))
+            # let the client process the frame
+            await asyncio.sleep(0)
+
+
+async def run_pair(bodies: int, frames: int) -> tuple[int, dict[str, LatencySummary]]:
+    network = LoopbackNetwork()
+    server = BenchmarkServer(bodies, frames, network)
+    task = asyncio.create_task(server.run())
+    client = AsyncClient(queue=-1, network=network, latency_window=3600)
+    received = 0
+
+    def count(stamp: int, msg: protocol.MoCapData) -> None:
+        nonlocal received
+        received += 1
+
+    client.data_callback = count
+    await client.connect(server_address="127.0.0.1")
+    server.client_ready.set()
+    await task
+    # deliver the last frames
+    await asyncio.sleep(0.01)
+    latencies = await client.get_latencies() or {}
+    await client.close()
+    return received, latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure the end-to-end throughput and latency of server and client code, "
+                    "connected by in-memory networks")
+    parser.add_argument("--pairs", default=1, type=int,
+                        help="Number of server-client pairs running in parallel")
+    parser.add_argument("--bodies", default=10, type=int, help="Number of rigid bodies")
+    parser.add_argument("--frames", default=10000, type=int, help="Number of frames per pair")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_pair(args.bodies, args.frames) for _ in range(args.pairs)))
+    duration = time.perf_counter() - start
+    received = sum(r for r, _ in results)
+    print(f"{args.pairs} pairs, {args.bodies} rigid bodies, {args.frames} frames per pair")
+    print(f"received {received} frames in {duration:.2f} s ({received / duration:.0f} fps)")
+    print(f"{'latency [us]':14} {'p50':>8} {'p99':>8} {'max':>8}")
+    for kind in ("network", "processing"):
+        for i, (_, latencies) in enumerate(results):
+            s = latencies.get(kind)
+            if s and s.count:
+                print(f"{kind + ' ' + str(i):14} {s.p50 / 1e3:8.1f} {s.p99 / 1e3:8.1f} "
+                      f"{s.max / 1e3:8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
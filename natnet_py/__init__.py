@@ -1,6 +1,7 @@
 from .async_client import AsyncClient
 from .sync_client import SyncClient
+from .direct_client import DirectClient
 from .server import Server
 
 
-__all__ = ['AsyncClient', 'SyncClient', 'Server']
+__all__ = ['AsyncClient', 'SyncClient', 'DirectClient', 'Server']
@@ -0,0 +1,237 @@
+import logging
+from typing import Any, Iterator
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from . import protocol
+from .replay import ReplaySource, open_source
+
+# names are dictionary-encoded
+NAME = pa.dictionary(pa.int32(), pa.string())
+
+# one row per rigid body update
+SCHEMA = pa.schema([
+    pa.field("name", NAME),
+    pa.field("id", pa.int32()),
+    pa.field("stamp", pa.int64(), metadata={'unit': 'ns'}),
+    pa.field("frame_number", pa.int64()),
+    pa.field("ticks", pa.int64()),
+    pa.field("x", pa.float64(), metadata={'unit': 'mm'}),
+    pa.field("y", pa.float64(), metadata={'unit': 'mm'}),
+    pa.field("z", pa.float64(), metadata={'unit': 'mm'}),
+    pa.field("qx", pa.float64()),
+    pa.field("qy", pa.float64()),
+    pa.field("qz", pa.float64()),
+    pa.field("qw", pa.float64()),
+    pa.field("error", pa.float64(), metadata={'unit': 'mm'}),
+    pa.field("tracked", pa.bool_()),
+])
+
+PARTITIONS = ("rigid_body", "time", "none")
+
+
+class RigidBodyBatch:
+    """
+    Collects the rigid bodies of frames in columns, to build Arrow record batches
+    (see :py:data:`SCHEMA`).
+
+    Names are dictionary-encoded: the dictionary only grows, so that successive batches
+    share a prefix of it. Rigid bodies without a name are named after their id.
+    """
+
+    def __init__(self, names: dict[int, str] | None = None):
+        """
+        Constructs a new instance.
+
+        :param names: The names of the rigid bodies
+        """
+        self._dictionary: list[str] = []
+        self._indices: dict[int, int] = {}
+        self._columns: dict[str, list[Any]] = {name: [] for name in SCHEMA.names}
+        if names:
+            self.set_names(names)
+
+    def set_names(self, names: dict[int, str]) -> None:
+        """Sets the names of the rigid bodies, used for the next rows"""
+        for i, name in names.items():
+            self._indices[i] = self._index(name)
+
+    def _index(self, name: str) -> int:
+        if name in self._dictionary:
+            return self._dictionary.index(name)
+        self._dictionary.append(name)
+        return len(self._dictionary) - 1
+
+    def __len__(self) -> int:
+        return len(self._columns["id"])
+
+    def add(self, stamp: int, msg: protocol.MoCapData) -> None:
+        """
+        Adds the rigid bodies of a frame.
+
+        :param stamp: The receiving time [ns]
+        :param msg:   The frame
+        """
+        ticks = msg.suffix_data.stamp_camera_mid_exposure if msg.suffix_data else -1
+        c = self._columns
+        for rb in msg.rigid_bodies:
+            index = self._indices.get(rb.id)
+            if index is None:
+                index = self._indices[rb.id] = self._index(str(rb.id))
+            c["name"].append(index)
+            c["id"].append(rb.id)
+            c["stamp"].append(stamp)
+            c["frame_number"].append(msg.frame_number)
+            c["ticks"].append(ticks)
+            for key, value in zip(("x", "y", "z"), rb.position):
+                c[key].append(value)
+            for key, value in zip(("qx", "qy", "qz", "qw"), rb.orientation):
+                c[key].append(value)
+            c["error"].append(rb.error)
+            c["tracked"].append(rb.tracking_valid)
+
+    def take(self) -> pa.RecordBatch:
+        """Returns the collected rows as a record batch and clears them"""
+        columns, self._columns = self._columns, {name: [] for name in SCHEMA.names}
+        arrays = [pa.DictionaryArray.from_arrays(pa.array(columns["name"], pa.int32()),
+                                                 pa.array(self._dictionary, pa.string()))]
+        arrays += [pa.array(columns[field.name], field.type) for field in list(SCHEMA)[1:]]
+        return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+class ArrowStreamSink:
+    """
+    Streams rigid body data to an Arrow IPC stream (e.g., a file or a socket),
+    in record batches of ``batch_size`` rows.
+
+    Read the stream with :py:func:`pyarrow.ipc.open_stream`.
+
+    Usage:
+
+    >>> sink = ArrowStreamSink("data.arrows", client.rigid_body_names)
+    >>> client.data_callback = sink.add
+    >>> ...
+    >>> sink.close()
+    """
+
+    def __init__(self, sink: Any, names: dict[int, str] | None = None, batch_size: int = 1024):
+        """
+        Constructs a new instance.
+
+        :param sink:       A path or a writable file-like object
+        :param names:      The names of the rigid bodies
+        :param batch_size: The number of rows of each record batch
+        """
+        self.batch_size = batch_size
+        self.written = 0
+        """number of rows written to the stream"""
+        self._batch = RigidBodyBatch(names)
+        # new names are sent as dictionary deltas
+        options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        self._writer = pa.ipc.new_stream(sink, SCHEMA, options=options)
+        self._closed = False
+
+    def set_rigid_body_names(self, names: dict[int, str]) -> None:
+        """Sets the names of the rigid bodies, used for the next rows"""
+        self._batch.set_names(names)
+
+    def add(self, stamp: int, msg: protocol.MoCapData) -> None:
+        """
+        Adds the rigid bodies of a frame, writing a record batch when enough rows are collected.
+
+        Can be used directly as a data callback.
+
+        :param stamp: The receiving time [ns]
+        :param msg:   The frame
+        """
+        if self._closed:
+            return
+        self._batch.add(stamp, msg)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the collected rows"""
+        if self._closed or not len(self._batch):
+            return
+        self.written += len(self._batch)
+        self._writer.write_batch(self._batch.take())
+
+    def close(self) -> None:
+        """Writes the remaining rows and closes the stream"""
+        if self._closed:
+            return
+        self.flush()
+        self._writer.close()
+        self._closed = True
+
+
+def recorded_frames(source: ReplaySource) -> Iterator[tuple[int, protocol.MoCapData]]:
+    """The receiving stamps and the decoded frames of a recording"""
+    for stamp, data in source.datagrams():
+        msg = protocol.unpack(protocol.Buffer(data)) if isinstance(data, bytes) else data
+        if isinstance(msg, protocol.MoCapData):
+            yield stamp, msg
+
+
+def export_parquet(source: str | ReplaySource,
+                   root: str,
+                   partition: str = "rigid_body",
+                   period: float = 60.0,
+                   compression: str = "zstd",
+                   batch_size: int = 1_000_000,
+                   logger: logging.Logger = logging.getLogger()) -> int:
+    """
+    Exports the rigid bodies of a recording (raw capture or HDF5) to a Parquet dataset,
+    with the schema :py:data:`SCHEMA`.
+
+    The dataset is partitioned Hive-style, by rigid body (``name=<NAME>/``),
+    by time (``segment=<N>/``, where segment ``N`` contains the rows received between
+    ``N * period`` and ``(N + 1) * period`` seconds after the first frame), or not at all.
+    Load it with :py:func:`pyarrow.parquet.read_table`.
+
+    :param source:      The recording or its path
+    :param root:        The directory of the dataset
+    :param partition:   One of :py:data:`PARTITIONS`
+    :param period:      The duration [s] of the time partitions
+    :param compression: The Parquet compression codec
+    :param batch_size:  The number of rows written at once
+    :param logger:      The logger to use
+
+    :returns: The number of rows exported
+    """
+    if partition not in PARTITIONS:
+        raise ValueError(f"Unknown partition {partition}: should be one of {PARTITIONS}")
+    if isinstance(source, str):
+        source = open_source(source)
+    names = {rb.id: rb.name for rb in source.description.rigid_bodies}
+    batch = RigidBodyBatch(names)
+    partition_cols: list[str] | None = {
+        "rigid_body": ["name"], "time": ["segment"]}.get(partition)
+    start: int | None = None
+    rows = 0
+
+    def write() -> None:
+        table = pa.Table.from_batches([batch.take()])
+        if partition == "time":
+            stamps = table["stamp"].to_numpy()
+            table = table.append_column(
+                "segment", pa.array((stamps - (start or 0)) // int(period * 1e9), pa.int64()))
+        pq.write_to_dataset(table, root, partition_cols=partition_cols, compression=compression)
+
+    try:
+        for stamp, msg in recorded_frames(source):
+            if start is None:
+                start = stamp
+            batch.add(stamp, msg)
+            if len(batch) >= batch_size:
+                rows += len(batch)
+                write()
+        if len(batch):
+            rows += len(batch)
+            write()
+    finally:
+        source.close()
+    logger.info(f"Exported {rows} rows to {root}")
+    return rows
@@ -1,32 +1,112 @@
 ﻿import socket
 import logging
 import asyncio
+import collections
+import dataclasses as dc
 import struct
 import time
 
 from . import protocol
 from . import clock
-
-from typing import Any, Callable, TypeVar, Type, cast
+from .capture import CaptureReader
+from .compact import KEYFRAME_REQUEST, MESSAGE_ID as COMPACT_ID, CompactDecoder
+from .client_base import (ClientBase, get_property_request, get_property_result,
+                          set_property_request, set_property_result, tokenize)
+from .dedup import Deduplicator
+from .executor import CallbackExecutor, CallbackTimings, TaskCallbackExecutor
+from .loopback import LoopbackNetwork
+from .stats import FrameStatistics, LatencyStatistics, LatencySummary
+from .subscriber import OverflowPolicy, Subscriber
+from .timestamping import create_timestamping_endpoint
+
+from typing import Any, Awaitable, Callable, Iterable, TypeVar, Type, cast
 
 T = TypeVar("T")
-CmdDataCallback = Callable[[protocol.MoCapData], None]
-DataCallback = Callable[[int, protocol.MoCapData], None]
+V = TypeVar("V")
+DatagramCallback = Callable[[bytes], None]
+StampedDatagramCallback = Callable[[bytes, int | None], None]
+DataCallback = Callable[[int, protocol.MoCapData], Any]
+RawDataCallback = Callable[[int, bytes], Any]
 DoneCallback = Callable[[], None]
 DataQueue = asyncio.Queue[tuple[int, protocol.MoCapData]]
 ResponseCallback = Callable[[Any, tuple[str, int]], None]
 
 
-def tokenize(*tokens: bytes) -> bytes:
-    return b",".join(filter(None, tokens))
-    # return b",".join(tokens)
+@dc.dataclass
+class RetryPolicy:
+    """How unanswered command requests are sent again"""
+
+    retries: int = 0
+    """how many times a request is sent again if not answered"""
+    initial_timeout: float = 0.5
+    """the timeout [s] of the first attempt, until the round trip time has been measured"""
+    min_timeout: float = 0.05
+    """the minimal timeout [s] of an attempt"""
+    max_timeout: float = 2.0
+    """the maximal timeout [s] of an attempt"""
+    backoff: float = 2.0
+    """the factor multiplying the timeout after each attempt"""
+    late_timeout: float = 0.5
+    """how long [s] responses are still expected from a request that timed out, or that was
+    answered after being sent again, so that they are discarded
+    instead of being matched to the next requests"""
+
+
+@dc.dataclass
+class PendingRequest:
+    """A request waiting for its responses, which carry no request identifier"""
+
+    future: asyncio.Future[Any] | None
+    """resolved with the first response, None once answered or timed out"""
+    expected: int = 0
+    """the number of responses still expected (one per sent attempt)"""
+    expires: float = 0.0
+    """when [loop time] to stop expecting responses, once answered or timed out"""
+
+
+FRAME_OF_DATA_ID = protocol.NAT.FRAMEOFDATA.value.to_bytes(2, 'little')
+
+
+def open_multicast_socket(
+    multicast_address: str, client_address: str, data_port: int
+) -> socket.socket:
+    """
+    Opens a UDP socket that joins a multicast group.
+
+    :raises OSError: if the socket cannot join the group or bind to the port
+    """
+    membership = socket.inet_aton(multicast_address) + socket.inet_aton(client_address)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, 0)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        sock.bind(("", data_port))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def open_unicast_socket(client_address: str, data_port: int) -> socket.socket:
+    """
+    Opens a UDP socket bound to a port.
+
+    :raises OSError: if the socket cannot bind to the port
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    try:
+        sock.bind((client_address, data_port))
+    except OSError:
+        sock.close()
+        raise
+    return sock
 
 
 class DataProtocol(asyncio.Protocol):
     def __init__(
         self,
         membership: bytes,
-        cb: CmdDataCallback,
+        cb: StampedDatagramCallback,
         done: asyncio.Future[None],
         logger: logging.Logger,
     ):
@@ -43,11 +123,12 @@ class DataProtocol(asyncio.Protocol):
         #                 self._membership)
         self.logger.debug("Data socket connected")
 
-    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+    def datagram_received(self, data: bytes, addr: tuple[str, int],
+                          stamp: int | None = None) -> None:
         # print('datagram_received', data, addr)
-        msg = protocol.unpack(protocol.Buffer(data))
-        if isinstance(msg, protocol.MoCapData):
-            self._cb(msg)
+        # Frames are forwarded undecoded, so that duplicates are discarded early
+        if data[:2] in (FRAME_OF_DATA_ID, COMPACT_ID):
+            self._cb(data, stamp)
 
     def error_received(self, exc: Any) -> None:
         self.logger.error(f'{exc}')
@@ -62,13 +143,22 @@ class CommandProtocol(asyncio.Protocol):
         self,
         address: str,
         port: int,
-        cb: CmdDataCallback,
+        cb: DatagramCallback,
         connected: asyncio.Future[None],
         done: asyncio.Future[None],
         logger: logging.Logger,
+        max_in_flight: int = 64,
+        retry: RetryPolicy | None = None,
+        rtt_timeout: Callable[[], float | None] = lambda: None,
     ):
         self._server = (address, port)
-        self._response_type: Any = None
+        self.retry = retry or RetryPolicy()
+        self._rtt_timeout = rtt_timeout
+        # Requests waiting for a response, in FIFO order per response type
+        self._pending: dict[Any, collections.deque[PendingRequest]] = {}
+        # Echo requests waiting for a response, keyed by their stamp
+        self._pending_echoes: dict[int, asyncio.Future[Any]] = {}
+        self._in_flight = asyncio.Semaphore(max_in_flight)
         self._response_cb: dict[Any, ResponseCallback] = {}
         self._keep_alive_task: asyncio.Task[None] | None = None
         self._keep_alive_msg = protocol.pack(protocol.KeepAliveRequest())
@@ -110,32 +200,58 @@ class CommandProtocol(asyncio.Protocol):
 
     def connection_made(self, transport: asyncio.BaseTransport) -> None:
         sock = transport.get_extra_info("socket")
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        # if not self._keep_alive:
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        # no socket on a loopback network
+        if sock:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            # if not self._keep_alive:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         self.logger.debug("Command socket connected")
         self._transport = cast(asyncio.DatagramTransport, transport)
         self._connected.set_result(None)
 
     def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        if data[:2] == FRAME_OF_DATA_ID:
+            # Unicast frames may also be sent to the command socket
+            self._cb(data)
+            return
         msg = protocol.unpack(protocol.Buffer(data))
         if type(msg) in self._response_cb:
             self._response_cb[type(msg)](msg, addr)
-        if self._response_type and isinstance(msg, self._response_type):
-            self._response_type = None
-            self._response.set_result(msg)
-        if isinstance(msg, protocol.MoCapData):
-            self._cb(msg)
-            if self._keep_alive:
-                pass
-                # self._send_keep_alive()
-                # self._transport.sendto(self._keep_alive_msg, addr)
+        if isinstance(msg, protocol.EchoResponse):
+            echo = self._pending_echoes.pop(msg.request_stamp, None)
+            if echo and not echo.done():
+                echo.set_result(msg)
+        elif type(msg) in self._pending:
+            self._match(self._pending[type(msg)], msg)
+
+    def _match(self, pending: collections.deque[PendingRequest], msg: Any) -> None:
+        # Responses carry no request identifier: match the oldest request,
+        # or discard the response if the oldest request still expects a late or duplicated one.
+        now = asyncio.get_running_loop().time()
+        while pending:
+            request = pending[0]
+            if request.future is None and request.expires < now:
+                pending.popleft()
+                continue
+            request.expected -= 1
+            if request.future is not None:
+                if not request.future.done():
+                    request.future.set_result(msg)
+                self._expire(request, now)
+            if request.expected <= 0:
+                pending.popleft()
+            return
+
+    def _expire(self, request: PendingRequest, now: float) -> None:
+        request.future = None
+        request.expires = now + self.retry.late_timeout
 
     def error_received(self, exc: Any) -> None:
         self.logger.error(f'{exc}')
 
     def connection_lost(self, exc: Any) -> None:
         self.logger.warning("Command socket closed")
+        self._abort_pending()
         self._done.set_result(None)
 
     def stop_keep_alive(self) -> None:
@@ -145,6 +261,46 @@ class CommandProtocol(asyncio.Protocol):
 
     def close(self) -> None:
         self.stop_keep_alive()
+        self._abort_pending()
+
+    def _abort_pending(self) -> None:
+        futures = list(self._pending_echoes.values())
+        for pending in self._pending.values():
+            futures.extend(request.future for request in pending if request.future)
+        for future in futures:
+            if not future.done():
+                future.set_result(None)
+        self._pending_echoes.clear()
+        self._pending.clear()
+
+    @property
+    def requests_in_flight(self) -> int:
+        """The number of requests waiting for a response"""
+        return len(self._pending_echoes) + sum(
+            1 for p in self._pending.values() for request in p if request.future)
+
+    def _add_pending(self, msg: protocol.Msg, response_type: Any,
+                     future: asyncio.Future[Any]) -> PendingRequest | None:
+        if isinstance(msg, protocol.EchoRequest):
+            self._pending_echoes[msg.timestamp] = future
+            return None
+        request = PendingRequest(future)
+        self._pending.setdefault(response_type, collections.deque()).append(request)
+        return request
+
+    def _remove_pending(self, msg: protocol.Msg, response_type: Any,
+                        future: asyncio.Future[Any], request: PendingRequest | None) -> None:
+        if request is None:
+            if self._pending_echoes.get(msg.timestamp) is future:  # type: ignore[attr-defined]
+                del self._pending_echoes[msg.timestamp]  # type: ignore[attr-defined]
+            return
+        if request.future is None:
+            return
+        # Not answered: keep expecting the responses to the sent attempts for a while
+        self._expire(request, asyncio.get_running_loop().time())
+        pending = self._pending.get(response_type)
+        if pending is not None and request.expected <= 0 and request in pending:
+            pending.remove(request)
 
     async def send_request(
         self, data: bytes, timeout: float = 0.0
@@ -152,26 +308,99 @@ class CommandProtocol(asyncio.Protocol):
         return await self.send(protocol.Request(data), protocol.Response, timeout)
 
     async def send(
-        self, msg: protocol.Msg, response_type: Type[T], timeout: float = 0.0
+        self, msg: protocol.Msg, response_type: Type[T], timeout: float = 0.0,
+        retries: int | None = None
+    ) -> T | None:
+        """
+        Sends a request and waits for its response.
+
+        Many requests may be in flight at the same time: echo responses are matched
+        to their request by stamp. Other responses carry no request identifier
+        and are matched in FIFO order to the requests waiting for the same type
+        (e.g., all those answered by :py:class:`natnet_py.protocol.Response`),
+        assuming that the server answers them in order.
+        Echo requests skip the in-flight limit, not to bias round-trip times.
+
+        Unanswered requests are sent again up to ``retries`` times
+        (defaults to :py:attr:`RetryPolicy.retries`), waiting an adaptive timeout
+        based on the measured round trip time, which grows exponentially after each attempt.
+        The last attempt waits until ``timeout`` (if positive) expires.
+        A request that timed out, or that was answered after being sent again,
+        keeps its place in the queue for :py:attr:`RetryPolicy.late_timeout`,
+        to discard its late or duplicated responses.
+        Still, a response that is lost, or later than that, shifts the responses
+        of the following requests of the same type that are in flight.
+        """
+        if retries is None:
+            retries = self.retry.retries
+        if isinstance(msg, protocol.EchoRequest):
+            return await self._send(msg, response_type, timeout, retries)
+        async with self._in_flight:
+            return await self._send(msg, response_type, timeout, retries)
+
+    def _attempt_timeout(self) -> float:
+        rto = self._rtt_timeout()
+        if rto is None:
+            rto = self.retry.initial_timeout
+        return min(self.retry.max_timeout, max(self.retry.min_timeout, rto))
+
+    def request_timeout(self) -> float:
+        """
+        How long a request waits for its response when no timeout is given,
+        i.e., the sum of the timeouts of all its attempts.
+
+        :returns:   The time [s]
+        """
+        attempt_timeout = self._attempt_timeout()
+        total = 0.0
+        for _ in range(self.retry.retries + 1):
+            total += attempt_timeout
+            attempt_timeout = min(attempt_timeout * self.retry.backoff, self.retry.max_timeout)
+        return total
+
+    async def _send(
+        self, msg: protocol.Msg, response_type: Type[T], timeout: float, retries: int
     ) -> T | None:
         data = protocol.pack(msg)
-        self._response: asyncio.Future[T] = asyncio.get_running_loop().create_future()
-        self._response_type = response_type
-        self._transport.sendto(data, self._server)
-        if timeout > 0:
-            try:
-                return await asyncio.wait_for(self._response, timeout)
-            except asyncio.exceptions.TimeoutError:
-                self.logger.warning(f"Command request {msg} timed out after {timeout} s")
-                return None
-        else:
-            return await self._response
+        loop = asyncio.get_running_loop()
+        response: asyncio.Future[T] = loop.create_future()
+        request = self._add_pending(msg, response_type, response)
+        deadline = loop.time() + timeout if timeout > 0 else None
+        attempt_timeout = self._attempt_timeout()
+        try:
+            for attempt in range(retries + 1):
+                if request:
+                    request.expected += 1
+                self._transport.sendto(data, self._server)
+                remaining = deadline - loop.time() if deadline is not None else None
+                if attempt < retries:
+                    wait: float | None = attempt_timeout
+                    if remaining is not None:
+                        wait = min(attempt_timeout, remaining)
+                else:
+                    wait = remaining
+                await asyncio.wait([response], timeout=wait)
+                if response.done():
+                    return response.result()
+                if deadline is not None and loop.time() >= deadline:
+                    break
+                if attempt < retries:
+                    self.logger.debug(
+                        f"Command request {msg} not answered after {attempt_timeout:.3f} s: "
+                        f"retrying ({attempt + 1}/{retries})")
+                attempt_timeout = min(attempt_timeout * self.retry.backoff,
+                                      self.retry.max_timeout)
+            self.logger.warning(f"Command request {msg} timed out after {timeout} s")
+            return None
+        finally:
+            self._remove_pending(msg, response_type, response, request)
 
     async def send_echo(
         self, stamp: int, timeout: float = 0.0
     ) -> protocol.EchoResponse | None:
+        # Do not retry echoes: they are already periodic and would have biased RTTs
         return await self.send(
-            protocol.EchoRequest(stamp), protocol.EchoResponse, timeout
+            protocol.EchoRequest(stamp), protocol.EchoResponse, timeout, retries=0
         )
 
     async def connect(self, timeout: float = 0.0) -> protocol.ServerInfo | None:
@@ -217,7 +446,7 @@ class CommandProtocol(asyncio.Protocol):
         return servers
 
 
-class AsyncClient:
+class AsyncClient(ClientBase):
     """
     This class describes a Natnet client.
 
@@ -243,6 +472,10 @@ class AsyncClient:
 
        >>> client.data_callback = lambda time_ns, msg: print(time_ns, msg)
 
+       Callbacks are executed on the event loop, unless a ``callback_executor``
+       is provided (e.g., :py:class:`natnet_py.executor.ThreadPoolCallbackExecutor`).
+       Coroutine functions are scheduled as tasks.
+
     4. and/or wait for some time or until disconnection
 
        >>> await client.wait(duration=60.0)
@@ -264,6 +497,16 @@ class AsyncClient:
         logger: logging.Logger = logging.getLogger(),
         now: clock.NanoSecondGetter = time.time_ns,
         sync: bool = True,
+        retry: RetryPolicy | None = None,
+        auto_reconnect: bool = False,
+        reconnect_timeout: float = 2.0,
+        max_reconnect_period: float = 10.0,
+        dedup_window: int = 32,
+        callback_executor: CallbackExecutor | None = None,
+        clock_estimator: clock.ClockEstimator = clock.ClockEstimator.FILTER,
+        latency_window: float = 0.0,
+        kernel_timestamps: bool = False,
+        network: LoopbackNetwork | None = None,
     ):
         """
         Construct an instance
@@ -275,7 +518,28 @@ class AsyncClient:
         :param logger: the logger to use
         :param now: a function used to stamp incoming messages
         :param sync: whether to sync the client and server clocks upon connection
+        :param retry: how to retry unanswered commands. Defaults to no retries.
+        :param auto_reconnect: whether to automatically reconnect to the server
+                               when the connection is lost
+        :param reconnect_timeout: how long [s] without receiving data before
+                                  considering the connection lost, and the timeout
+                                  of each reconnection attempt
+        :param max_reconnect_period: the maximal period [s] between reconnection attempts
+        :param dedup_window: how many recent frames to remember to discard duplicates
+                             (e.g., received both on the data and command sockets).
+                             Set to zero to disable.
+        :param callback_executor: how to execute the data callback.
+                                  Defaults to executing it on the event loop.
+        :param clock_estimator: how to synchronize the client and server clocks
+        :param latency_window: the duration [s] of the rolling window of latency statistics.
+                               Set to zero to not compute latencies.
+        :param kernel_timestamps: whether to stamp frames with the time they were received
+                                  by the kernel (``SO_TIMESTAMPNS``, Linux only)
+                                  instead of the time they are processed.
+        :param network: an in-memory network to use instead of sockets
+                        (e.g., to test or benchmark the client with a local server).
         """
+        super().__init__(logger, now, clock_estimator)
         # The IP address of your local network interface
         self.client_address = address
         # NatNet Command channel
@@ -285,24 +549,38 @@ class AsyncClient:
         else:
             self._queue = None
         self._data_callback: DataCallback | None = None
+        self.raw_data_callback: RawDataCallback | None = None
+        """Called with the stamp and each (not duplicated) frame datagram, before decoding it"""
+        self._subscribers: list[Subscriber] = []
         # self.done_callback: DoneCallback | None = None
-        self._server_info: protocol.ServerInfo | None = None
-        self._description: protocol.MoCapDescription | None = None
-        self._rigid_body_names: dict[int, str] = {}
-        self.logger = logger
         self.data_transport: asyncio.DatagramTransport | None = None
         self.cmd_transport: asyncio.DatagramTransport | None = None
         self.data_protocol: DataProtocol | None = None
         self.cmd_protocol: CommandProtocol | None = None
-        self.clock: clock.SynchronizedClock | None = None
         self.data_has_unconnected: asyncio.Future[None] | None = None
         self.command_has_unconnected: asyncio.Future[None] | None = None
-        self._now = now
         self._sync = sync
-
-    @property
-    def rigid_body_names(self) -> dict[int, str]:
-        return self._rigid_body_names
+        self.kernel_timestamps = kernel_timestamps
+        self.network = network
+        self.retry = retry or RetryPolicy()
+        self.auto_reconnect = auto_reconnect
+        self.reconnect_timeout = reconnect_timeout
+        self.max_reconnect_period = max_reconnect_period
+        self._supervisor: asyncio.Task[None] | None = None
+        self._last_data_time = 0.0
+        self._lost = False
+        self.frame_statistics = FrameStatistics()
+        """Statistics about the received frames (gaps, duplicates, jitter, ...)"""
+        self.deduplicator = Deduplicator(dedup_window) if dedup_window > 0 else None
+        # Decodes the compact frames sent by a relay (see natnet_py.relay.Relay)
+        self.compact_decoder = CompactDecoder()
+        self._keyframe_request: asyncio.Future[Any] | None = None
+        """Discards duplicated frames before decoding them"""
+        self.latency_statistics = (
+            LatencyStatistics(latency_window) if latency_window > 0 else None)
+        """Rolling histograms of system, network and processing latencies"""
+        self.callback_executor = callback_executor or CallbackExecutor(logger)
+        """Executes the data callback"""
 
     @property
     def data_callback(self) -> DataCallback | None:
@@ -310,32 +588,46 @@ class AsyncClient:
 
     @data_callback.setter
     def data_callback(self, value: DataCallback | None) -> None:
+        if (asyncio.iscoroutinefunction(value)
+                and type(self.callback_executor) is CallbackExecutor):
+            self.callback_executor = TaskCallbackExecutor(logger=self.logger)
+        if value:
+            self.callback_executor.check(value)
         self._data_callback = value
 
     @property
-    def server_info(self) -> protocol.ServerInfo | None:
-        """The connected server"""
-        return self._server_info
+    def callback_timings(self) -> CallbackTimings:
+        """
+        Statistics about the execution of the data callback.
 
-    @server_info.setter
-    def server_info(self, value: protocol.ServerInfo) -> None:
-        self._server_info = value
-        if value:
-            version = value.nat_net_stream_version_server
-            protocol.set_version(version.major, version.minor)
+        Empty when the callback is executed inline by an executor that is not timed.
+        """
+        return self.callback_executor.timings
 
-    @property
-    def description(self) -> protocol.MoCapDescription | None:
-        """The connected mocap description"""
-        return self._description
+    def subscribe_local(
+        self,
+        maxsize: int = 10,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        max_rate: float = 0.0,
+    ) -> Subscriber:
+        """
+        Adds an independent local subscriber to the mocap data.
 
-    @description.setter
-    def description(self, value: protocol.MoCapDescription | None) -> None:
-        self._description = value
-        if value:
-            self._rigid_body_names = {rb.id: rb.name for rb in value.rigid_bodies}
-        else:
-            self._rigid_body_names = {}
+        All subscribers are fed by the same decoded messages,
+        but each one has its own queue and rate limit.
+
+        :param      maxsize:   The length of the subscriber queue
+        :param      policy:    What to do when the subscriber queue is full
+        :param      max_rate:  The maximal rate [fps] of updates.
+                               Set to zero to receive all updates.
+
+        :returns:   The subscriber. Call :py:meth:`Subscriber.close` to unsubscribe.
+        """
+        subscriber = Subscriber(
+            maxsize=maxsize, policy=policy, max_rate=max_rate,
+            on_close=self._subscribers.remove, logger=self.logger)
+        self._subscribers.append(subscriber)
+        return subscriber
 
     async def update_description(self, timeout: float = 0.0) -> None:
         """ Require a new description from the connected server
@@ -356,24 +648,14 @@ class AsyncClient:
     async def set_property(
         self, name: bytes, value: Any, node: bytes = b"", timeout: float = 0.0
     ) -> bool:
-        data = tokenize(b"SetProperty", node, name, str(value).encode("ascii"))
-        response = await self.send_request(data, timeout=timeout)
-        if response:
-            r: int = struct.unpack("<i", response.data)[0]
-            return r == 0
-        return False
+        data = set_property_request(name, value, node)
+        return set_property_result(await self.send_request(data, timeout=timeout))
 
     async def get_property(
         self, name: bytes, kind: Type[T], node: bytes = b"", timeout: float = 0.0
     ) -> T | None:
-        # TODO(Jerome): not sure it's should delete empty tokens.
-        # They list this as an example: `"GetProperty,,MoodLiveColor"`
-        # Maybe this is also valid for the other tokens
-        data = tokenize(b"GetProperty", node, name)
-        response = await self.send_request(data, timeout=timeout)
-        if response:
-            return kind(response.data)  # type: ignore
-        return None
+        data = get_property_request(name, node)
+        return get_property_result(await self.send_request(data, timeout=timeout), kind)
 
     async def set_framerate(self, rate: int, timeout: float = 0.0) -> bool:
         """
@@ -428,6 +710,116 @@ class AsyncClient:
             return True
         return False
 
+    def _item_timeout(self, timeout: float) -> float:
+        # A lost response fails only its own request in a bulk
+        if not self.cmd_protocol:
+            return timeout
+        item_timeout = self.cmd_protocol.request_timeout()
+        if timeout > 0:
+            return min(timeout, item_timeout)
+        return item_timeout
+
+    async def _gather(self, aws: Iterable[Awaitable[V]], default: V,
+                      timeout: float = 0.0) -> list[V]:
+        # Send all the requests at once and apply a single timeout to all of them
+        tasks = [asyncio.ensure_future(aw) for aw in aws]
+        if not tasks:
+            return []
+        _, pending = await asyncio.wait(tasks, timeout=timeout if timeout > 0 else None)
+        for task in pending:
+            task.cancel()
+        if pending:
+            self.logger.warning(
+                f"{len(pending)} of {len(tasks)} requests timed out after {timeout} s")
+        results = []
+        for task in tasks:
+            if task in pending:
+                results.append(default)
+            elif task.exception():
+                # a failing request does not abort the others
+                self.logger.warning(f"Request failed: {task.exception()!r}")
+                results.append(default)
+            else:
+                results.append(task.result())
+        return results
+
+    async def set_properties(
+        self, properties: Iterable[tuple[bytes, bytes, Any]], timeout: float = 0.0
+    ) -> list[bool]:
+        """
+        Sets many properties.
+
+        Requests are sent all at once (see :py:meth:`CommandProtocol.send`),
+        each waiting for its response at most :py:meth:`CommandProtocol.request_timeout`,
+        within a single timeout.
+
+        :param      properties:  The (node, name, value) of the properties to set
+        :param      timeout:     The timeout for all the requests
+
+        :returns:   Whether each request was successful
+        """
+        item_timeout = self._item_timeout(timeout)
+        return await self._gather(
+            (self.set_property(name, value, node=node, timeout=item_timeout)
+             for node, name, value in properties),
+            False, timeout)
+
+    async def get_properties(
+        self, nodes: Iterable[bytes], name: bytes, kind: Type[T], timeout: float = 0.0
+    ) -> list[T | None]:
+        """
+        Gets the same property of many nodes.
+
+        Requests are sent all at once (see :py:meth:`CommandProtocol.send`),
+        each waiting for its response at most :py:meth:`CommandProtocol.request_timeout`,
+        within a single timeout.
+
+        :param      nodes:    The nodes (e.g., rigid body names)
+        :param      name:     The name of the property
+        :param      kind:     The type of the property
+        :param      timeout:  The timeout for all the requests
+
+        :returns:   The value of the property for each node or None if not available
+        """
+        item_timeout = self._item_timeout(timeout)
+        return await self._gather(
+            (self.get_property(name, kind, node=node, timeout=item_timeout) for node in nodes),
+            None, timeout)
+
+    async def enable_assets(self, names: Iterable[bytes], timeout: float = 0.0) -> list[bool]:
+        """
+        Enables many assets.
+
+        Requests are sent all at once (see :py:meth:`CommandProtocol.send`),
+        each waiting for its response at most :py:meth:`CommandProtocol.request_timeout`,
+        within a single timeout.
+
+        :param      names:    The names of the assets
+        :param      timeout:  The timeout for all the requests
+
+        :returns:   Whether each request was successful
+        """
+        item_timeout = self._item_timeout(timeout)
+        return await self._gather(
+            (self.enable_asset(name, timeout=item_timeout) for name in names), False, timeout)
+
+    async def disable_assets(self, names: Iterable[bytes], timeout: float = 0.0) -> list[bool]:
+        """
+        Disables many assets.
+
+        Requests are sent all at once (see :py:meth:`CommandProtocol.send`),
+        each waiting for its response at most :py:meth:`CommandProtocol.request_timeout`,
+        within a single timeout.
+
+        :param      names:    The names of the assets
+        :param      timeout:  The timeout for all the requests
+
+        :returns:   Whether each request was successful
+        """
+        item_timeout = self._item_timeout(timeout)
+        return await self._gather(
+            (self.disable_asset(name, timeout=item_timeout) for name in names), False, timeout)
+
     async def clear_subscriptions(self, timeout: float = 0.0) -> bool:
         """
         Unsubscribe (requires NatNet >= 4)
@@ -516,39 +908,6 @@ class AsyncClient:
         response = await self.send_request(data, timeout=timeout)
         return response is not None
 
-    @property
-    def use_multicast(self) -> bool:
-        """
-        Whether the server is using multicasting to stream data
-
-        :returns:   True if multicasting
-        """
-        if not self.server_info or not self.server_info.connection_info:
-            return False
-        return self.server_info.connection_info.multicast
-
-    @property
-    def multicast_address(self) -> str:
-        """
-        The server IP4 multicast address
-
-        :returns:   An IP4 address
-        """
-        if not self.server_info or not self.server_info.connection_info:
-            return ''
-        return self.server_info.connection_info.multicast_address
-
-    @property
-    def data_port(self) -> int:
-        """
-        The configured data port
-
-        :returns:   The server actual port or the default port
-        """
-        if not self.server_info or not self.server_info.connection_info:
-            return 0
-        return self.server_info.connection_info.data_port
-
     @property
     def can_change_bitstream_version(self) -> bool:
         """
@@ -593,14 +952,138 @@ class AsyncClient:
             protocol.set_version(major, minor)
         return True
 
-    def _callback(self, msg: protocol.MoCapData) -> None:
-        data = (self._now(), msg)
+    def _datagram_received(self, data: bytes, stamp: int | None = None) -> None:
+        if stamp is None:
+            stamp = self._now()
+        else:
+            # the kernel stamps with the system clock: keep the age of the datagram
+            stamp = self._now() - max(0, time.time_ns() - stamp)
+        self._receive(data, stamp)
+
+    def _receive(self, data: bytes, stamp: int, received: int | None = None) -> None:
+        # received: when the datagram was actually received, if not at stamp (e.g., when replayed)
+        if data[:2] == COMPACT_ID:
+            if self.raw_data_callback:
+                self.raw_data_callback(stamp, data)
+            frame = self.compact_decoder.decode(data[2:])
+            if frame:
+                self._callback(frame, stamp, received)
+            else:
+                self._request_keyframe()
+            return
+        if self.deduplicator and self.deduplicator.is_duplicate(data):
+            # counted, although not decoded
+            self.frame_statistics.add_duplicate(int.from_bytes(data[4:8], 'little', signed=True))
+            return
+        if self.raw_data_callback:
+            self.raw_data_callback(stamp, data)
+        msg = protocol.unpack(protocol.Buffer(data))
+        if isinstance(msg, protocol.MoCapData):
+            self._callback(msg, stamp, received)
+
+    def _request_keyframe(self) -> None:
+        # Ask the relay for a keyframe, one request at a time
+        if self.cmd_protocol and (not self._keyframe_request or self._keyframe_request.done()):
+            self._keyframe_request = asyncio.ensure_future(self.cmd_protocol.send_request(
+                KEYFRAME_REQUEST, timeout=self.cmd_protocol.request_timeout()))
+
+    def _callback(self, msg: protocol.MoCapData, stamp: int | None = None,
+                  received: int | None = None) -> None:
+        self._last_data_time = time.monotonic()
+        data = (self._now() if stamp is None else stamp, msg)
+        self.frame_statistics.add(
+            msg.frame_number, data[0],
+            int(msg.suffix_data.timestamp * 1e9) if msg.suffix_data else None)
         if self._queue:
             if self._queue.full():
                 self._queue.get_nowait()
+                self._queue.task_done()
             self._queue.put_nowait(data)
+        for subscriber in self._subscribers:
+            subscriber.put(*data)
         if self.data_callback:
-            self.data_callback(*data)
+            self.callback_executor.submit(self.data_callback, *data)
+        if self.latency_statistics and msg.suffix_data:
+            self._add_latencies(self.latency_statistics, data[0], msg.suffix_data, received)
+
+    def _add_latencies(self, statistics: LatencyStatistics, stamp: int,
+                       suffix: protocol.FrameSuffixData, received: int | None = None) -> None:
+        processing = self._now() - (stamp if received is None else received)
+        network: int | None = None
+        if self.clock:
+            system, network = self.clock.compute_latencies(suffix, stamp)
+        elif self.server_info:
+            frequency = self.server_info.high_resolution_clock_frequency
+            system = (suffix.stamp_transmit - suffix.stamp_camera_mid_exposure
+                      ) * 1_000_000_000 // frequency
+        else:
+            return
+        statistics.add(stamp, system, network, processing)
+
+    async def play_capture(self,
+                           capture: CaptureReader | str,
+                           start: int = 0,
+                           stop: int | None = None,
+                           wait_for_queue: bool = False,
+                           batch: int = 256) -> int:
+        """
+        Feeds a raw capture (see :py:mod:`natnet_py.capture`) to the client,
+        as if its datagrams were received from a server, but without sockets nor pacing:
+        frames are processed as fast as possible, with their recorded stamps,
+        by the same consumers (data callback, subscribers, queue, statistics, ...).
+
+        While playing, :py:attr:`server_info` and :py:attr:`description` are the recorded ones
+        (:py:attr:`server_info` stays None if the capture has none,
+        e.g., latencies are then not computed).
+        Processing latencies are measured from when a datagram is fed, not from its recorded stamp.
+        The client must not be connected.
+
+        :param capture:        The capture or its path
+        :param start:          The position of the first datagram
+        :param stop:           The position after the last datagram
+        :param wait_for_queue: Whether to wait for frames to be consumed
+                               instead of dropping them when the queue is full
+        :param batch:          The number of datagrams processed before yielding to the event loop
+
+        :returns: The number of datagrams fed to the client
+        """
+        if self.cmd_protocol or self.server_info:
+            self.logger.warning("Trying to play a capture while connected")
+            return 0
+        reader = CaptureReader(capture) if isinstance(capture, str) else capture
+        count = 0
+        if not reader.server_info:
+            self.logger.warning(f"Capture {reader.path} has no server info")
+        try:
+            self.server_info = reader.server_info
+            self.description = reader.description
+            for record in reader.records(start, stop):
+                if wait_for_queue and self._queue and self._queue.full():
+                    # wait until the consumers have emptied the queue
+                    await self._queue.join()
+                self._receive(record.data, record.stamp, self._now())
+                count += 1
+                if count % batch == 0:
+                    await asyncio.sleep(0)
+            # let consumers process the last frames
+            await asyncio.sleep(0)
+        finally:
+            if reader is not capture:
+                reader.close()
+            self.server_info = None
+            self.description = None
+        return count
+
+    async def get_latencies(self) -> dict[str, LatencySummary] | None:
+        """
+        Summarizes the latencies of the frames received in the rolling window.
+
+        :returns: The summary of system, network and processing latencies
+                  or None if latencies are not computed
+        """
+        if not self.latency_statistics:
+            return None
+        return self.latency_statistics.snapshot(self._now())
 
     async def discover(
         self, broadcast_address: str, number: int = -1, timeout: float = 5.0
@@ -625,20 +1108,27 @@ class AsyncClient:
     async def init(self) -> None:
         if self.cmd_transport is not None:
             return
+        # the executor is closed when closing the client
+        self.callback_executor.open()
         loop = asyncio.get_running_loop()
 
         self.command_has_connected = loop.create_future()
         self.command_has_unconnected = loop.create_future()
         self.command_has_unconnected.add_done_callback(self._has_unconnected_command)
         self.logger.info(f"Opening command socket on {self.client_address}")
-        self.cmd_transport, self.cmd_protocol = await loop.create_datagram_endpoint(
+        create_datagram_endpoint = (
+            self.network.create_datagram_endpoint if self.network
+            else loop.create_datagram_endpoint)
+        self.cmd_transport, self.cmd_protocol = await create_datagram_endpoint(
             lambda: CommandProtocol(
                 '',
                 self.command_port,
-                self._callback,
+                self._datagram_received,
                 cast(asyncio.Future[None], self.command_has_connected),
                 cast(asyncio.Future[None], self.command_has_unconnected),
                 self.logger,
+                retry=self.retry,
+                rtt_timeout=self._rtt_timeout,
             ),
             family=socket.AF_INET,
             # local_addr=('', 0))
@@ -646,6 +1136,11 @@ class AsyncClient:
         )
         await self.command_has_connected
 
+    def _rtt_timeout(self) -> float | None:
+        if self.clock:
+            return self.clock.rtt.timeout
+        return None
+
     @property
     def server_address(self) -> tuple[str, int] | None:
         """The IP4 address and port of the connected server
@@ -702,8 +1197,6 @@ class AsyncClient:
             if servers:
                 server, self.server_info = next(iter(servers.items()))
                 self.cmd_protocol._server = server
-                self.logger.debug(f"Received server info {self.server_info}")
-                self.logger.info(f"Connected to server {server[0]}:{server[1]}")
             else:
                 return False
         else:
@@ -713,9 +1206,7 @@ class AsyncClient:
             if not self.server_info:
                 self.logger.warning("Failed connecting.")
                 return False
-            else:
-                self.logger.debug(f"Received server info {self.server_info}")
-            self.logger.info(f"Connected to server {server[0]}:{server[1]}")
+        self._connected_to(server)
         await self.update_description(timeout)
         if not self.description:
             return False
@@ -724,17 +1215,85 @@ class AsyncClient:
         #     f"Got description for rigid bodies: {', '.join(self.rigid_body_names.values())}"
         # )
         if self._sync:
-            self.clock = clock.SynchronizedClock(
-                self.cmd_protocol,
-                server_info=self.server_info,
-                logger=self.logger,
-                now=self._now,
-            )
+            self.clock = self._make_clock(self.cmd_protocol, self.server_info)
             await self.clock.init()
         if start_listening_for_data:
-            return await self.start_listening_for_data()
+            if not await self.start_listening_for_data():
+                return False
+        if self.auto_reconnect:
+            self._start_supervisor()
         return True
 
+    @property
+    def lost(self) -> bool:
+        """
+        Whether the client is trying to reconnect to a server that stopped streaming.
+
+        While lost, the client keeps the previous server info, description and clock.
+        """
+        return self._lost
+
+    def _start_supervisor(self) -> None:
+        self._stop_supervisor()
+        self._last_data_time = time.monotonic()
+        self._lost = False
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    def _stop_supervisor(self) -> None:
+        if self._supervisor and self._supervisor is not asyncio.current_task():
+            self._supervisor.cancel()
+        self._supervisor = None
+
+    async def _supervise(self) -> None:
+        while True:
+            await asyncio.sleep(self.reconnect_timeout / 4)
+            silence = time.monotonic() - self._last_data_time
+            if silence > self.reconnect_timeout:
+                self.logger.warning(f"No data received for {silence:.1f} s: reconnecting ...")
+                await self._reconnect()
+
+    async def _reconnect(self) -> None:
+        self._lost = True
+        if self.clock:
+            self.clock.stop()
+        # Back off the period between attempts, not the timeout of each attempt
+        period = min(self.reconnect_timeout, self.max_reconnect_period)
+        while self.cmd_protocol:
+            server_info = await self.cmd_protocol.connect(timeout=self.reconnect_timeout)
+            if server_info:
+                await self._reconnected(server_info)
+                return
+            self.logger.info(f"Failed reconnecting: retrying in {period:.1f} s")
+            await asyncio.sleep(period)
+            period = min(2 * period, self.max_reconnect_period)
+
+    async def _reconnected(self, server_info: protocol.ServerInfo) -> None:
+        old_info = self.server_info
+        self.server_info = server_info
+        if (old_info is None or old_info.connection_info != server_info.connection_info
+                or self.data_transport is None):
+            # The data stream has changed: need to reopen the data socket
+            if self.data_transport:
+                if self.data_has_unconnected:
+                    self.data_has_unconnected.remove_done_callback(self._has_unconnected_data)
+                self.data_transport.close()
+                self.data_transport = None
+                self.data_protocol = None
+            if self.cmd_protocol:
+                self.cmd_protocol.stop_keep_alive()
+            await self.start_listening_for_data()
+        self.logger.info("Reconnected to server")
+        self._last_data_time = time.monotonic()
+        self._lost = False
+        if self.clock:
+            # The server clock (i.e., host uptime) is not reset by a Motive restart
+            self.clock.resume()
+        if self.cmd_protocol:
+            # Keep the previous description until refreshed
+            description = await self.cmd_protocol.get_description(timeout=self.reconnect_timeout)
+            if description:
+                self.description = description
+
     async def start_listening_for_data(self, timeout: float = 5.0) -> bool:
         """
         Starts a listening for data.
@@ -756,56 +1315,65 @@ class AsyncClient:
             f"Opening data {'multicast' if self.use_multicast else 'unicast'}"
             f" socket on {self.client_address}:{self.data_port}"
         )
-        if self.use_multicast:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, 0)
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        def make_protocol() -> DataProtocol:
+            return DataProtocol(
+                membership,
+                self._datagram_received,
+                cast(asyncio.Future[None], self.data_has_unconnected),
+                self.logger,
+            )
+
+        sock: socket.socket | None = None
+        if not self.network:
             try:
-                sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
-                sock.bind(("", self.data_port))
-            except (
-                OSError,
-                socket.error,
-                socket.herror,
-                socket.gaierror,
-                socket.timeout,
-            ) as msg:
+                if self.use_multicast:
+                    sock = open_multicast_socket(
+                        self.multicast_address, self.client_address, self.data_port)
+                elif self.kernel_timestamps:
+                    sock = open_unicast_socket(self.client_address, self.data_port)
+            except OSError as msg:
                 self.logger.error(str(msg))
                 self.data_has_unconnected.set_result(None)
                 return False
+        endpoint = None
+        if sock and self.kernel_timestamps:
+            endpoint = await create_timestamping_endpoint(make_protocol, sock, self.logger)
+        if self.network:
+            local_addr = ((self.multicast_address if self.use_multicast else self.client_address),
+                          self.data_port)
             (
                 self.data_transport,
                 self.data_protocol,
-            ) = await loop.create_datagram_endpoint(
-                lambda: DataProtocol(
-                    membership,
-                    self._callback,
-                    cast(asyncio.Future[None], self.data_has_unconnected),
-                    self.logger,
-                ),
-                sock=sock,
-            )
+            ) = await self.network.create_datagram_endpoint(make_protocol, local_addr=local_addr)
+        elif endpoint:
+            self.data_transport = endpoint[0]
+            self.data_protocol = cast(DataProtocol, endpoint[1])
+        elif sock:
+            (
+                self.data_transport,
+                self.data_protocol,
+            ) = await loop.create_datagram_endpoint(make_protocol, sock=sock)
         else:
             (
                 self.data_transport,
                 self.data_protocol,
             ) = await loop.create_datagram_endpoint(
-                lambda: DataProtocol(
-                    membership,
-                    self._callback,
-                    cast(asyncio.Future[None], self.data_has_unconnected),
-                    self.logger,
-                ),
+                make_protocol,
                 # local_addr=(self.client_address, 0),
                 local_addr=(self.client_address, self.data_port),
                 family=socket.AF_INET,
                 proto=socket.IPPROTO_UDP,
             )
+        if not self.use_multicast:
             # TODO(Jerome): do I need to send it twice?
             await self.cmd_protocol.connect(timeout)
             self.cmd_protocol.init_keep_alive()
         return True
 
     def _unconnect_server(self) -> None:
+        self._stop_supervisor()
+        self._lost = False
         if self.data_transport:
             if not self.data_transport.is_closing():
                 self.data_transport.close()
@@ -822,6 +1390,9 @@ class AsyncClient:
 
     def _unconnect_client(self) -> None:
         self._unconnect_server()
+        # end the iterations over the subscribers
+        for subscriber in list(self._subscribers):
+            subscriber.close()
         if self.cmd_protocol:
             self.cmd_protocol.close()
             self.cmd_protocol = None
@@ -856,23 +1427,20 @@ class AsyncClient:
         self._unconnect_client()
         if self.command_has_unconnected:
             await asyncio.wait([self.command_has_unconnected])
+        self.callback_executor.close()
         self.logger.info("Closed")
 
-    @property
-    def connected(self) -> bool:
-        """
-        Whether a NatNet server is connected.
-
-        :returns:   True if connected else False
-        """
-        return self.server_info is not None
-
     async def wait_until_lost_connection(self) -> bool:
         try:
-            await asyncio.wait(
-                filter(None, [self.data_has_unconnected, self.command_has_unconnected]),
-                return_when=asyncio.FIRST_COMPLETED,
-            )
+            while True:
+                futures = [self.data_has_unconnected, self.command_has_unconnected]
+                done, _ = await asyncio.wait(
+                    filter(None, futures), return_when=asyncio.FIRST_COMPLETED)
+                # When reconnecting, the data socket may have been reopened:
+                # keep waiting on its new future.
+                if any(future in done for future in
+                       (self.data_has_unconnected, self.command_has_unconnected)):
+                    break
             logging.warning("Lost connection")
             return True
         except asyncio.exceptions.CancelledError:
@@ -893,14 +1461,18 @@ class AsyncClient:
             if not self._queue.empty() and last:
                 while not self._queue.empty():
                     value = self._queue.get_nowait()
+                    self._queue.task_done()
                 return value
             if timeout > 0:
                 try:
-                    return await asyncio.wait_for(self._queue.get(), timeout)
+                    value = await asyncio.wait_for(self._queue.get(), timeout)
                 except asyncio.exceptions.TimeoutError:
                     self.logger.warning("Timed out")
                     return None
-            return await self._queue.get()
+            else:
+                value = await self._queue.get()
+            self._queue.task_done()
+            return value
         self.logger.error("No queue")
         return None
 
@@ -920,15 +1492,3 @@ class AsyncClient:
                 return True
         await self.wait_until_lost_connection()
         return False
-
-    def server_ticks_to_client_ns_time(self, ticks: int) -> int:
-        """
-        Convert a server ticks to a time synchronized with the client clock
-
-        :param      ticks:  The ticks
-
-        :returns:   The time as nanoseconds since epoch
-        """
-        if self.clock:
-            return self.clock.server_ticks_to_client_time(ticks)
-        return 0
@@ -0,0 +1,300 @@
+import bisect
+import dataclasses as dc
+import mmap
+import os
+import struct
+from typing import Any, BinaryIO, Iterator
+
+from . import protocol
+
+MAGIC = b"NNCAP001"
+# magic, NatNet major and minor version, size of server info, size of description
+HEADER = struct.Struct("<8sBBII")
+# offset in the data file, length, receiving stamp [ns], frame number (-1 if not a frame)
+INDEX = struct.Struct("<QIqi")
+FRAME_OF_DATA = protocol.NAT.FRAMEOFDATA.value
+# message id, packet size, frame number
+FRAME_PREFIX = struct.Struct("<HHi")
+
+
+def index_path(path: str) -> str:
+    """The path of the index of a capture"""
+    return path + ".idx"
+
+
+def frame_number(data: bytes) -> int:
+    """The frame number of a datagram, without decoding it, or -1 if not a frame"""
+    if len(data) < FRAME_PREFIX.size:
+        return -1
+    message_id, _, number = FRAME_PREFIX.unpack_from(data)
+    return number if message_id == FRAME_OF_DATA else -1
+
+
+@dc.dataclass(frozen=True)
+class CaptureRecord:
+    """A datagram of a capture"""
+
+    stamp: int
+    """receiving time [ns]"""
+    frame_number: int
+    """frame number or -1 if not a frame"""
+    data: bytes
+    """the raw datagram"""
+
+    @property
+    def message(self) -> protocol.Msg | None:
+        """The decoded datagram"""
+        return protocol.unpack(protocol.Buffer(self.data))
+
+
+class CaptureWriter:
+    """
+    Records raw datagrams to an append-only capture.
+
+    A capture is made of two files:
+
+    - the data file, with a header (NatNet version, server info and description)
+      followed by the datagrams;
+    - the index (``<path>.idx``), with one fixed-width entry per datagram
+      (offset, length, receiving stamp and frame number).
+
+    Nothing is decoded while recording. Read captures with :py:class:`CaptureReader`.
+
+    Usage:
+
+    >>> writer = CaptureWriter("session.cap", client.server_info, client.description)
+    >>> client.raw_data_callback = writer.write
+    >>> ...
+    >>> writer.close()
+    """
+
+    def __init__(self,
+                 path: str,
+                 server_info: protocol.ServerInfo,
+                 description: protocol.MoCapDescription | None = None,
+                 version: tuple[int, int] | None = None):
+        """
+        Constructs a new instance.
+
+        :param path:        The path of the data file (overwritten)
+        :param server_info: The server info
+        :param description: The description of the assets
+        :param version:     The NatNet version of the datagrams.
+                            Defaults to the current version of :py:mod:`natnet_py.protocol`.
+        """
+        self.path = path
+        self.count = 0
+        """number of recorded datagrams"""
+        major, minor = version or protocol.get_version()
+        info = protocol.pack(server_info)
+        desc = protocol.pack(description) if description else b''
+        self._data: BinaryIO = open(path, "wb")
+        self._index: BinaryIO = open(index_path(path), "wb")
+        self._data.write(HEADER.pack(MAGIC, major, minor, len(info), len(desc)))
+        self._data.write(info)
+        self._data.write(desc)
+        self._offset = self._data.tell()
+
+    def write(self, stamp: int, data: bytes) -> None:
+        """
+        Records a datagram.
+
+        Can be used directly as a raw data callback.
+
+        :param stamp: The receiving time [ns]
+        :param data:  The datagram
+        """
+        self._data.write(data)
+        self._index.write(INDEX.pack(self._offset, len(data), stamp, frame_number(data)))
+        self._offset += len(data)
+        self.count += 1
+
+    def flush(self) -> None:
+        """Flushes the files, to make the datagrams visible to readers"""
+        # write the data before the index, so that the index is never ahead
+        self._data.flush()
+        self._index.flush()
+
+    def close(self) -> None:
+        """Closes the files"""
+        if self._data.closed:
+            return
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self) -> 'CaptureWriter':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class _Column:
+    # A sequence view on one field of the index, to bisect it
+
+    def __init__(self, reader: 'CaptureReader', field: int):
+        self._reader = reader
+        self._field = field
+
+    def __len__(self) -> int:
+        return len(self._reader)
+
+    def __getitem__(self, i: int) -> int:
+        return self._reader._entry(i)[self._field]
+
+
+class CaptureReader:
+    """
+    Reads a capture recorded by :py:class:`CaptureWriter`.
+
+    Both files are memory-mapped: records are accessed by position, or found by time or
+    frame number by bisection, and datagrams are only decoded when accessed.
+    Opening a capture sets the NatNet version of :py:mod:`natnet_py.protocol`
+    to the version of the capture.
+
+    Usage:
+
+    >>> with CaptureReader("session.cap") as reader:
+    ...     for stamp, msg in reader.frames(start=reader.index_at(stamp)):
+    ...         ...
+    """
+
+    def __init__(self, path: str):
+        """
+        Constructs a new instance.
+
+        :param path: The path of the data file
+
+        :raises ValueError: if the file is not a capture
+        """
+        self.path = path
+        self._data_file = open(path, "rb")
+        self._index_file = open(index_path(path), "rb")
+        self._data = self._map(self._data_file)
+        self._index = self._map(self._index_file)
+        if len(self._data) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a capture")
+        magic, major, minor, info_size, desc_size = HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a capture")
+        self.version = (major, minor)
+        """NatNet version of the datagrams"""
+        protocol.set_version(major, minor)
+        offset = HEADER.size
+        info = protocol.unpack(protocol.Buffer(self._data[offset:offset + info_size]))
+        offset += info_size
+        desc = (protocol.unpack(protocol.Buffer(self._data[offset:offset + desc_size]))
+                if desc_size else None)
+        self.server_info = info if isinstance(info, protocol.ServerInfo) else None
+        """the server info"""
+        self.description = desc if isinstance(desc, protocol.MoCapDescription) else None
+        """the description of the assets"""
+        # ignore an incomplete tail (e.g., after a crash)
+        self._size = len(self._index) // INDEX.size
+        while self._size and sum(self._entry(self._size - 1)[:2]) > len(self._data):
+            self._size -= 1
+
+    @staticmethod
+    def _map(f: BinaryIO) -> mmap.mmap | bytes:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _entry(self, i: int) -> tuple[int, int, int, int]:
+        return INDEX.unpack_from(self._index, i * INDEX.size)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i: int) -> CaptureRecord:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(i)
+        offset, length, stamp, number = self._entry(i)
+        return CaptureRecord(stamp, number, self._data[offset:offset + length])
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        return self.records()
+
+    @property
+    def start_stamp(self) -> int | None:
+        """The stamp of the first datagram"""
+        return self._entry(0)[2] if self._size else None
+
+    @property
+    def end_stamp(self) -> int | None:
+        """The stamp of the last datagram"""
+        return self._entry(self._size - 1)[2] if self._size else None
+
+    def index_at(self, stamp: int) -> int:
+        """
+        Finds the first datagram received at or after a time.
+
+        Assumes that stamps are not decreasing.
+
+        :param stamp: The time [ns]
+
+        :returns: The position of the datagram (``len(self)`` if none)
+        """
+        return bisect.bisect_left(_Column(self, 2), stamp)  # type: ignore[arg-type]
+
+    def index_of_frame(self, number: int) -> int | None:
+        """
+        Finds a frame by number.
+
+        Assumes that frame numbers are increasing.
+
+        :param number: The frame number
+
+        :returns: The position of the frame or None if not found
+        """
+        i = bisect.bisect_left(_Column(self, 3), number)  # type: ignore[arg-type]
+        if i < self._size and self._entry(i)[3] == number:
+            return i
+        return None
+
+    def records(self, start: int = 0, stop: int | None = None) -> Iterator[CaptureRecord]:
+        """
+        Iterates over the datagrams
+
+        :param start: The position of the first datagram
+        :param stop:  The position after the last datagram
+        """
+        stop = self._size if stop is None else min(stop, self._size)
+        for i in range(start, stop):
+            yield self[i]
+
+    def frames(self, start: int = 0, stop: int | None = None
+               ) -> Iterator[tuple[int, protocol.MoCapData]]:
+        """
+        Iterates over the decoded frames, like a client data callback.
+
+        :param start: The position of the first datagram
+        :param stop:  The position after the last datagram
+
+        :returns: The receiving stamp and the frame
+        """
+        for record in self.records(start, stop):
+            if record.frame_number < 0:
+                continue
+            msg = record.message
+            if isinstance(msg, protocol.MoCapData):
+                yield record.stamp, msg
+
+    def close(self) -> None:
+        """Closes the files"""
+        for m in (self._data, self._index):
+            if isinstance(m, mmap.mmap):
+                m.close()
+        self._data_file.close()
+        self._index_file.close()
+
+    def __enter__(self) -> 'CaptureReader':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
@@ -0,0 +1,161 @@
+import logging
+import struct
+from typing import Any, Type, TypeVar
+
+from . import clock
+from . import protocol
+
+T = TypeVar("T")
+
+
+def tokenize(*tokens: bytes) -> bytes:
+    return b",".join(filter(None, tokens))
+    # return b",".join(tokens)
+
+
+def set_property_request(name: bytes, value: Any, node: bytes = b"") -> bytes:
+    return tokenize(b"SetProperty", node, name, str(value).encode("ascii"))
+
+
+def get_property_request(name: bytes, node: bytes = b"") -> bytes:
+    # TODO(Jerome): not sure it's should delete empty tokens.
+    # They list this as an example: `"GetProperty,,MoodLiveColor"`
+    # Maybe this is also valid for the other tokens
+    return tokenize(b"GetProperty", node, name)
+
+
+def set_property_result(response: protocol.Response | None) -> bool:
+    """Whether the response to a ``SetProperty`` request reports success"""
+    if response:
+        r: int = struct.unpack("<i", response.data)[0]
+        return r == 0
+    return False
+
+
+def get_property_result(response: protocol.Response | None, kind: Type[T]) -> T | None:
+    """The value in the response to a ``GetProperty`` request"""
+    if response:
+        return kind(response.data)  # type: ignore
+    return None
+
+
+class ClientBase:
+    """
+    The state shared by :py:class:`natnet_py.AsyncClient` and :py:class:`natnet_py.DirectClient`:
+    the connected server, its description and the synchronized clock.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        now: clock.NanoSecondGetter,
+        clock_estimator: clock.ClockEstimator,
+    ):
+        self.logger = logger
+        self._now = now
+        self._server_info: protocol.ServerInfo | None = None
+        self._description: protocol.MoCapDescription | None = None
+        self._rigid_body_names: dict[int, str] = {}
+        self.clock: clock.SynchronizedClock | None = None
+        self.clock_estimator = clock_estimator
+        self.clock_telemetry = clock.ClockTelemetry()
+        """Monitors the quality of the clock synchronization"""
+
+    @property
+    def rigid_body_names(self) -> dict[int, str]:
+        return self._rigid_body_names
+
+    @property
+    def server_info(self) -> protocol.ServerInfo | None:
+        """The connected server"""
+        return self._server_info
+
+    @server_info.setter
+    def server_info(self, value: protocol.ServerInfo | None) -> None:
+        self._server_info = value
+        if value:
+            version = value.nat_net_stream_version_server
+            protocol.set_version(version.major, version.minor)
+
+    @property
+    def description(self) -> protocol.MoCapDescription | None:
+        """The connected mocap description"""
+        return self._description
+
+    @description.setter
+    def description(self, value: protocol.MoCapDescription | None) -> None:
+        self._description = value
+        if value:
+            self._rigid_body_names = {rb.id: rb.name for rb in value.rigid_bodies}
+        else:
+            self._rigid_body_names = {}
+
+    @property
+    def connected(self) -> bool:
+        """
+        Whether a NatNet server is connected.
+
+        :returns:   True if connected else False
+        """
+        return self.server_info is not None
+
+    @property
+    def use_multicast(self) -> bool:
+        """
+        Whether the server is using multicasting to stream data
+
+        :returns:   True if multicasting
+        """
+        if not self.server_info or not self.server_info.connection_info:
+            return False
+        return self.server_info.connection_info.multicast
+
+    @property
+    def multicast_address(self) -> str:
+        """
+        The server IP4 multicast address
+
+        :returns:   An IP4 address
+        """
+        if not self.server_info or not self.server_info.connection_info:
+            return ''
+        return self.server_info.connection_info.multicast_address
+
+    @property
+    def data_port(self) -> int:
+        """
+        The configured data port
+
+        :returns:   The server actual port or the default port
+        """
+        if not self.server_info or not self.server_info.connection_info:
+            return 0
+        return self.server_info.connection_info.data_port
+
+    def _make_clock(
+        self, cmd: clock.Client | None, server_info: protocol.ServerInfo
+    ) -> clock.SynchronizedClock:
+        return clock.SynchronizedClock(
+            cmd,
+            server_info=server_info,
+            logger=self.logger,
+            now=self._now,
+            estimator=self.clock_estimator,
+            telemetry=self.clock_telemetry,
+        )
+
+    def _connected_to(self, server: tuple[str, int]) -> None:
+        self.logger.debug(f"Received server info {self.server_info}")
+        self.logger.info(f"Connected to server {server[0]}:{server[1]}")
+
+    def server_ticks_to_client_ns_time(self, ticks: int) -> int:
+        """
+        Convert a server ticks to a time synchronized with the client clock
+
+        :param      ticks:  The ticks
+
+        :returns:   The time as nanoseconds since epoch
+        """
+        if self.clock:
+            return self.clock.server_ticks_to_client_time(ticks)
+        return 0
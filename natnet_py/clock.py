@@ -1,11 +1,16 @@
 # largely inspired by https://github.com/mje-nz/python_natnet/blob/master/src/natnet/comms.py
 
 import asyncio
+import collections
+import dataclasses as dc
+import enum
 import logging
+import statistics
 import time
 from typing import Callable, Protocol
 
 from . import protocol
+from .stats import Histogram
 
 # All time units are in nanoseconds
 # dt_s = (1 + beta) * dt_c
@@ -21,17 +26,230 @@ class Client(Protocol):
         ...
 
 
+class RTTEstimator:
+    """Smoothed round trip time and its variation, as in TCP (RFC 6298)"""
+
+    def __init__(self, alpha: float = 0.125, beta: float = 0.25) -> None:
+        self.alpha = alpha
+        self.beta = beta
+        self.srtt: float | None = None  # ns
+        self.rttvar = 0.0  # ns
+        self.count = 0
+
+    def add(self, rtt: int) -> None:
+        if self.srtt is None:
+            self.srtt = float(rtt)
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar += self.beta * (abs(self.srtt - rtt) - self.rttvar)
+            self.srtt += self.alpha * (rtt - self.srtt)
+        self.count += 1
+
+    @property
+    def timeout(self) -> float | None:
+        """The retransmission timeout in seconds or None if no RTT has been measured yet"""
+        if self.srtt is None:
+            return None
+        return (self.srtt + 4 * self.rttvar) * 1e-9
+
+
+class ClockEstimator(enum.Enum):
+    """How the client and server clocks are synchronized"""
+
+    FILTER = 0
+    """filter echoes with a RTT threshold and slowly converge on the skew"""
+    REGRESSION = 1
+    """robust linear regression over the low-RTT echoes in a sliding window"""
+
+
+class RegressionEstimator:
+    """
+    Estimates the offset and skew between server and client clocks
+    from a sliding window of echoes.
+
+    Each echo gives a sample of the server time (``t1_s``) at the midpoint
+    between the client sending (``t0_c``) and receiving (``t2_c``) times.
+    Only the fraction ``quantile`` of the samples with the lowest RTT is used
+    and fitted with a Theil-Sen estimator, which is robust to outliers.
+    The skew is estimated only once the selected samples span ``min_skew_span`` ns.
+    """
+
+    def __init__(self, window: int = 128, quantile: float = 0.1, min_samples: int = 4,
+                 min_skew_span: int = 10_000_000_000) -> None:
+        self._samples: collections.deque[tuple[int, int, int]] = collections.deque(
+            maxlen=window)
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_skew_span = min_skew_span
+        self.reference = 0  # ns (client time)
+        self.offset = 0.0  # ns (server - client time at reference)
+        self.skew = 0.0
+        self.residual = 0.0  # ns
+        self.min_rtt = 0  # ns
+        self.max_rtt = 0  # ns (of the selected samples)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    @property
+    def uncertainty(self) -> float:
+        """
+        A bound on the offset error [ns]: half the minimal RTT
+        (for unknown delay asymmetry) plus the spread of the residuals.
+        """
+        return self.min_rtt / 2 + self.residual
+
+    def add(self, t0_c: int, t1_s: int, t2_c: int) -> None:
+        self._samples.append((t2_c - t0_c, t0_c + (t2_c - t0_c) // 2, t1_s))
+        self._fit()
+
+    def _fit(self) -> None:
+        samples = sorted(self._samples)
+        number = max(self.min_samples, round(len(samples) * self.quantile))
+        selected = samples[:number]
+        self.min_rtt = selected[0][0]
+        self.max_rtt = selected[-1][0]
+        self.reference = max(t_c for _, t_c, _ in selected)
+        xs = [t_c - self.reference for _, t_c, _ in selected]
+        ys = [t_s - t_c for _, t_c, t_s in selected]
+        skew = 0.0
+        if max(xs) - min(xs) >= self.min_skew_span:
+            slopes = [(ys[j] - ys[i]) / (xs[j] - xs[i])
+                      for i in range(len(xs)) for j in range(i + 1, len(xs))
+                      if xs[j] != xs[i]]
+            if slopes:
+                skew = statistics.median(slopes)
+        self.skew = skew
+        self.offset = statistics.median(y - skew * x for x, y in zip(xs, ys))
+        residuals = [abs(y - self.offset - skew * x) for x, y in zip(xs, ys)]
+        # median absolute deviation, scaled to a standard deviation
+        self.residual = 1.4826 * statistics.median(residuals)
+
+
+@dc.dataclass(frozen=True)
+class ClockModel:
+    """
+    A snapshot of the relation between server and client clocks:
+    ``t_s - t2_s = (1 + beta) * (t_c - t2_c)``, valid for server times from ``since``.
+    """
+
+    frequency: int
+    """the server clock frequency [ticks/s]"""
+    t2_c: int
+    """the client reference time [ns]"""
+    t2_s: int
+    """the server reference time [ns]"""
+    beta: float
+    """the skew"""
+    since: int
+    """the server time [ns] from which the model is valid"""
+
+    def ticks_to_nanoseconds(self, ticks: int) -> int:
+        return ticks // self.frequency * 1_000_000_000 + (
+            ticks % self.frequency) * 1_000_000_000 // self.frequency
+
+    def server_ticks_to_client_time(self, ticks: int) -> int:
+        t_s = self.ticks_to_nanoseconds(ticks)
+        return self.t2_c + round((t_s - self.t2_s) / (1 + self.beta))
+
+
+@dc.dataclass
+class ClockSample:
+    """The outcome of a synchronization update"""
+
+    stamp: int
+    """the client time [ns] when the echo response was received"""
+    rtt: int
+    """the round trip time [ns] of the echo"""
+    accepted: bool
+    """whether the echo has been used to update the estimate"""
+    offset: int
+    """the estimated offset [ns] between server and client time at ``stamp``"""
+    skew: float
+    """the estimated skew"""
+    uncertainty: float | None
+    """a bound [ns] on the error of the estimate"""
+
+
+ClockSampleCallback = Callable[[ClockSample], None]
+
+
+class ClockTelemetry:
+    """
+    Monitors the quality of the clock synchronization: it keeps a time series
+    of the latest updates, a histogram of round trip times and counts echoes.
+    """
+
+    def __init__(self, size: int = 1024):
+        """
+        Constructs a new instance.
+
+        :param size: The number of updates kept in :py:attr:`samples`
+        """
+        self.samples: collections.deque[ClockSample] = collections.deque(maxlen=size)
+        """the latest updates"""
+        self.rtt = Histogram()
+        """the round trip times [ns] of all echoes"""
+        self.accepted = 0
+        """number of echoes used to update the estimate"""
+        self.rejected = 0
+        """number of echoes discarded (e.g., because their RTT was too large)"""
+        self.timeouts = 0
+        """number of echoes without (a matching) response"""
+        self.callback: ClockSampleCallback | None = None
+        """called after each update"""
+
+    @property
+    def last(self) -> ClockSample | None:
+        """The latest update"""
+        return self.samples[-1] if self.samples else None
+
+    def add(self, sample: ClockSample) -> None:
+        self.samples.append(sample)
+        self.rtt.add(sample.rtt)
+        if sample.accepted:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+        if self.callback:
+            self.callback(sample)
+
+    def reset(self) -> None:
+        """Clear the telemetry"""
+        self.samples.clear()
+        self.rtt.reset()
+        self.accepted = self.rejected = self.timeouts = 0
+
+
 class SynchronizedClock:
 
     def __init__(
         self,
-        cmd: Client,
+        cmd: Client | None,
         server_info: protocol.ServerInfo,
         logger: logging.Logger,
         estimate_skew: bool = False,
-        period: float = 500.0,
+        period: float | None = None,
         now: NanoSecondGetter = time.time_ns,
+        estimator: ClockEstimator = ClockEstimator.FILTER,
+        burst: int = 4,
+        telemetry: ClockTelemetry | None = None,
     ) -> None:
+        """
+        Constructs a new instance.
+
+        :param cmd:           Used to send echo requests
+        :param server_info:   The server information
+        :param logger:        The logger to use
+        :param estimate_skew: Whether to estimate the skew (filter estimator only)
+        :param period:        The period [s] of the echoes. Defaults to 500 s
+                              for the filter and 10 s for the regression estimator.
+        :param now:           The client clock
+        :param estimator:     How to estimate the server clock
+        :param burst:         The number of concurrent echoes sent at once
+                              by the regression estimator
+        :param telemetry:     Where to record the updates
+        """
         self._cmd = cmd
         self._freq = server_info.high_resolution_clock_frequency  # ticks / s
         self.count = 0
@@ -40,11 +258,21 @@ class SynchronizedClock:
         self._t2_s = 0  # ns
         self._min_rtt = 1e9  # ns
         self._beta = 0.0
+        self.rtt = RTTEstimator()
         self._task: asyncio.Task[None] | None = None
         self.logger = logger
         self.estimate_skew = estimate_skew
+        if period is None:
+            period = 10.0 if estimator == ClockEstimator.REGRESSION else 500.0
         self._period = period
         self._now_ns = now
+        self.estimator = estimator
+        self.regression = RegressionEstimator()
+        self.burst = max(1, burst)
+        self._last_stamp = 0
+        self.history: collections.deque[ClockModel] = collections.deque(maxlen=65536)
+        """the models estimated at each synchronization update"""
+        self.telemetry = telemetry or ClockTelemetry()
 
     async def init(self) -> None:
         await self._start()
@@ -55,44 +283,113 @@ class SynchronizedClock:
             self._task.cancel()
             self._task = None
 
+    def resume(self, echoes: int = 2) -> None:
+        """
+        Restarts periodic synchronization after :py:meth:`stop`,
+        keeping the current estimate and refining it with a few echoes.
+        """
+        self.stop()
+        self._task = asyncio.create_task(self._run(echoes))
+
     async def _start(self) -> None:
         self.logger.info(f"Performing initial clock sync {self.count} ...")
         while self.count < 10:
-            await self.echo()
+            await self._echoes()
         self.logger.info(
             f"Initial clock sync done: min_rtt {self._min_rtt} ns, beta {self._beta}, delta {self._t2_c - self._t2_s}"
         )
 
-    async def _run(self) -> None:
+    async def _run(self, echoes: int = 0) -> None:
         # await self._start()
+        for _ in range(echoes):
+            await self._echoes()
         while True:
             await asyncio.sleep(self._period)
+            await self._echoes()
+
+    async def _echoes(self) -> None:
+        if self.estimator == ClockEstimator.REGRESSION:
+            # The lowest RTT echoes of the burst will be selected
+            await asyncio.gather(*(self.echo() for _ in range(self.burst)))
+        else:
             await self.echo()
 
     def ticks_to_nanoseconds(self, ticks: int) -> int:
         return int(1e9 * ticks / self._freq)
 
     async def echo(self) -> None:
-        self._t0_c = self._now_ns()
-        self.logger.debug(f"<- Echo {self.count}: client time {self._t0_c}")
-        response = await self._cmd.send_echo(self._t0_c, timeout=0.5)
+        if not self._cmd:
+            return
+        # Echoes may be in flight concurrently: keep the request stamp local
+        # and unique, as it identifies the response
+        t0_c = max(self._now_ns(), self._last_stamp + 1)
+        self._last_stamp = t0_c
+        self._t0_c = t0_c
+        self.logger.debug(f"<- Echo {self.count}: client time {t0_c}")
+        response = await self._cmd.send_echo(t0_c, timeout=0.5)
         t2_c = self._now_ns()
         if not response:
+            self.telemetry.timeouts += 1
             return
-        if response.request_stamp != self._t0_c:
+        if response.request_stamp != t0_c:
             self.logger.warning(
-                f"Echo response {response} does not match request {self._t0_c}"
+                f"Echo response {response} does not match request {t0_c}"
             )
+            self.telemetry.timeouts += 1
             return
         self.update(
-            t0_c=self._t0_c,
+            t0_c=t0_c,
             t2_c=t2_c,
             t1_s=self.ticks_to_nanoseconds(response.received_stamp),
         )
         self.count += 1
 
+    @property
+    def uncertainty(self) -> float | None:
+        """A bound [ns] on the error of the estimated server time, if synchronized"""
+        if not self.count:
+            return None
+        return self._uncertainty()
+
+    def _uncertainty(self) -> float:
+        if self.estimator == ClockEstimator.REGRESSION:
+            return self.regression.uncertainty
+        return self._min_rtt / 2
+
+    @property
+    def model(self) -> ClockModel:
+        """The current (frozen) clock model"""
+        return ClockModel(self._freq, self._t2_c, self._t2_s, self._beta,
+                          self.history[-1].since if self.history else 0)
+
     def update(self, t0_c: int, t1_s: int, t2_c: int) -> None:
+        previous = (self._t2_c, self._t2_s, self._beta)
+        accepted = self._update(t0_c, t1_s, t2_c)
+        if (self._t2_c, self._t2_s, self._beta) != previous:
+            since = 0 if not self.history else self.client_to_server_time(t2_c)
+            self.history.append(
+                ClockModel(self._freq, self._t2_c, self._t2_s, self._beta, since))
+        self.telemetry.add(ClockSample(
+            stamp=t2_c, rtt=t2_c - t0_c, accepted=accepted,
+            offset=self.client_to_server_time(t2_c) - t2_c, skew=self._beta,
+            uncertainty=self._uncertainty()))
+
+    def _update(self, t0_c: int, t1_s: int, t2_c: int) -> bool:
         rtt = t2_c - t0_c
+        self.rtt.add(rtt)
+        if self.estimator == ClockEstimator.REGRESSION:
+            regression = self.regression
+            regression.add(t0_c, t1_s, t2_c)
+            self._t2_c = regression.reference
+            self._t2_s = regression.reference + int(regression.offset)
+            self._beta = regression.skew
+            self._min_rtt = min(self._min_rtt, rtt)
+            self.logger.debug(
+                f"-> Echo {self.count}: RTT {rtt} (min {regression.min_rtt}), "
+                f"offset {regression.offset:.0f}, skew {regression.skew:.3e}, "
+                f"uncertainty {regression.uncertainty:.0f}")
+            return rtt <= regression.max_rtt
+        accepted = True
         if not self._t2_s:
             # First echo, initialize
             self._t2_s = t1_s + int((1 + self._beta) * rtt / 2)
@@ -130,9 +427,12 @@ class SynchronizedClock:
                 self.logger.debug(
                     f"-> Echo {self.count}: client time {self._t0_c} -- {self._t2_c}, server time {self._t2_s}"
                     f", RTT {rtt} (min {self._min_rtt}), dt {dt_c}")
+            else:
+                accepted = False
 
         if rtt < self._min_rtt:
             self._min_rtt = rtt
+        return accepted
 
     def server_ticks_to_client_time(self, ticks: int) -> int:
         t_s = self.ticks_to_nanoseconds(ticks)
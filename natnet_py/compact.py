@@ -0,0 +1,344 @@
+import math
+import struct
+
+from . import protocol
+from .buffer import Quaternion, Vector3
+
+KEYFRAME = 1
+HAS_SUFFIX = 2
+
+VALID = 1
+POSITION = 2
+ORIENTATION = 4
+ERROR = 8
+REMOVED = 16
+
+# The id of compact frames sent by a relay, outside of the NatNet message ids
+MESSAGE_ID = (0xC0F0).to_bytes(2, 'little')
+# The request sent to a relay by a client that waits for a keyframe
+KEYFRAME_REQUEST = b"CompactKeyframe"
+
+# kind, sequence number
+HEADER = struct.Struct("<BH")
+# position resolution, quaternion bits
+PARAMS = struct.Struct("<fB")
+ERROR_FORMAT = struct.Struct("<e")
+
+# quantized position, packed orientation, packed error, valid
+State = tuple[tuple[int, int, int], int, bytes, bool]
+Suffix = tuple[int, int, int, int, int, int]
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """Appends a signed integer using zig-zag and variable length encoding"""
+    value = value << 1 if value >= 0 else ((-value) << 1) - 1
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    """Reads a signed integer encoded by :py:func:`write_varint`"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1) ^ -(value & 1), offset
+
+
+def pack_quaternion(q: Quaternion, bits: int) -> int:
+    """
+    Packs a quaternion using the smallest-three encoding.
+
+    :param q:    The quaternion (x, y, z, w)
+    :param bits: The number of bits of each of the three smallest components
+
+    :returns: An integer of ``2 + 3 * bits`` bits
+    """
+    norm = math.sqrt(sum(c * c for c in q))
+    if norm == 0:
+        q = (0.0, 0.0, 0.0, 1.0)
+        norm = 1.0
+    index = max(range(4), key=lambda i: abs(q[i]))
+    # q and -q are the same rotation: make the largest component positive
+    factor = (-1.0 if q[index] < 0 else 1.0) / norm
+    scale = (1 << bits) - 1
+    value = index
+    for i in range(4):
+        if i != index:
+            # the other components are in [-1/sqrt(2), 1/sqrt(2)]
+            u = round((q[i] * factor / math.sqrt(2) + 0.5) * scale)
+            value = (value << bits) | min(scale, max(0, u))
+    return value
+
+
+def unpack_quaternion(value: int, bits: int) -> Quaternion:
+    """
+    Unpacks a quaternion encoded by :py:func:`pack_quaternion`.
+
+    :param value: The packed quaternion
+    :param bits:  The number of bits of each of the three smallest components
+
+    :returns: The quaternion (x, y, z, w)
+    """
+    scale = (1 << bits) - 1
+    components = []
+    for _ in range(3):
+        components.append(((value & scale) / scale - 0.5) * math.sqrt(2))
+        value >>= bits
+    components.reverse()
+    largest = math.sqrt(max(0.0, 1.0 - sum(c * c for c in components)))
+    components.insert(value, largest)
+    return tuple(components)  # type: ignore[return-value]
+
+
+def _suffix(data: protocol.FrameSuffixData) -> tuple[Suffix, int]:
+    values = (data.timecode, data.timecode_sub, round(data.timestamp * 1e9),
+              data.stamp_camera_mid_exposure, data.stamp_data_received, data.stamp_transmit)
+    flags = (data.is_recording | data.tracked_models_changed << 1
+             | data.is_editing << 2 | data.bitstream_version_changed << 3)
+    return values, flags
+
+
+class CompactEncoder:
+    """
+    Encodes frames in a compact format for constrained links.
+
+    Only rigid bodies and frame metadata are encoded.
+    Keyframes contain all rigid bodies, while the other frames
+    contain only the rigid bodies that changed since the previous frame, as deltas.
+    Positions are quantized to fixed-point and orientations are encoded
+    using the smallest-three components.
+
+    Frames must be decoded in order by a :py:class:`CompactDecoder`:
+    after a frame is lost, the decoder waits for the next keyframe.
+
+    Usage:
+
+    >>> encoder = CompactEncoder(keyframe_interval=100)
+    >>> data = encoder.encode(msg)
+    """
+
+    def __init__(self,
+                 keyframe_interval: int = 100,
+                 position_resolution: float = 1e-5,
+                 quaternion_bits: int = 15):
+        """
+        Constructs a new instance.
+
+        :param keyframe_interval:   The number of frames between keyframes
+        :param position_resolution: The resolution of positions [m]
+        :param quaternion_bits:     The number of bits of each encoded quaternion component
+        """
+        self.keyframe_interval = keyframe_interval
+        # the resolution is sent as a float32
+        self.position_resolution = PARAMS.unpack(
+            PARAMS.pack(position_resolution, quaternion_bits))[0]
+        self.quaternion_bits = quaternion_bits
+        self._quaternion_size = math.ceil((2 + 3 * quaternion_bits) / 8)
+        self._states: dict[int, State] = {}
+        self._suffix: Suffix | None = None
+        self._frame_number = 0
+        self._seq = 0
+        self._since_keyframe = 0
+        self._keyframe_requested = True
+
+    def request_keyframe(self) -> None:
+        """Makes the next frame a keyframe, e.g., when a new receiver joins"""
+        self._keyframe_requested = True
+
+    def _state(self, rb: protocol.RigidBodyData) -> State:
+        r = self.position_resolution
+        position = (round(rb.position[0] / r), round(rb.position[1] / r),
+                    round(rb.position[2] / r))
+        return (position, pack_quaternion(rb.orientation, self.quaternion_bits),
+                ERROR_FORMAT.pack(rb.error), rb.tracking_valid)
+
+    def _write_orientation(self, buffer: bytearray, value: int) -> None:
+        buffer += value.to_bytes(self._quaternion_size, 'little')
+
+    def encode(self, msg: protocol.MoCapData, keyframe: bool = False) -> bytes:
+        """
+        Encodes a frame.
+
+        :param msg:      The frame
+        :param keyframe: Whether to force a keyframe
+
+        :returns: The encoded frame
+        """
+        keyframe = (keyframe or self._keyframe_requested
+                    or self._since_keyframe >= self.keyframe_interval - 1)
+        kind = (KEYFRAME if keyframe else 0) | (HAS_SUFFIX if msg.suffix_data else 0)
+        buffer = bytearray(HEADER.pack(kind, self._seq))
+        self._seq = (self._seq + 1) & 0xffff
+        if keyframe:
+            buffer += PARAMS.pack(self.position_resolution, self.quaternion_bits)
+            self._keyframe_requested = False
+            self._since_keyframe = 0
+            self._suffix = None
+            write_varint(buffer, msg.frame_number)
+        else:
+            self._since_keyframe += 1
+            write_varint(buffer, msg.frame_number - self._frame_number)
+        self._frame_number = msg.frame_number
+        if msg.suffix_data:
+            values, flags = _suffix(msg.suffix_data)
+            previous = self._suffix or (0,) * 6
+            for value, previous_value in zip(values, previous):
+                write_varint(buffer, value - previous_value)
+            buffer.append(flags)
+            self._suffix = values
+        states = {rb.id: self._state(rb) for rb in msg.rigid_bodies}
+        if keyframe:
+            write_varint(buffer, len(states))
+            for id, (position, orientation, error, valid) in states.items():
+                write_varint(buffer, id)
+                buffer.append(VALID if valid else 0)
+                for p in position:
+                    write_varint(buffer, p)
+                self._write_orientation(buffer, orientation)
+                buffer += error
+        else:
+            entries = bytearray()
+            count = 0
+            for id, (position, orientation, error, valid) in states.items():
+                previous_state = self._states.get(id)
+                if previous_state == (position, orientation, error, valid):
+                    continue
+                previous_position = previous_state[0] if previous_state else (0, 0, 0)
+                flags = VALID if valid else 0
+                if position != previous_position:
+                    flags |= POSITION
+                if not previous_state or orientation != previous_state[1]:
+                    flags |= ORIENTATION
+                if not previous_state or error != previous_state[2]:
+                    flags |= ERROR
+                write_varint(entries, id)
+                entries.append(flags)
+                if flags & POSITION:
+                    for p, q in zip(position, previous_position):
+                        write_varint(entries, p - q)
+                if flags & ORIENTATION:
+                    self._write_orientation(entries, orientation)
+                if flags & ERROR:
+                    entries += error
+                count += 1
+            for id in self._states:
+                if id not in states:
+                    write_varint(entries, id)
+                    entries.append(REMOVED)
+                    count += 1
+            write_varint(buffer, count)
+            buffer += entries
+        self._states = states
+        return bytes(buffer)
+
+
+class CompactDecoder:
+    """
+    Decodes frames encoded by a :py:class:`CompactEncoder`.
+    """
+
+    def __init__(self) -> None:
+        self._states: dict[int, State] = {}
+        self._suffix: Suffix = (0,) * 6
+        self._frame_number = 0
+        self._seq: int | None = None
+        self._synced = False
+        self._resolution = 1.0
+        self._bits = 15
+        self._quaternion_size = 6
+        self.skipped = 0
+        """number of frames skipped while waiting for a keyframe"""
+
+    def _read_orientation(self, data: bytes, offset: int) -> tuple[int, int]:
+        end = offset + self._quaternion_size
+        return int.from_bytes(data[offset:end], 'little'), end
+
+    def decode(self, data: bytes) -> protocol.MoCapData | None:
+        """
+        Decodes a frame.
+
+        :param data: The encoded frame
+
+        :returns: The frame (with rigid bodies and metadata only)
+                  or None if a keyframe is needed to decode it.
+        """
+        kind, seq = HEADER.unpack_from(data, 0)
+        offset = HEADER.size
+        in_sequence = self._seq is not None and seq == (self._seq + 1) & 0xffff
+        self._seq = seq
+        keyframe = bool(kind & KEYFRAME)
+        if not keyframe and not (self._synced and in_sequence):
+            self._synced = False
+            self.skipped += 1
+            return None
+        if keyframe:
+            self._resolution, self._bits = PARAMS.unpack_from(data, offset)
+            self._quaternion_size = math.ceil((2 + 3 * self._bits) / 8)
+            offset += PARAMS.size
+            self._synced = True
+            self._frame_number = 0
+            self._suffix = (0,) * 6
+            self._states = {}
+        delta, offset = read_varint(data, offset)
+        self._frame_number += delta
+        suffix_data: protocol.FrameSuffixData | None = None
+        if kind & HAS_SUFFIX:
+            values = []
+            for previous_value in self._suffix:
+                delta, offset = read_varint(data, offset)
+                values.append(previous_value + delta)
+            flags = data[offset]
+            offset += 1
+            self._suffix = tuple(values)  # type: ignore[assignment]
+            suffix_data = protocol.FrameSuffixData(
+                timecode=values[0], timecode_sub=values[1], timestamp=values[2] / 1e9,
+                stamp_camera_mid_exposure=values[3], stamp_data_received=values[4],
+                stamp_transmit=values[5], is_recording=bool(flags & 1),
+                tracked_models_changed=bool(flags & 2), is_editing=bool(flags & 4),
+                bitstream_version_changed=bool(flags & 8))
+        count, offset = read_varint(data, offset)
+        states = self._states if not keyframe else {}
+        for _ in range(count):
+            id, offset = read_varint(data, offset)
+            flags = data[offset]
+            offset += 1
+            if flags & REMOVED:
+                states.pop(id, None)
+                continue
+            previous_state = states.get(id)
+            position = previous_state[0] if previous_state else (0, 0, 0)
+            orientation = previous_state[1] if previous_state else 0
+            error = previous_state[2] if previous_state else bytes(2)
+            if keyframe or flags & POSITION:
+                p = []
+                for q in position:
+                    delta, offset = read_varint(data, offset)
+                    p.append(q + delta)
+                position = tuple(p)  # type: ignore[assignment]
+            if keyframe or flags & ORIENTATION:
+                orientation, offset = self._read_orientation(data, offset)
+            if keyframe or flags & ERROR:
+                error = data[offset:offset + 2]
+                offset += 2
+            states[id] = (position, orientation, error, bool(flags & VALID))
+        self._states = states
+        return protocol.MoCapData(
+            frame_number=self._frame_number,
+            rigid_bodies=[self._rigid_body(id, state) for id, state in states.items()],
+            suffix_data=suffix_data)
+
+    def _rigid_body(self, id: int, state: State) -> protocol.RigidBodyData:
+        position, orientation, error, valid = state
+        r = self._resolution
+        p: Vector3 = (position[0] * r, position[1] * r, position[2] * r)
+        return protocol.RigidBodyData(
+            id=id, position=p, orientation=unpack_quaternion(orientation, self._bits),
+            tracking_valid=valid, error=ERROR_FORMAT.unpack(error)[0])
@@ -0,0 +1,52 @@
+import collections
+
+
+class Deduplicator:
+    """
+    Detects duplicated frame datagrams without decoding them.
+
+    Frames are identified by their length, their frame number and the bytes of their suffix
+    (which, since NatNet 3, contains the camera, received and transmit stamps).
+    Only the latest ``window`` frames are remembered.
+    """
+
+    def __init__(self, window: int = 32):
+        """
+        Constructs a new instance.
+
+        :param window: The number of recent frames to remember
+        """
+        self._keys: collections.deque[bytes] = collections.deque()
+        self._seen: set[bytes] = set()
+        self.window = window
+        self.suppressed = 0
+        """number of duplicated datagrams detected"""
+
+    @staticmethod
+    def key(data: bytes) -> bytes:
+        # message id (2 bytes), size (2 bytes), frame number (4 bytes), ...,
+        # suffix stamps (24 bytes), params (2 bytes), end of data (4 bytes)
+        return data[2:8] + data[-30:-4]
+
+    def is_duplicate(self, data: bytes) -> bool:
+        """
+        Checks if a frame has already been received, else remember it.
+
+        :param data: The frame datagram
+
+        :returns: True if the frame is a duplicate
+        """
+        key = self.key(data)
+        if key in self._seen:
+            self.suppressed += 1
+            return True
+        self._seen.add(key)
+        self._keys.append(key)
+        if len(self._keys) > self.window:
+            self._seen.discard(self._keys.popleft())
+        return False
+
+    def clear(self) -> None:
+        """Forget all frames"""
+        self._keys.clear()
+        self._seen.clear()
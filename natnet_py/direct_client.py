@@ -0,0 +1,403 @@
+import logging
+import socket
+import time
+from typing import Any, Type, TypeVar
+
+from . import clock
+from . import protocol
+from .async_client import FRAME_OF_DATA_ID, open_multicast_socket
+from .client_base import (ClientBase, get_property_request, get_property_result,
+                          set_property_request, set_property_result)
+from .dedup import Deduplicator
+from .stats import FrameStatistics
+
+T = TypeVar("T")
+
+
+class DirectClient(ClientBase):
+    """
+    This class describes a Natnet client that uses blocking sockets
+    in the caller's thread, without any event loop.
+
+    It is meant for control loops that want the latest pose with the least latency and jitter:
+    :py:meth:`get_data` performs a single ``recv_into`` into a reused buffer.
+    Nothing happens in the background: the client sends keep-alive messages
+    when fetching data and clocks are synchronized only when calling :py:meth:`sync_clock`.
+
+    Usage:
+
+    1. Create the client
+
+       >>> client = DirectClient()
+
+    2. Connect to a server
+
+       >>> client.connect(server_address=127.0.0.1)
+
+    3. Read data
+
+       >>> client.get_data(timeout=0.1, last=True)
+
+    4. close the client
+
+       >>> client.close()
+
+    """
+
+    def __init__(
+        self,
+        address: str = "0.0.0.0",
+        command_port: int = 1510,
+        logger: logging.Logger = logging.getLogger(),
+        now: clock.NanoSecondGetter = time.time_ns,
+        buffer_size: int = 65536,
+        dedup_window: int = 32,
+        clock_estimator: clock.ClockEstimator = clock.ClockEstimator.FILTER,
+    ):
+        """
+        Construct an instance
+
+        :param address: The IP4 address of the client.
+                        Leave to ``"0.0.0.0"`` to bind to all interfaces.
+        :param command_port: The port to send commands to.
+        :param logger: the logger to use
+        :param now: a function used to stamp incoming messages
+        :param buffer_size: the size of the receiving buffer, which should fit the largest frame
+        :param dedup_window: how many recent frames to remember to discard duplicates.
+                             Set to zero to disable.
+        :param clock_estimator: how to synchronize the client and server clocks
+        """
+        super().__init__(logger, now, clock_estimator)
+        self.client_address = address
+        self.command_port = command_port
+        self._server: tuple[str, int] = ('', command_port)
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._cmd_sock: socket.socket | None = None
+        self._data_sock: socket.socket | None = None
+        self._data_timeout: float | None = -1.0
+        self._keep_alive_msg = protocol.pack(protocol.KeepAliveRequest())
+        self._keep_alive = False
+        self._last_keep_alive = 0.0
+        self.keep_alive_timeout = 5.0
+        self.frame_statistics = FrameStatistics()
+        """Statistics about the received frames (gaps, duplicates, jitter, ...)"""
+        self.deduplicator = Deduplicator(dedup_window) if dedup_window > 0 else None
+        """Discards duplicated frames before decoding them"""
+
+    def __enter__(self) -> 'DirectClient':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @property
+    def server_address(self) -> tuple[str, int] | None:
+        """The IP4 address and port of the connected server
+
+        :returns: (IP4 address, port) or None if not connected
+
+        """
+        if self.connected:
+            return self._server
+        return None
+
+    def init(self) -> None:
+        if self._cmd_sock is not None:
+            return
+        self.logger.info(f"Opening command socket on {self.client_address}")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.bind((self.client_address, 0))
+        self._cmd_sock = sock
+
+    def _receive(self, sock: socket.socket, timeout: float) -> tuple[bytes, Any] | None:
+        sock.settimeout(timeout if timeout > 0 else None)
+        try:
+            n, addr = sock.recvfrom_into(self._buffer)
+        except socket.timeout:
+            return None
+        return bytes(self._view[:n]), addr
+
+    def _request(self, msg: protocol.Msg, response_type: Type[T], timeout: float = 0.0,
+                 address: tuple[str, int] | None = None) -> T | None:
+        if not self._cmd_sock:
+            self.logger.warning("Client not initialized")
+            return None
+        self._cmd_sock.sendto(protocol.pack(msg), address or self._server)
+        deadline = time.monotonic() + timeout if timeout > 0 else None
+        while True:
+            remaining = deadline - time.monotonic() if deadline is not None else 0.0
+            if deadline is not None and remaining <= 0:
+                break
+            received = self._receive(self._cmd_sock, remaining)
+            if received is None:
+                break
+            data, _ = received
+            if data[:2] == FRAME_OF_DATA_ID:
+                continue
+            response = protocol.unpack(protocol.Buffer(data))
+            if not isinstance(response, response_type):
+                continue
+            if (isinstance(msg, protocol.EchoRequest)
+                    and isinstance(response, protocol.EchoResponse)
+                    and response.request_stamp != msg.timestamp):
+                continue
+            return response
+        self.logger.warning(f"Command request {msg} timed out after {timeout} s")
+        return None
+
+    def send_request(self, data: bytes, timeout: float = 0.0) -> protocol.Response | None:
+        self.logger.debug(f"Sending request: {data.decode('ascii')}")
+        return self._request(protocol.Request(data), protocol.Response, timeout)
+
+    def set_property(
+        self, name: bytes, value: Any, node: bytes = b"", timeout: float = 0.0
+    ) -> bool:
+        data = set_property_request(name, value, node)
+        return set_property_result(self.send_request(data, timeout=timeout))
+
+    def get_property(
+        self, name: bytes, kind: Type[T], node: bytes = b"", timeout: float = 0.0
+    ) -> T | None:
+        data = get_property_request(name, node)
+        return get_property_result(self.send_request(data, timeout=timeout), kind)
+
+    def discover(
+        self, broadcast_address: str, number: int = -1, timeout: float = 5.0
+    ) -> dict[tuple[str, int], protocol.ServerInfo]:
+        """
+        Discover Motive Natnet servers
+
+        :param broadcast_address: The IPv4 broadcast address to announce this client
+        :param timeout:           The maximal time to wait to discover enough services
+        :param number:            The maximal number of services to discover.
+
+        :returns:  A dictionary of server information keyed by server address.
+        """
+        self.init()
+        if not self._cmd_sock:
+            return {}
+        self.logger.info(f"Discovering servers (number={number})")
+        data = protocol.pack(protocol.DiscoveryRequest())
+        self._cmd_sock.sendto(data, (broadcast_address, self.command_port))
+        servers: dict[tuple[str, int], protocol.ServerInfo] = {}
+        deadline = time.monotonic() + timeout
+        while number <= 0 or len(servers) < number:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            received = self._receive(self._cmd_sock, remaining)
+            if received is None:
+                break
+            data, addr = received
+            msg = protocol.unpack(protocol.Buffer(data))
+            if isinstance(msg, protocol.ServerInfo):
+                servers[addr] = msg
+        self.logger.info(f"Discovered {len(servers)} servers")
+        return servers
+
+    def connect(
+        self,
+        discovery_address: str = '',
+        server_address: str = '127.0.0.1',
+        timeout: float = 5.0,
+        start_listening_for_data: bool = True,
+        sync: bool = True,
+    ) -> bool:
+        """
+        Connect to a server, following the same steps as :py:meth:`natnet_py.AsyncClient.connect`.
+
+        :param discovery_address: The IP4 broadcast address where servers announce themselves.
+                                  If not set, it will not perform auto-discovery.
+        :param server_address: The IP4 address of the NatNet server.
+                               Only used if auto-discovery is not performed.
+        :param timeout: the timeout for the server to be discovered and
+                        for it to accept connection.
+        :param start_listening_for_data: whether to start listening for incoming mocap data.
+        :param sync: whether to sync the client and server clocks
+
+        :returns:   True if successful
+        """
+        if self.connected:
+            self.logger.warning(
+                "Please disconnect from the current server before "
+                "try to connect to a new server")
+            return False
+        self.init()
+        if discovery_address:
+            servers = self.discover(discovery_address, number=1, timeout=timeout)
+            if not servers:
+                return False
+            self._server, self.server_info = next(iter(servers.items()))
+        else:
+            self._server = (server_address, self.command_port)
+            self.logger.info(f"Connecting to {server_address} ...")
+            self.server_info = self._request(
+                protocol.ConnectRequest(), protocol.ServerInfo, timeout)
+            if not self.server_info:
+                self.logger.warning("Failed connecting.")
+                return False
+        self._connected_to(self._server)
+        self.description = self._request(
+            protocol.ModelDefRequest(), protocol.MoCapDescription, timeout)
+        if not self.description:
+            self.server_info = None
+            return False
+        if sync and self.server_info:
+            self.clock = self._make_clock(None, self.server_info)
+            self.sync_clock()
+        if start_listening_for_data:
+            return self.start_listening_for_data(timeout)
+        return True
+
+    def sync_clock(self, echoes: int = 10, timeout: float = 0.5) -> None:
+        """
+        Synchronize the client and server clocks, sending echo requests.
+
+        As there is no background task, call it periodically (e.g., every few minutes)
+        to track clock drift.
+
+        :param echoes:   The number of echoes
+        :param timeout:  The timeout of each echo request
+        """
+        if not self.clock:
+            return
+        for _ in range(echoes):
+            t0_c = self._now()
+            response = self._request(protocol.EchoRequest(t0_c), protocol.EchoResponse, timeout)
+            t2_c = self._now()
+            if not response:
+                self.clock_telemetry.timeouts += 1
+            else:
+                self.clock.update(
+                    t0_c=t0_c, t2_c=t2_c,
+                    t1_s=self.clock.ticks_to_nanoseconds(response.received_stamp))
+                self.clock.count += 1
+
+    def start_listening_for_data(self, timeout: float = 5.0) -> bool:
+        """
+        Starts a listening for data.
+
+        :param      timeout:  The request timeout
+
+        :returns:   True if successful
+        """
+        if not self.server_info or not self.server_info.connection_info:
+            self.logger.warning("Trying to start listening for data before connecting")
+            return False
+        self.logger.info(
+            f"Opening data {'multicast' if self.use_multicast else 'unicast'}"
+            f" socket on {self.client_address}:{self.data_port}"
+        )
+        try:
+            if self.use_multicast:
+                self._data_sock = open_multicast_socket(
+                    self.server_info.connection_info.multicast_address,
+                    self.client_address, self.data_port)
+            else:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+                sock.bind((self.client_address, self.data_port))
+                self._data_sock = sock
+        except OSError as e:
+            self.logger.error(str(e))
+            return False
+        self._data_timeout = -1.0
+        if not self.use_multicast:
+            # TODO(Jerome): do I need to send it twice?
+            self._request(protocol.ConnectRequest(), protocol.ServerInfo, timeout)
+            self._keep_alive = True
+            self._send_keep_alive()
+        return True
+
+    def _send_keep_alive(self) -> None:
+        if self._cmd_sock:
+            self._cmd_sock.sendto(self._keep_alive_msg, self._server)
+        self._last_keep_alive = time.monotonic()
+
+    def get_data(
+        self, timeout: float = 0.0, last: bool = False
+    ) -> tuple[int, protocol.MoCapData] | None:
+        """
+        Gets mocap data, blocking the calling thread.
+
+        :param      timeout:  The timeout. Set to zero or negative to wait forever.
+        :param      last:     whether to discard the frames already queued by the OS
+                              and fetch only the latest one
+
+        :returns:   The (receiving stamp in ns, data) or None if not available
+        """
+        sock = self._data_sock
+        if not sock:
+            self.logger.error("Not listening for data")
+            return None
+        if self._keep_alive and time.monotonic() - self._last_keep_alive > self.keep_alive_timeout:
+            self._send_keep_alive()
+        data_timeout = timeout if timeout > 0 else None
+        if data_timeout != self._data_timeout:
+            sock.settimeout(data_timeout)
+            self._data_timeout = data_timeout
+        while True:
+            try:
+                n = sock.recv_into(self._buffer)
+            except socket.timeout:
+                return None
+            stamp = self._now()
+            frame = self._accept(bytes(self._view[:n]))
+            if last:
+                # Drain the frames queued by the OS, keeping the latest
+                sock.settimeout(0.0)
+                while True:
+                    try:
+                        n = sock.recv_into(self._buffer)
+                    except BlockingIOError:
+                        break
+                    newer = self._accept(bytes(self._view[:n]))
+                    if newer is None:
+                        continue
+                    if frame is not None:
+                        # Skipped, not lost
+                        self.frame_statistics.add(int.from_bytes(frame[4:8], 'little'), stamp)
+                    frame = newer
+                    stamp = self._now()
+                sock.settimeout(data_timeout)
+            if frame is None:
+                continue
+            msg = protocol.unpack(protocol.Buffer(frame))
+            if isinstance(msg, protocol.MoCapData):
+                self.frame_statistics.add(
+                    msg.frame_number, stamp,
+                    int(msg.suffix_data.timestamp * 1e9) if msg.suffix_data else None)
+                return stamp, msg
+
+    def _accept(self, data: bytes) -> bytes | None:
+        # The frame datagram, if not duplicated
+        if data[:2] != FRAME_OF_DATA_ID:
+            return None
+        if self.deduplicator and self.deduplicator.is_duplicate(data):
+            self.frame_statistics.add_duplicate(int.from_bytes(data[4:8], 'little', signed=True))
+            return None
+        return data
+
+    def unconnect(self) -> None:
+        """
+        Unconnect the currently connected server
+        """
+        if self._data_sock:
+            self._data_sock.close()
+            self._data_sock = None
+        self._keep_alive = False
+        self.clock = None
+        self.server_info = None
+        self.description = None
+
+    def close(self) -> None:
+        """
+        Closes the client connections.
+        """
+        self.unconnect()
+        if self._cmd_sock:
+            self._cmd_sock.close()
+            self._cmd_sock = None
+        self.logger.info("Closed")
@@ -0,0 +1,293 @@
+import asyncio
+import collections
+import dataclasses as dc
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from . import protocol
+from .subscriber import OverflowPolicy
+
+Callback = Callable[[int, protocol.MoCapData], Any]
+Job = tuple[Callback, int, protocol.MoCapData, int]
+
+
+@dc.dataclass
+class CallbackTimings:
+    """Statistics about the execution of callbacks"""
+
+    count: int = 0
+    """number of executed callbacks"""
+    dropped: int = 0
+    """number of callbacks not executed because too many were pending"""
+    failed: int = 0
+    """number of callbacks that raised an exception"""
+    total_execution: int = 0
+    """total execution time in ns"""
+    max_execution: int = 0
+    """maximal execution time in ns"""
+    total_delay: int = 0
+    """total time in ns spent by callbacks waiting to be executed"""
+    max_delay: int = 0
+    """maximal time in ns spent by a callback waiting to be executed"""
+
+    @property
+    def mean_execution(self) -> float:
+        """mean execution time in ns"""
+        return self.total_execution / self.count if self.count else 0.0
+
+    @property
+    def mean_delay(self) -> float:
+        """mean time in ns spent by callbacks waiting to be executed"""
+        return self.total_delay / self.count if self.count else 0.0
+
+    def add(self, delay: int, execution: int) -> None:
+        self.count += 1
+        self.total_execution += execution
+        self.max_execution = max(self.max_execution, execution)
+        self.total_delay += delay
+        self.max_delay = max(self.max_delay, delay)
+
+
+class CallbackExecutor:
+    """
+    Executes the data callbacks of a client.
+
+    The base class executes callbacks inline, i.e., on the client event loop,
+    which blocks the reception of data until the callback returns.
+    Exceptions raised by the callback propagate to the client, like when
+    calling the callback directly.
+    """
+
+    def __init__(self, logger: logging.Logger = logging.getLogger(), timed: bool = False):
+        """
+        Constructs a new instance.
+
+        :param logger: The logger to use
+        :param timed:  Whether to measure the execution time of inline callbacks.
+                       If not set, :py:attr:`timings` stays empty.
+        """
+        self.logger = logger
+        self.timed = timed
+        self._timings = CallbackTimings()
+        self._lock = threading.Lock()
+
+    @property
+    def timings(self) -> CallbackTimings:
+        """A snapshot of the execution statistics"""
+        with self._lock:
+            return dc.replace(self._timings)
+
+    def submit(self, callback: Callback, stamp: int, msg: protocol.MoCapData) -> None:
+        """
+        Schedule a callback.
+
+        :meta private:
+        """
+        if not self.timed:
+            callback(stamp, msg)
+            return
+        start = time.perf_counter_ns()
+        try:
+            callback(stamp, msg)
+        except Exception:
+            with self._lock:
+                self._timings.failed += 1
+            raise
+        finally:
+            end = time.perf_counter_ns()
+            with self._lock:
+                self._timings.add(0, end - start)
+
+    def check(self, callback: Callback) -> None:
+        """
+        Checks that the callback can be executed.
+
+        :raises TypeError: if it cannot
+
+        :meta private:
+        """
+
+    def open(self) -> None:
+        """Start executing callbacks again after having been closed"""
+
+    def close(self) -> None:
+        """Stop executing callbacks"""
+
+    def _drop(self) -> None:
+        with self._lock:
+            self._timings.dropped += 1
+
+    def _run(self, job: Job) -> None:
+        callback, stamp, msg, enqueued = job
+        start = time.perf_counter_ns()
+        try:
+            result = callback(stamp, msg)
+            if asyncio.iscoroutine(result):
+                result.close()
+                raise TypeError(f"{type(self).__name__} cannot execute asynchronous callbacks")
+        except Exception as e:
+            self.logger.error(f"Data callback failed: {e!r}")
+            with self._lock:
+                self._timings.failed += 1
+        end = time.perf_counter_ns()
+        with self._lock:
+            self._timings.add(start - enqueued, end - start)
+
+
+class ThreadPoolCallbackExecutor(CallbackExecutor):
+    """
+    Executes callbacks in a pool of threads, so that slow callbacks
+    do not block the client event loop.
+
+    If ``ordered``, callbacks are executed one after the other, in the order they were received,
+    else up to ``max_workers`` callbacks are executed concurrently.
+    At most ``max_pending`` callbacks wait to be executed: the others are dropped according to
+    ``policy``.
+
+    Callbacks must be synchronous: use :py:class:`TaskCallbackExecutor` for coroutine functions.
+    """
+
+    def __init__(self,
+                 max_workers: int = 4,
+                 ordered: bool = True,
+                 max_pending: int = 10,
+                 policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 logger: logging.Logger = logging.getLogger()):
+        """
+        Constructs a new instance.
+
+        :param max_workers: The number of threads (ignored if ordered)
+        :param ordered:     Whether to execute callbacks one at a time in order
+        :param max_pending: The maximal number of callbacks waiting to be executed
+        :param policy:      What to do when too many callbacks are pending
+        :param logger:      The logger to use
+        """
+        super().__init__(logger, timed=True)
+        self.policy = policy
+        self.max_pending = max_pending
+        self._pending: collections.deque[Job] = collections.deque()
+        self._condition = threading.Condition()
+        self._running = False
+        self._workers = 1 if ordered else max(1, max_workers)
+        self._threads: list[threading.Thread] = []
+        self.open()
+
+    def check(self, callback: Callback) -> None:
+        if asyncio.iscoroutinefunction(callback):
+            raise TypeError(f"{type(self).__name__} cannot execute the coroutine function "
+                            f"{callback!r}: use a TaskCallbackExecutor")
+
+    def open(self) -> None:
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True, name=f"natnet-callback-{i}")
+            for i in range(self._workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, callback: Callback, stamp: int, msg: protocol.MoCapData) -> None:
+        self.check(callback)
+        with self._condition:
+            if len(self._pending) >= self.max_pending > 0:
+                self._drop()
+                if self.policy == OverflowPolicy.DROP_NEWEST:
+                    return
+                self._pending.popleft()
+            self._pending.append((callback, stamp, msg, time.perf_counter_ns()))
+            self._condition.notify()
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                job = self._pending.popleft()
+            self._run(job)
+
+    def close(self) -> None:
+        with self._condition:
+            self._running = False
+            self._pending.clear()
+            self._condition.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+
+
+class TaskCallbackExecutor(CallbackExecutor):
+    """
+    Executes asynchronous callbacks as tasks on the client event loop.
+
+    At most ``max_concurrency`` callbacks run concurrently and
+    at most ``max_pending`` callbacks wait to be executed: the others are dropped according to
+    ``policy``. The execution time includes the time spent awaiting.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = 4,
+                 max_pending: int = 10,
+                 policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 logger: logging.Logger = logging.getLogger()):
+        """
+        Constructs a new instance.
+
+        :param max_concurrency: The maximal number of callbacks running concurrently
+        :param max_pending:     The maximal number of callbacks waiting to be executed
+        :param policy:          What to do when too many callbacks are pending
+        :param logger:          The logger to use
+        """
+        super().__init__(logger, timed=True)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_pending = max_pending
+        self.policy = policy
+        self._pending: collections.deque[Job] = collections.deque()
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def submit(self, callback: Callback, stamp: int, msg: protocol.MoCapData) -> None:
+        job = (callback, stamp, msg, time.perf_counter_ns())
+        if len(self._tasks) < self.max_concurrency:
+            self._start(job)
+            return
+        if len(self._pending) >= self.max_pending > 0:
+            self._drop()
+            if self.policy == OverflowPolicy.DROP_NEWEST:
+                return
+            self._pending.popleft()
+        self._pending.append(job)
+
+    def _start(self, job: Job) -> None:
+        task = asyncio.create_task(self._run_async(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task[None]) -> None:
+        self._tasks.discard(task)
+        if self._pending and len(self._tasks) < self.max_concurrency:
+            self._start(self._pending.popleft())
+
+    async def _run_async(self, job: Job) -> None:
+        callback, stamp, msg, enqueued = job
+        start = time.perf_counter_ns()
+        try:
+            result = callback(stamp, msg)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            self.logger.error(f"Data callback failed: {e!r}")
+            with self._lock:
+                self._timings.failed += 1
+        end = time.perf_counter_ns()
+        with self._lock:
+            self._timings.add(start - enqueued, end - start)
+
+    def close(self) -> None:
+        self._pending.clear()
+        for task in list(self._tasks):
+            task.cancel()
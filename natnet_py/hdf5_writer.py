@@ -0,0 +1,419 @@
+import collections
+import logging
+import threading
+from typing import Any, Callable
+
+import h5py
+import numpy as np
+
+from . import protocol
+from .buffer import Quaternion, Vector3
+from .timing import PiecewiseClockModel
+
+# receiving stamp, server ticks at mid exposure, position, orientation, error, tracked
+Row = tuple[int, int, Vector3, Quaternion, float, bool]
+
+# name, shape of a row, dtype, attributes
+Column = tuple[str, tuple[int, ...], Any, dict[str, str]]
+
+# in the same order as the rows
+COLUMNS: list[Column] = [
+    ("stamp", (), np.int64, {'unit': 'ns'}),
+    ("ticks", (), np.int64, {}),
+    ("position", (3, ), np.float64, {'unit': 'mm', 'coords': 'x, y, z'}),
+    ("orientation", (4, ), np.float64, {'coords': 'x, y, z, w'}),
+    ("error", (), np.float64, {'unit': 'mm'}),
+    ("tracked", (), np.bool_, {}),
+]
+
+# one row per frame: receiving stamp, frame number, followed by the frame suffix
+FRAME_COLUMNS: list[Column] = [
+    ("stamp", (), np.int64, {'unit': 'ns'}),
+    ("frame_number", (), np.int64, {}),
+    ("timecode", (), np.int64, {}),
+    ("timecode_sub", (), np.int64, {}),
+    ("timestamp", (), np.float64, {'unit': 's'}),
+    ("ticks", (), np.int64, {}),
+    ("stamp_data_received", (), np.int64, {}),
+    ("stamp_transmit", (), np.int64, {}),
+    ("is_recording", (), np.bool_, {}),
+    ("tracked_models_changed", (), np.bool_, {}),
+    ("is_editing", (), np.bool_, {}),
+    ("bitstream_version_changed", (), np.bool_, {}),
+]
+
+POSITION: Column = ("position", (3, ), np.float32, {'unit': 'mm', 'coords': 'x, y, z'})
+ANALOG: list[Column] = [
+    ("id", (), np.int32, {}),
+    ("channel", (), np.int16, {}),
+    ("value", (), np.float32, {}),
+]
+
+# sections with a variable number of rows per frame, stored flat
+SECTIONS: dict[str, list[Column]] = {
+    "labeled_markers": [
+        ("id", (), np.int32, {}),
+        POSITION,
+        ("size", (), np.float32, {'unit': 'mm'}),
+        ("param", (), np.uint16, {}),
+        ("residual", (), np.float32, {'unit': 'mm'}),
+    ],
+    "unlabeled_markers": [POSITION],
+    "marker_sets": [("set", (), np.int16, {}), POSITION],
+    "skeletons": [
+        ("skeleton", (), np.int32, {}),
+        ("id", (), np.int32, {}),
+        POSITION,
+        ("orientation", (4, ), np.float32, {'coords': 'x, y, z, w'}),
+        ("error", (), np.float32, {'unit': 'mm'}),
+        ("tracked", (), np.bool_, {}),
+    ],
+    "force_plates": ANALOG,
+    "devices": ANALOG,
+}
+
+
+# compression filters provided by h5py
+H5PY_COMPRESSIONS = ("gzip", "lzf")
+# compression filters provided by hdf5plugin, if installed
+PLUGIN_COMPRESSIONS = ("blosc", "lz4", "zstd")
+COMPRESSIONS = H5PY_COMPRESSIONS + PLUGIN_COMPRESSIONS
+
+
+def compression_filter(compression: str | None, level: int | None = None,
+                       shuffle: bool = True,
+                       logger: logging.Logger = logging.getLogger()) -> dict[str, Any]:
+    """
+    The keyword arguments of :py:meth:`h5py.Group.create_dataset` to compress a dataset.
+
+    :param compression: One of :py:data:`COMPRESSIONS` or None to not compress
+    :param level:       The compression level (gzip: 0-9, blosc: 0-9, zstd: 1-22).
+                        If None, uses the default level of the filter.
+    :param shuffle:     Whether to shuffle the bytes before compressing,
+                        which improves the compression of floats
+    :param logger:      The logger to use
+
+    :returns: The arguments, empty if the filter is not available
+    """
+    if not compression:
+        return {}
+    if compression in H5PY_COMPRESSIONS:
+        kwargs: dict[str, Any] = {'compression': compression, 'shuffle': shuffle}
+        if compression == "gzip" and level is not None:
+            kwargs['compression_opts'] = level
+        return kwargs
+    if compression not in PLUGIN_COMPRESSIONS:
+        logger.warning(f"Unknown compression {compression}: should be one of {COMPRESSIONS}")
+        return {}
+    try:
+        import hdf5plugin
+    except ImportError:
+        logger.warning(f"Compression {compression} requires hdf5plugin: not compressing")
+        return {}
+    if compression == "blosc":
+        return dict(hdf5plugin.Blosc(
+            cname='lz4', clevel=5 if level is None else level,
+            shuffle=hdf5plugin.Blosc.SHUFFLE if shuffle else hdf5plugin.Blosc.NOSHUFFLE))
+    if compression == "lz4":
+        return dict(hdf5plugin.LZ4())
+    return dict(hdf5plugin.Zstd() if level is None else hdf5plugin.Zstd(clevel=level))
+
+
+def analog_rows(items: list[protocol.ForcePlateData] | list[protocol.DeviceData]
+                ) -> list[tuple[Any, ...]]:
+    """One row per sample: id, channel index and value"""
+    return [(item.id, i, value) for item in items
+            for i, channel in enumerate(item.channels) for value in channel.values]
+
+
+def frame_row(stamp: int, msg: protocol.MoCapData) -> tuple[Any, ...]:
+    """The row of a frame in ``/frames``"""
+    s = msg.suffix_data or protocol.FrameSuffixData()
+    return (stamp, msg.frame_number, s.timecode, s.timecode_sub, s.timestamp,
+            s.stamp_camera_mid_exposure, s.stamp_data_received, s.stamp_transmit,
+            s.is_recording, s.tracked_models_changed, s.is_editing, s.bitstream_version_changed)
+
+
+def section_rows(msg: protocol.MoCapData, marker_set: Callable[[str], int]
+                 ) -> dict[str, list[tuple[Any, ...]]]:
+    """
+    The rows of the sections of a frame.
+
+    :param msg:        The frame
+    :param marker_set: Returns the index of a marker set
+    """
+    return {
+        "labeled_markers": [(m.id, m.position, m.size, m.param, m.residual)
+                            for m in msg.labeled_markers],
+        "unlabeled_markers": [(p, ) for p in msg.unlabeled_markers_positions],
+        "marker_sets": [(marker_set(s.name), p) for s in msg.marker_sets for p in s.positions],
+        "skeletons": [(s.id, rb.id, rb.position, rb.orientation, rb.error, rb.tracking_valid)
+                      for s in msg.skeletons for rb in s.rigid_bodies],
+        "force_plates": analog_rows(msg.force_plates),
+        "devices": analog_rows(msg.devices),
+    }
+
+
+class HDF5Writer:
+    """
+    Streams motion capture data to an HDF5 file, in columnar layout.
+
+    Rigid bodies are recorded in one group per rigid body. Unless ``all_sections`` is false,
+    the writer also records one row per frame in ``/frames`` (receiving stamp,
+    frame number and suffix) and the other sections of the frames
+    (see :py:data:`SECTIONS`), each as flat datasets, with one row per marker,
+    skeleton bone or analog sample, plus an ``offset`` dataset with the position
+    of the first row of each frame: the rows of frame ``i`` are ``offset[i]:offset[i + 1]``.
+
+    Rows are buffered in memory and appended by a background thread
+    every ``flush_period`` seconds to resizable datasets, in chunks of ``chunk_size`` rows,
+    optionally compressed (see :py:func:`compression_filter`).
+    At most ``max_buffered`` rows are kept in memory: if the thread cannot keep up,
+    the newest frames are dropped (see :py:attr:`dropped`).
+    If writing fails (e.g., when the disk is full), the writer stops writing,
+    keeps the error in :py:attr:`error` and drops the next frames.
+
+    Since the file is flushed periodically, the data recorded until the last flush
+    survives a crash. The ``time`` datasets, which need the whole history of
+    the clock synchronization, are only written by :py:meth:`close`.
+
+    Usage:
+
+    >>> writer = HDF5Writer("data.h5")
+    >>> client.data_callback = writer.add
+    >>> ...
+    >>> writer.close(PiecewiseClockModel(client.clock.history))
+    """
+
+    def __init__(self,
+                 path: str,
+                 chunk_size: int = 1024,
+                 flush_period: float = 1.0,
+                 max_buffered: int = 100_000,
+                 all_sections: bool = True,
+                 compression: str | None = None,
+                 compression_level: int | None = None,
+                 shuffle: bool = True,
+                 logger: logging.Logger = logging.getLogger()):
+        """
+        Constructs a new instance.
+
+        :param path:         The path of the HDF5 file (overwritten)
+        :param chunk_size:   The number of rows of each chunk of the datasets
+        :param flush_period: The period [s] of writing buffered rows to the file
+        :param max_buffered: The maximal number of rows buffered in memory
+        :param all_sections: Whether to record frames and all their sections
+                             or only the rigid bodies
+        :param compression:  The compression filter of the datasets
+                             (see :py:func:`compression_filter`), None to not compress
+        :param compression_level: The compression level, None for the default of the filter
+        :param shuffle:      Whether to shuffle the bytes before compressing
+        :param logger:       The logger to use
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.flush_period = flush_period
+        self.max_buffered = max_buffered
+        self.all_sections = all_sections
+        self.logger = logger
+        self._filter = compression_filter(compression, compression_level, shuffle, logger)
+        self.dropped = 0
+        """number of rows dropped because the buffer was full"""
+        self.written = 0
+        """number of rows written to the file"""
+        self.error: Exception | None = None
+        """the error that stopped writing, if any"""
+        self._file = h5py.File(path, "w")
+        self._names: dict[int, str] = {}
+        self._groups: dict[int, h5py.Group] = {}
+        self._buffer: dict[int, list[Row]] = collections.defaultdict(list)
+        self._frames: list[tuple[Any, ...]] = []
+        self._sections: list[dict[str, list[tuple[Any, ...]]]] = []
+        self._marker_sets: dict[str, int] = {}
+        self._frames_group: h5py.Group | None = None
+        self._section_groups: dict[str, h5py.Group] = {}
+        self._section_sizes: dict[str, int] = collections.defaultdict(int)
+        self._buffered = 0
+        self._condition = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._work, daemon=True, name="natnet-hdf5")
+        self._thread.start()
+
+    def set_rigid_body_names(self, names: dict[int, str]) -> None:
+        """
+        Sets the names of the rigid bodies,
+        used to name the groups of the rigid bodies not yet written.
+        """
+        with self._condition:
+            self._names = dict(names)
+
+    def _marker_set(self, name: str) -> int:
+        return self._marker_sets.setdefault(name, len(self._marker_sets))
+
+    def add(self, stamp: int, msg: protocol.MoCapData) -> None:
+        """
+        Buffers a frame.
+
+        Can be used directly as a data callback.
+
+        :param stamp: The receiving time [ns]
+        :param msg:   The frame
+        """
+        ticks = msg.suffix_data.stamp_camera_mid_exposure if msg.suffix_data else -1
+        with self._condition:
+            if not self._running:
+                return
+            sections = section_rows(msg, self._marker_set) if self.all_sections else {}
+            size = len(msg.rigid_bodies)
+            if self.all_sections:
+                size += 1 + sum(len(rows) for rows in sections.values())
+            if self.error:
+                self.dropped += size
+                return
+            if self._buffered + size > self.max_buffered:
+                if not self.dropped:
+                    self.logger.warning("HDF5 buffer is full: dropping data")
+                self.dropped += size
+                return
+            for rb in msg.rigid_bodies:
+                self._buffer[rb.id].append(
+                    (stamp, ticks, rb.position, rb.orientation, rb.error, rb.tracking_valid))
+            if self.all_sections:
+                self._frames.append(frame_row(stamp, msg))
+                self._sections.append(sections)
+            self._buffered += size
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: not self._running, self.flush_period)
+                running = self._running
+            try:
+                self._write()
+            except Exception as e:
+                self.logger.error(f"Failed writing to {self.path}: {e!r}. Dropping the next data")
+                with self._condition:
+                    self.error = e
+                    self._buffer.clear()
+                    self._frames.clear()
+                    self._sections.clear()
+                    self._buffered = 0
+                return
+            if not running:
+                return
+
+    def _write(self) -> None:
+        with self._condition:
+            buffer, self._buffer = self._buffer, collections.defaultdict(list)
+            frames, self._frames = self._frames, []
+            sections, self._sections = self._sections, []
+            self._buffered = 0
+            names = self._names
+            marker_sets = list(self._marker_sets)
+        if not buffer and not frames:
+            return
+        for i, rows in buffer.items():
+            group = self._groups.get(i)
+            if group is None:
+                group = self._groups[i] = self._create_group(
+                    f"rigid_bodies/{names.get(i, str(i))}", COLUMNS)
+            self._append(group, COLUMNS, rows)
+            self.written += len(rows)
+        if frames:
+            self._write_frames(frames, sections, marker_sets)
+        self._file.flush()
+
+    def _write_frames(self, frames: list[tuple[Any, ...]],
+                      sections: list[dict[str, list[tuple[Any, ...]]]],
+                      marker_sets: list[str]) -> None:
+        if self._frames_group is None:
+            self._frames_group = self._create_group("frames", FRAME_COLUMNS)
+        recorded = self._frames_group["stamp"].shape[0]
+        self._append(self._frames_group, FRAME_COLUMNS, frames)
+        self.written += len(frames)
+        for key, columns in SECTIONS.items():
+            counts = [len(frame[key]) for frame in sections]
+            group = self._section_groups.get(key)
+            if group is None:
+                if not any(counts):
+                    continue
+                # groups are created when first needed: previous frames had no rows
+                group = self._section_groups[key] = self._create_group(key, columns)
+                group.create_dataset("offset", shape=(recorded, ), maxshape=(None, ),
+                                     dtype=np.int64, chunks=(self.chunk_size, ), fillvalue=0,
+                                     **self._filter)
+            size = self._section_sizes[key]
+            offsets = size + np.cumsum([0] + counts[:-1])
+            ds = group["offset"]
+            ds.resize(recorded + len(frames), axis=0)
+            ds[recorded:] = offsets
+            rows = [row for frame in sections for row in frame[key]]
+            if rows:
+                self._append(group, columns, rows)
+            self._section_sizes[key] = size + len(rows)
+            self.written += len(rows)
+        if "marker_sets" in self._section_groups:
+            self._section_groups["marker_sets"].attrs["names"] = marker_sets
+
+    def _create_group(self, name: str, columns: list[Column]) -> h5py.Group:
+        group = self._file.require_group(name)
+        for key, shape, dtype, attrs in columns:
+            ds = group.create_dataset(key, shape=(0, *shape), maxshape=(None, *shape),
+                                      dtype=dtype, chunks=(self.chunk_size, *shape),
+                                      **self._filter)
+            ds.attrs.update(attrs)
+        return group
+
+    def _append(self, group: h5py.Group, columns: list[Column], rows: list[Any]) -> None:
+        for (key, _, dtype, _), values in zip(columns, zip(*rows)):
+            ds = group[key]
+            n = ds.shape[0]
+            ds.resize(n + len(rows), axis=0)
+            ds[n:] = np.asarray(values, dtype=dtype)
+
+    def close(self, model: PiecewiseClockModel | None = None) -> bool:
+        """
+        Writes the remaining rows, adds the ``time`` datasets and closes the file.
+
+        :param model: The clock model used to convert server ticks to client time.
+                      If None, ``time`` contains the receiving stamps.
+
+        :returns: False if writing failed (see :py:attr:`error`)
+        """
+        with self._condition:
+            if not self._running:
+                return self.error is None
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join()
+        if not self.error:
+            try:
+                for group in self._groups.values():
+                    self._add_time(group, model)
+                if self._frames_group is not None:
+                    self._add_time(self._frames_group, model)
+            except Exception as e:
+                self.error = e
+        try:
+            self._file.close()
+        except Exception as e:
+            self.error = self.error or e
+        if self.dropped:
+            self.logger.warning(f"Dropped {self.dropped} rows")
+        if self.error:
+            self.logger.error(f"Failed recording to {self.path}: {self.error!r}")
+            return False
+        return True
+
+    def _add_time(self, group: h5py.Group, model: PiecewiseClockModel | None) -> None:
+        stamps, ticks = group["stamp"], group["ticks"]
+        ds = group.create_dataset("time", shape=stamps.shape, maxshape=(None, ),
+                                  dtype=np.int64, chunks=(self.chunk_size, ), **self._filter)
+        ds.attrs['unit'] = 'ns'
+        block = self.chunk_size * 64
+        for start in range(0, stamps.shape[0], block):
+            time = stamps[start:start + block]
+            if model:
+                t = ticks[start:start + block]
+                time = np.where(t >= 0, model.server_ticks_to_client_time(t), time)
+            ds[start:start + len(time)] = time
@@ -0,0 +1,138 @@
+import asyncio
+import collections
+import itertools
+from typing import Any, Callable
+
+ProtocolFactory = Callable[[], Any]
+Address = tuple[str, int]
+
+WILDCARDS = ("", "0.0.0.0")
+# first port assigned to endpoints bound to port 0
+EPHEMERAL_PORT = 49152
+
+
+class LoopbackTransport(asyncio.DatagramTransport):
+    """A datagram transport of a :py:class:`LoopbackNetwork`"""
+
+    def __init__(self, network: 'LoopbackNetwork', address: Address, protocol: Any):
+        super().__init__(extra={'sockname': address, 'socket': None})
+        self._network = network
+        self._address = address
+        self._protocol = protocol
+        self._closing = False
+
+    @property
+    def address(self) -> Address:
+        return self._address
+
+    def sendto(self, data: Any, addr: Any = None) -> None:
+        if not self._closing:
+            self._network.send(bytes(data), self._address, addr)
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def close(self) -> None:
+        if self._closing:
+            return
+        self._closing = True
+        self._network.unbind(self)
+        self._network.loop.call_soon(self._protocol.connection_lost, None)
+
+    def abort(self) -> None:
+        self.close()
+
+    def deliver(self, data: bytes, addr: Address) -> None:
+        if not self._closing:
+            self._protocol.datagram_received(data, addr)
+
+
+class LoopbackNetwork:
+    """
+    An in-memory network that connects servers and clients running on the same event loop,
+    without sockets, e.g., to test or benchmark the library code only.
+
+    Endpoints are bound to (host, port) addresses like UDP sockets, with the same
+    wildcard (``"0.0.0.0"``), ephemeral (port 0), broadcast and multicast semantics,
+    and datagrams are delivered asynchronously (in the next iteration of the loop).
+    Independent networks do not interfere, so many servers can use the same ports.
+
+    Usage:
+
+    >>> network = LoopbackNetwork()
+    >>> server = Server(rate=120, network=network)
+    >>> client = AsyncClient(network=network)
+    """
+
+    def __init__(self, address: str = "127.0.0.1"):
+        """
+        Constructs a new instance.
+
+        :param address: The address of the endpoints bound to the wildcard address,
+                        as seen by the receivers of their datagrams
+        """
+        self.address = address
+        self.sent = 0
+        """number of datagrams sent"""
+        self.dropped = 0
+        """number of datagrams sent to addresses without endpoints"""
+        self._endpoints: dict[Address, list[LoopbackTransport]] = collections.defaultdict(list)
+        self._ports = itertools.count(EPHEMERAL_PORT)
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if not self._loop:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    async def create_datagram_endpoint(
+            self, protocol_factory: ProtocolFactory, local_addr: Address | None = None,
+            **kwargs: Any) -> tuple[LoopbackTransport, Any]:
+        """
+        Like :py:meth:`asyncio.loop.create_datagram_endpoint`.
+
+        Only ``local_addr`` is supported: other arguments are ignored.
+        """
+        host, port = local_addr or ("", 0)
+        if not port:
+            port = next(self._ports)
+            while any(p == port for _, p in self._endpoints):
+                port = next(self._ports)
+        protocol = protocol_factory()
+        transport = LoopbackTransport(self, (host, port), protocol)
+        self._endpoints[(host, port)].append(transport)
+        self.loop.call_soon(protocol.connection_made, transport)
+        return transport, protocol
+
+    def unbind(self, transport: LoopbackTransport) -> None:
+        endpoints = self._endpoints.get(transport.address)
+        if endpoints and transport in endpoints:
+            endpoints.remove(transport)
+            if not endpoints:
+                del self._endpoints[transport.address]
+
+    def _receivers(self, host: str, port: int) -> list[LoopbackTransport]:
+        if host == "<broadcast>" or host.endswith(".255"):
+            return [t for (_, p), ts in self._endpoints.items() if p == port for t in ts]
+        receivers = self._endpoints.get((host, port))
+        if receivers:
+            return list(receivers)
+        return [t for h in WILDCARDS for t in self._endpoints.get((h, port), [])]
+
+    def send(self, data: bytes, source: Address, destination: Address) -> None:
+        """
+        Sends a datagram.
+
+        :meta private:
+        """
+        self.sent += 1
+        host, port = destination
+        receivers = self._receivers(host or self.address, port)
+        if not receivers:
+            self.dropped += 1
+            return
+        if source[0] in WILDCARDS:
+            source = (self.address, source[1])
+        for receiver in receivers:
+            self.loop.call_soon(receiver.deliver, data, source)
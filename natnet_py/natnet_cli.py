@@ -37,6 +37,12 @@ def parser(args: Any = None) -> argparse.ArgumentParser:
     parser.add_argument(
         "--no_sync", action='store_true',
         help="Add to disable clock synchronization")
+    parser.add_argument(
+        "--latency_window", default=60.0, type=float,
+        help="The duration [s] of the rolling window of latency statistics")
+    parser.add_argument(
+        "--kernel_timestamps", action='store_true',
+        help="Add to stamp frames with the kernel receiving time (Linux only)")
     return parser
 
 
@@ -62,7 +68,8 @@ class CmdShell(cmd.Cmd):
         args = parse()
         set_log_level(args.log_level)
         self.client = SyncClient(
-            address=args.client, queue=args.queue, sync=not args.no_sync)
+            address=args.client, queue=args.queue, sync=not args.no_sync,
+            latency_window=args.latency_window, kernel_timestamps=args.kernel_timestamps)
         if args.discovery or args.server:
             self.client.connect(
                 discovery_address=args.discovery, server_address=args.server)
@@ -137,6 +144,17 @@ class CmdShell(cmd.Cmd):
             data.suffix_data.stamp_camera_mid_exposure)
         print(f"Delay: {stamp - server_stamp} ns")
 
+    def do_latency(self, arg):
+        "Print the latency percentiles [ms] over the rolling window"
+        latencies = self.client.get_latencies()
+        if latencies is None:
+            print("*** Latencies are not computed")
+            return
+        print(f"{'':12}{'count':>8}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+        for kind, s in latencies.items():
+            print(f"{kind:12}{s.count:8d}{s.mean / 1e6:9.3f}{s.p50 / 1e6:9.3f}"
+                  f"{s.p90 / 1e6:9.3f}{s.p99 / 1e6:9.3f}{s.max / 1e6:9.3f}")
+
     def postloop(self):
         self.client.close()
 
@@ -2,13 +2,12 @@
 import argparse
 from typing import Any
 import netifaces
-import h5py
 import asyncio
-import numpy as np
-from collections import defaultdict
 
 from natnet_py import AsyncClient
-from natnet_py.protocol import RigidBodyData
+from natnet_py.capture import CaptureWriter
+from natnet_py.hdf5_writer import COMPRESSIONS, HDF5Writer
+from natnet_py.timing import PiecewiseClockModel
 
 
 def init_logging() -> None:
@@ -22,7 +21,8 @@ def set_log_level(level_name: str) -> None:
 
 def parser(args: Any = None) -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
-    parser.add_argument("output", help="The HDF5 output file path")
+    parser.add_argument(
+        "output", help="The HDF5 (or raw capture, or Arrow stream) output file path")
     parser.add_argument(
         "--server", default="", help="The server address to connect to.")
     parser.add_argument(
@@ -38,6 +38,36 @@ def parser(args: Any = None) -> argparse.ArgumentParser:
     parser.add_argument(
         "--duration", default=0, type=float,
         help="Record duration in seconds. Set to zero or negative to ignore.")
+    parser.add_argument(
+        "--chunk_size", default=1024, type=int,
+        help="The number of rows of each chunk of the HDF5 datasets")
+    parser.add_argument(
+        "--flush_period", default=1.0, type=float,
+        help="The period in seconds of writing data to the file")
+    parser.add_argument(
+        "--max_buffered", default=100_000, type=int,
+        help="The maximal number of rows (frames, rigid bodies, markers, ...) "
+             "kept in memory before writing them")
+    parser.add_argument(
+        "--compression", default=None, choices=COMPRESSIONS,
+        help="The compression filter of the HDF5 datasets "
+             "(blosc, lz4 and zstd require hdf5plugin)")
+    parser.add_argument(
+        "--compression_level", default=None, type=int,
+        help="The compression level (gzip, blosc: 0-9, zstd: 1-22). "
+             "Defaults to the filter default.")
+    parser.add_argument(
+        "--no_shuffle", action='store_true',
+        help="Add to not shuffle bytes before compressing")
+    parser.add_argument(
+        "--rigid_bodies_only", action='store_true',
+        help="Add to record only the rigid bodies instead of all the sections of the frames")
+    parser.add_argument(
+        "--raw", action='store_true',
+        help="Add to record the raw datagrams (all data, undecoded) instead of HDF5")
+    parser.add_argument(
+        "--arrow", action='store_true',
+        help="Add to stream the rigid bodies to an Arrow IPC stream instead of HDF5")
     return parser
 
 
@@ -57,43 +87,75 @@ async def run() -> None:
     init_logging()
     args = parser().parse_args()
     set_log_level(args.log_level)
-    client = AsyncClient(queue=0)
+    # Frames are passed to the callback only: do not queue them
+    client = AsyncClient(queue=-1)
     connected = await client.connect(discovery_address=args.discovery, server_address=args.server)
     restamp = False
-    rbs: dict[int, list[tuple[int, RigidBodyData]]] = defaultdict(list)
-
-    def collect(stamp, data) -> None:
-        if not restamp:
-            stamp = client.server_ticks_to_client_ns_time(
-                data.suffix_data.stamp_camera_mid_exposure)
-        for rb in data.rigid_bodies:
-            rbs[rb.id].append((stamp, rb))
-
-    if connected:
-        client.logger.info("Collecting data ...")
-        client.data_callback = collect
-        await client.wait(args.duration)
-    await client.close()
-    if not rbs:
-        client.logger.info("Collected no data")
+    if not connected or not client.server_info:
+        await client.close()
+        return
+    if args.raw:
+        await record_raw(client, args)
         return
-    client.logger.info("Collected data")
-    with h5py.File(args.output, "w") as f:
-        client.logger.info(f"Saving data to {args.output} ...")
-        for i, data in rbs.items():
-            name = client.rigid_body_names.get(i, str(i))
-            g = f.create_group(f"rigid_bodies/{name}")
-            ds = g.create_dataset("position", data=np.array([msg.position for _, msg in data]))
-            ds.attrs['unit'] = 'mm'
-            ds.attrs['coords'] = 'x, y, z'
-            ds = g.create_dataset("orientation", data=np.array([msg.orientation for _, msg in data]))
-            ds.attrs['coords'] = 'x, y, z, w'
-            ds = g.create_dataset("error", data=np.array([msg.error for _, msg in data]))
-            ds.attrs['unit'] = 'mm'
-            ds = g.create_dataset("time", data=np.array([stamp for stamp, _ in data]))
-            ds.attrs['unit'] = 'ns'
-            ds = g.create_dataset("tracked", data=np.array([msg.tracking_valid for _, msg in data]))
-        client.logger.info("Saved data")
+    if args.arrow:
+        await record_arrow(client, args)
+        return
+    writer = HDF5Writer(args.output, chunk_size=args.chunk_size, flush_period=args.flush_period,
+                        max_buffered=args.max_buffered,
+                        all_sections=not args.rigid_bodies_only,
+                        compression=args.compression,
+                        compression_level=args.compression_level,
+                        shuffle=not args.no_shuffle, logger=client.logger)
+    writer.set_rigid_body_names(client.rigid_body_names)
+    client.logger.info(f"Saving data to {args.output} ...")
+    client.data_callback = writer.add
+    try:
+        await client.wait(args.duration)
+    finally:
+        clock = client.clock
+        await client.close()
+        # Server ticks are converted to client time after collecting the data
+        model: PiecewiseClockModel | None = None
+        if not restamp and clock and clock.history:
+            model = PiecewiseClockModel(clock.history)
+        if writer.close(model):
+            client.logger.info(f"Saved {writer.written} rows")
+
+
+async def record_raw(client: AsyncClient, args: argparse.Namespace) -> None:
+    assert client.server_info
+    capture = CaptureWriter(args.output, client.server_info, client.description)
+    client.logger.info(f"Saving raw data to {args.output} ...")
+    client.raw_data_callback = capture.write
+
+    async def flush() -> None:
+        while True:
+            await asyncio.sleep(args.flush_period)
+            capture.flush()
+
+    task = asyncio.create_task(flush())
+    try:
+        await client.wait(args.duration)
+    finally:
+        task.cancel()
+        await client.close()
+        capture.close()
+        client.logger.info(f"Saved {capture.count} datagrams")
+
+
+async def record_arrow(client: AsyncClient, args: argparse.Namespace) -> None:
+    # requires pyarrow
+    from natnet_py.arrow_export import ArrowStreamSink
+
+    sink = ArrowStreamSink(args.output, client.rigid_body_names)
+    client.logger.info(f"Saving rigid bodies to {args.output} ...")
+    client.data_callback = sink.add
+    try:
+        await client.wait(args.duration)
+    finally:
+        await client.close()
+        sink.close()
+        client.logger.info(f"Saved {sink.written} rigid body updates")
 
 
 def main(args: Any = None) -> None:
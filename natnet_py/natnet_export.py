@@ -0,0 +1,44 @@
+import argparse
+import logging
+from typing import Any
+
+from natnet_py.arrow_export import PARTITIONS, export_parquet
+
+
+def init_logging() -> None:
+    FORMAT = "[%(asctime)s] %(levelname)s: %(message)s"
+    logging.basicConfig(format=FORMAT)
+
+
+def set_log_level(level_name: str) -> None:
+    logging.getLogger().setLevel(logging.getLevelName(level_name))
+
+
+def parser(args: Any = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", help="The recording (raw capture or HDF5) to export")
+    parser.add_argument("output", help="The directory of the Parquet dataset")
+    parser.add_argument(
+        "--partition", default="rigid_body", choices=PARTITIONS,
+        help="How to partition the dataset: by rigid body, by time, or not at all")
+    parser.add_argument(
+        "--period", default=60.0, type=float,
+        help="The duration in seconds of the time partitions")
+    parser.add_argument(
+        "--compression", default="zstd",
+        help="The Parquet compression codec, e.g., zstd, snappy, gzip or none")
+    parser.add_argument(
+        "--batch_size", default=1_000_000, type=int,
+        help="The number of rows written at once")
+    parser.add_argument(
+        "--log_level", default="INFO",
+        help="The log level: one of DEBUG, INFO, WARNING, ERROR")
+    return parser
+
+
+def main(args: Any = None) -> None:
+    init_logging()
+    args = parser().parse_args()
+    set_log_level(args.log_level)
+    export_parquet(args.input, args.output, partition=args.partition, period=args.period,
+                   compression=args.compression, batch_size=args.batch_size)
@@ -62,23 +62,16 @@ class WebUI:
         self.port = port
         self.host = host
         self.queues: list[asyncio.Queue] = []
-        if max_rate > 0:
-            self.min_period = 1.0 / max_rate
-        else:
-            self.min_period = 0
-        self.last_update_stamp: int = 0
         self._prepared = False
         self.server: websockets.WebSocketServer | None = None
         self._client = client
+        self._subscriber = client.subscribe_local(maxsize=1, max_rate=max_rate)
 
     async def run(self) -> None:
         if not await self.prepare():
             return
-        while True:
-            data = await self._client.get_data()
-            if data:
-                await self.send(msg(data[1], self._client.rigid_body_names))
-                await asyncio.sleep(self.min_period)
+        async for _, data in self._subscriber:
+            await self.send(msg(data, self._client.rigid_body_names))
         await self.stop()
 
     async def prepare(self) -> bool:
@@ -118,6 +111,7 @@ class WebUI:
             await self.server.wait_closed()
         self.server = None
         self._prepared = False
+        self._subscriber.close()
         logging.info('Stopped')
 
     def __del__(self):
@@ -127,7 +121,7 @@ class WebUI:
 
 async def run(args: Any = None) -> None:
     _ = parser().parse_args()
-    client = AsyncClient(queue=1)
+    client = AsyncClient(queue=-1)
     connected = await client.connect(discovery_address="255.255.255.255")
     if connected:
         ui = WebUI(client)
@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import logging
+from typing import Any
+
+from natnet_py import AsyncClient
+from natnet_py.relay import Relay
+
+
+def init_logging() -> None:
+    FORMAT = "[%(asctime)s] %(levelname)s: %(message)s"
+    logging.basicConfig(format=FORMAT)
+
+
+def set_log_level(level_name: str) -> None:
+    logging.getLogger().setLevel(logging.getLevelName(level_name))
+
+
+def parser(args: Any = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--server", default="", help="The upstream server address to connect to.")
+    parser.add_argument(
+        "--discovery", default="255.255.255.255",
+        help="The broadcast address to announce this client")
+    parser.add_argument(
+        "--address", default="127.0.0.1", help="The relay address")
+    parser.add_argument(
+        "--command_port", default=1520, type=int, help="The relay command port")
+    parser.add_argument(
+        "--data_port", default=1521, type=int, help="The relay data port")
+    parser.add_argument(
+        "--unicast", action='store_true',
+        help="Whether to send the stream to each client instead of multicasting it. "
+             "Only one client per host is then supported.")
+    parser.add_argument(
+        "--compact", action='store_true',
+        help="Whether to send frames in the compact format (rigid bodies and metadata only), "
+             "which only natnet_py clients decode.")
+    parser.add_argument(
+        "--client_timeout", default=30.0, type=float,
+        help="How long [s] without requests before removing a client")
+    parser.add_argument(
+        "--stats_period", default=10.0, type=float,
+        help="The period [s] to log per-client statistics. Set to zero to disable.")
+    parser.add_argument(
+        "--log_level", default="INFO",
+        help="The log level: one of DEBUG, INFO, WARNING, ERROR")
+    return parser
+
+
+async def log_stats(relay: Relay, period: float) -> None:
+    while True:
+        await asyncio.sleep(period)
+        relay.log_stats()
+
+
+async def run() -> None:
+    init_logging()
+    args = parser().parse_args()
+    set_log_level(args.log_level)
+    client = AsyncClient(queue=-1, auto_reconnect=True)
+    connected = await client.connect(
+        discovery_address=args.discovery, server_address=args.server)
+    if connected:
+        relay = Relay(client, multicast=not args.unicast, address=args.address,
+                      command_port=args.command_port, data_port=args.data_port,
+                      client_timeout=args.client_timeout, compact=args.compact)
+        tasks = [asyncio.create_task(relay.run())]
+        if args.stats_period > 0:
+            tasks.append(asyncio.create_task(log_stats(relay, args.stats_period)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            relay.log_stats()
+    await client.close()
+
+
+def main(args: Any = None) -> None:
+    asyncio.run(run())
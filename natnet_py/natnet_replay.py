@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import logging
+from typing import Any
+
+from natnet_py.replay import ReplayServer
+
+
+def init_logging() -> None:
+    FORMAT = "[%(asctime)s] %(levelname)s: %(message)s"
+    logging.basicConfig(format=FORMAT)
+
+
+def set_log_level(level_name: str) -> None:
+    logging.getLogger().setLevel(logging.getLevelName(level_name))
+
+
+def parser(args: Any = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", help="The recording (raw capture or HDF5) to replay")
+    parser.add_argument(
+        "--speed", default=1.0, type=float,
+        help="The speed factor. Set to zero to replay as fast as possible.")
+    parser.add_argument(
+        "--loop", action='store_true', help="Whether to replay the recording in a loop")
+    parser.add_argument(
+        "--address", default="127.0.0.1", help="The server address")
+    parser.add_argument(
+        "--command_port", default=1510, type=int, help="The command port")
+    parser.add_argument(
+        "--data_port", default=1511, type=int, help="The data port")
+    parser.add_argument(
+        "--multicast", action='store_true',
+        help="Whether to multicast the stream instead of sending it to each client")
+    parser.add_argument(
+        "--no_wait", action='store_true',
+        help="Add to start replaying immediately instead of waiting for a client")
+    parser.add_argument(
+        "--log_level", default="INFO",
+        help="The log level: one of DEBUG, INFO, WARNING, ERROR")
+    return parser
+
+
+async def run() -> None:
+    init_logging()
+    args = parser().parse_args()
+    set_log_level(args.log_level)
+    server = ReplayServer(args.input, speed=args.speed, loop=args.loop,
+                          multicast=args.multicast, address=args.address,
+                          command_port=args.command_port, data_port=args.data_port,
+                          wait_for_client=not args.no_wait)
+    try:
+        await server.run()
+    finally:
+        if server.lateness.count:
+            logging.getLogger().info(
+                f"Lateness [us]: median {server.lateness.percentile(50) / 1e3:.1f}, "
+                f"p99 {server.lateness.percentile(99) / 1e3:.1f}, "
+                f"max {(server.lateness.max or 0) / 1e3:.1f}")
+
+
+def main(args: Any = None) -> None:
+    asyncio.run(run())
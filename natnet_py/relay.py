@@ -0,0 +1,167 @@
+import asyncio
+import dataclasses as dc
+import logging
+import time
+
+from . import protocol
+from .async_client import AsyncClient
+from .compact import KEYFRAME_REQUEST, MESSAGE_ID, CompactEncoder
+from .server import Server, ServerProtocol
+
+REQUEST_ID = protocol.NAT.REQUEST.value.to_bytes(2, 'little')
+DISCONNECT_ID = protocol.NAT.DISCONNECT.value.to_bytes(2, 'little')
+
+
+class Relay(Server):
+    """
+    Re-serves the stream received by a connected client as a NatNet server,
+    so that many local clients share a single connection to the upstream server.
+
+    Frames are forwarded as raw datagrams, without re-encoding them.
+    Discovery, connection, model definition and echo requests are answered locally
+    (echoes using the upstream clock, as estimated by the client);
+    other requests are forwarded upstream.
+
+    The stream is multicast by default. When unicasting, clients are registered by IP address
+    and frames are sent to the fixed data port: only one client per host (e.g., only one
+    local client on ``127.0.0.1``) can receive the stream.
+
+    If ``compact``, frames are instead re-encoded by a :py:class:`natnet_py.compact.CompactEncoder`
+    (rigid bodies and metadata only), prefixed by :py:data:`natnet_py.compact.MESSAGE_ID`,
+    which :py:class:`natnet_py.AsyncClient` decodes. Clients that wait for a keyframe
+    (e.g., after connecting or losing a frame) request it with
+    :py:data:`natnet_py.compact.KEYFRAME_REQUEST`.
+
+    Usage:
+
+    >>> client = AsyncClient()
+    >>> await client.connect(server_address="192.168.1.10")
+    >>> relay = Relay(client, command_port=1520, data_port=1521)
+    >>> await relay.run()
+    """
+
+    def __init__(self,
+                 client: AsyncClient,
+                 multicast: bool = True,
+                 address: str = "127.0.0.1",
+                 command_port: int = 1520,
+                 data_port: int = 1521,
+                 client_timeout: float = 30.0,
+                 request_timeout: float = 1.0,
+                 compact: bool = False,
+                 keyframe_interval: int = 100):
+        """
+        Constructs a new instance.
+
+        :param      client:           The client connected to the upstream server
+        :param      multicast:        Whether to use multicasting.
+                                      If not set, only one client per host is supported.
+        :param      address:          The relay address
+        :param      command_port:     The command port
+        :param      data_port:        The data port
+        :param      client_timeout:   How long [s] without requests before removing a client.
+                                      Set to zero or negative to keep all clients.
+        :param      request_timeout:  The timeout [s] of requests forwarded upstream
+        :param      compact:          Whether to send frames in the compact format
+        :param      keyframe_interval:  The number of compact frames between keyframes
+        """
+        if not client.server_info:
+            raise ValueError("The client is not connected")
+        self._client = client
+        self._server_info = client.server_info
+        version = self._server_info.nat_net_stream_version_server
+        super().__init__(rate=120, multicast=multicast, address=address,
+                         natnet_version=(version.major, version.minor),
+                         command_port=command_port, data_port=data_port)
+        self.client_timeout = client_timeout
+        self.request_timeout = request_timeout
+        self.encoder = CompactEncoder(keyframe_interval) if compact else None
+
+    def make_protocol(self) -> ServerProtocol:
+        return RelayProtocol(self)
+
+    def get_server_info(self) -> protocol.ServerInfo:
+        if self._client.server_info:
+            self._server_info = self._client.server_info
+        connection_info = protocol.ConnectionInfo(
+            data_port=self.data_port,
+            multicast=self.multicast,
+            multicast_address=self.multicast_address)
+        return dc.replace(self._server_info, connection_info=connection_info)
+
+    def get_description(self) -> protocol.MoCapDescription:
+        return self._client.description or protocol.MoCapDescription()
+
+    def get_ticks(self) -> int:
+        clock = self._client.clock
+        ns = clock.client_to_server_time(time.time_ns()) if clock else self.get_ns()
+        return int(ns * self._server_info.high_resolution_clock_frequency / 1e9)
+
+    async def forward(self, request: protocol.Request) -> protocol.Response | None:
+        """Forwards a request to the upstream server"""
+        return await self._client.send_request(request.data, timeout=self.request_timeout)
+
+    def relay_data(self, data: bytes) -> None:
+        """Forwards a frame datagram received from the upstream server"""
+        if self.encoder:
+            msg = protocol.unpack(protocol.Buffer(data))
+            if not isinstance(msg, protocol.MoCapData):
+                return
+            data = MESSAGE_ID + self.encoder.encode(msg)
+        self.send_data(data)
+
+    def remove_stale_clients(self) -> None:
+        if self.client_timeout <= 0:
+            return
+        deadline = time.monotonic() - self.client_timeout
+        for address, stats in list(self.client_stats.items()):
+            if address in self.clients and stats.last_seen < deadline:
+                self.remove_client(address)
+
+    def log_stats(self) -> None:
+        for address, stats in self.client_stats.items():
+            logging.getLogger().info(
+                f"{address}: sent {stats.frames} frames ({stats.bytes} bytes), "
+                f"received {stats.requests} requests")
+
+    async def stream_mocap_data(self) -> None:
+        self._client.raw_data_callback = lambda stamp, data: self.relay_data(data)
+        try:
+            while True:
+                await asyncio.sleep(1.0)
+                self.remove_stale_clients()
+        finally:
+            self._client.raw_data_callback = None
+
+
+class RelayProtocol(ServerProtocol):
+
+    def __init__(self, server: Relay):
+        super().__init__(server)
+        self._relay = server
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        if data[:2] == REQUEST_ID:
+            self._server.client_seen(addr[0])
+            request = protocol.unpack(protocol.Buffer(data))
+            if isinstance(request, protocol.Request) and request.data == KEYFRAME_REQUEST:
+                if self._relay.encoder:
+                    self._relay.encoder.request_keyframe()
+                self.transport.sendto(protocol.pack(protocol.Response(b"")), addr)
+            elif isinstance(request, protocol.Request):
+                task = asyncio.create_task(self._forward(request, addr))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return
+        if data[:2] == DISCONNECT_ID:
+            self._server.remove_client(addr[0])
+            return
+        super().datagram_received(data, addr)
+
+    async def _forward(self, request: protocol.Request, addr: tuple[str, int]) -> None:
+        response = await self._relay.forward(request)
+        if response:
+            self.transport.sendto(protocol.pack(response), addr)
+        else:
+            logging.getLogger().warning(f"No upstream response to {request.data!r}")
@@ -0,0 +1,296 @@
+import asyncio
+import dataclasses as dc
+import heapq
+import itertools
+import logging
+import statistics
+import struct
+import time
+from typing import Any, Iterator
+
+from . import protocol
+from .capture import CaptureReader
+from .loopback import LoopbackNetwork
+from .server import Server
+from .stats import Histogram
+
+# the frame number of a frame datagram, after message id and packet size
+FRAME_NUMBER = struct.Struct("<i")
+FRAME_NUMBER_OFFSET = 4
+# number of frames used to estimate the rate of a recording
+RATE_SAMPLES = 1000
+
+Datagram = tuple[int, bytes | protocol.MoCapData]
+
+
+def estimate_rate(stamps: list[int]) -> float:
+    """Estimates the frame rate from consecutive stamps [ns]"""
+    periods = [b - a for a, b in zip(stamps, stamps[1:]) if b > a]
+    if not periods:
+        return 0.0
+    return 1e9 / statistics.median(periods)
+
+
+class CaptureSource:
+    """Replays the frames of a raw capture (see :py:mod:`natnet_py.capture`), as recorded"""
+
+    def __init__(self, path: str):
+        self.reader = CaptureReader(path)
+        self.server_info = self.reader.server_info
+        self.description = self.reader.description or protocol.MoCapDescription()
+        self.version = self.reader.version
+        numbers = [r.frame_number for r in (self.reader[0], self.reader[-1])
+                   ] if len(self.reader) else [0, -1]
+        self.frame_span = numbers[1] - numbers[0] + 1
+        """the difference between the frame numbers of two successive repetitions"""
+        self.rate = estimate_rate(
+            [r.stamp for r in self.reader.records(stop=RATE_SAMPLES) if r.frame_number >= 0])
+        """the estimated frame rate"""
+
+    def datagrams(self) -> Iterator[Datagram]:
+        """The receiving stamps and the frame datagrams"""
+        for record in self.reader.records():
+            if record.frame_number >= 0:
+                yield record.stamp, record.data
+
+    def close(self) -> None:
+        self.reader.close()
+
+
+class HDF5Source:
+    """
+    Replays the rigid bodies recorded to HDF5 (see :py:class:`natnet_py.hdf5_writer.HDF5Writer`).
+
+    Rows with the same receiving stamp are grouped into frames.
+    Since the server clock is not recorded, frames are numbered and stamped when replayed.
+    """
+
+    server_info: protocol.ServerInfo | None = None
+    version = (3, 1)
+    frame_span = 0
+
+    def __init__(self, path: str, block: int = 4096):
+        """
+        Constructs a new instance.
+
+        :param path:  The path of the HDF5 file
+        :param block: The number of rows read at once from each dataset
+        """
+        import h5py
+
+        self._file = h5py.File(path, "r")
+        self.block = block
+        group = self._file.get("rigid_bodies", {})
+        self._groups = [group[name] for name in sorted(group)]
+        self.description = protocol.MoCapDescription(rigid_bodies=[
+            protocol.RigidBodyDescription(name=name, id=i)
+            for i, name in enumerate(sorted(group))])
+        self.rate = estimate_rate(
+            self._groups[0][self._stamp_key(self._groups[0])][:RATE_SAMPLES].tolist()
+            if self._groups else [])
+        """the estimated frame rate"""
+
+    @staticmethod
+    def _stamp_key(group: Any) -> str:
+        # files recorded before receiving stamps were added only have time
+        return "stamp" if "stamp" in group else "time"
+
+    def _rows(self, i: int, group: Any) -> Iterator[tuple[int, int, protocol.RigidBodyData]]:
+        stamps = group[self._stamp_key(group)]
+        for start in range(0, len(stamps), self.block):
+            end = start + self.block
+            rows = zip(stamps[start:end].tolist(), group["position"][start:end].tolist(),
+                       group["orientation"][start:end].tolist(),
+                       group["error"][start:end].tolist(), group["tracked"][start:end].tolist())
+            for stamp, position, orientation, error, tracked in rows:
+                yield stamp, i, protocol.RigidBodyData(
+                    id=i, position=tuple(position), orientation=tuple(orientation),
+                    error=error, tracking_valid=tracked)
+
+    def datagrams(self) -> Iterator[Datagram]:
+        """The receiving stamps and the frames (without number and suffix)"""
+        rows = heapq.merge(*(self._rows(i, g) for i, g in enumerate(self._groups)),
+                           key=lambda row: (row[0], row[1]))
+        for stamp, frame in itertools.groupby(rows, key=lambda row: row[0]):
+            yield stamp, protocol.MoCapData(rigid_bodies=[rb for _, _, rb in frame])
+
+    def close(self) -> None:
+        self._file.close()
+
+
+ReplaySource = CaptureSource | HDF5Source
+
+
+def open_source(path: str) -> ReplaySource:
+    """
+    Opens a recording, either a raw capture or an HDF5 file.
+
+    :raises ValueError: if the file is neither
+    """
+    try:
+        return CaptureSource(path)
+    except (ValueError, FileNotFoundError):
+        pass
+    try:
+        return HDF5Source(path)
+    except OSError as e:
+        raise ValueError(f"{path} is neither a capture nor an HDF5 file") from e
+
+
+class ReplayServer(Server):
+    """
+    A NatNet server that streams a recorded session with its original description and timing.
+
+    Raw captures are streamed as recorded (but for frame numbers, which keep increasing when
+    looping); echo requests are answered in the timeline of the recorded server.
+    HDF5 recordings contain rigid bodies only, stamped by this server when replayed.
+
+    Frames are scheduled from their receiving stamps, scaled by ``1 / speed``,
+    against absolute deadlines (so that errors do not accumulate): the server sleeps until
+    ``spin`` seconds before a deadline, then busy-waits. Set ``speed`` to zero to stream
+    as fast as possible. The lateness of each frame is recorded in :py:attr:`lateness`.
+
+    Usage:
+
+    >>> server = ReplayServer("session.cap", speed=2.0)
+    >>> await server.run()
+    """
+
+    def __init__(self,
+                 source: str | ReplaySource,
+                 speed: float = 1.0,
+                 loop: bool = False,
+                 multicast: bool = False,
+                 address: str = "127.0.0.1",
+                 command_port: int = 1510,
+                 data_port: int | None = None,
+                 wait_for_client: bool = True,
+                 spin: float = 0.001,
+                 network: LoopbackNetwork | None = None):
+        """
+        Constructs a new instance.
+
+        :param      source:          The recording or its path
+        :param      speed:           The speed factor. Set to zero to stream as fast as possible.
+        :param      loop:            Whether to restart from the beginning when done
+        :param      multicast:       Whether to use multicasting
+        :param      address:         The server address
+        :param      command_port:    The command port
+        :param      data_port:       The data port
+        :param      wait_for_client: Whether to start streaming only once a client connects
+                                     (ignored when multicasting)
+        :param      spin:            How long [s] to busy-wait before sending a frame
+        :param      network:         An in-memory network to use instead of sockets
+        """
+        self.source = open_source(source) if isinstance(source, str) else source
+        super().__init__(rate=120, multicast=multicast, address=address,
+                         natnet_version=self.source.version,
+                         command_port=command_port, data_port=data_port, network=network)
+        # not clamped like the rate of synthetic data
+        self._rate = max(1, round(self.source.rate))
+        self.speed = speed
+        self.loop = loop
+        self.wait_for_client = wait_for_client
+        self.spin = spin
+        self.lateness = Histogram()
+        """how late [ns] frames have been sent with respect to their schedule"""
+        self.repetition = 0
+        """how many times the recording has been replayed completely"""
+        self._last: tuple[int, bytes] | None = None
+        self._last_ticks: tuple[int, int | None] | None = None
+
+    def get_server_info(self) -> protocol.ServerInfo:
+        server_info = self.source.server_info
+        if not server_info:
+            return super().get_server_info()
+        connection_info = protocol.ConnectionInfo(
+            data_port=self.data_port,
+            multicast=self.multicast,
+            multicast_address=self.multicast_address)
+        return dc.replace(server_info, connection_info=connection_info)
+
+    def get_description(self) -> protocol.MoCapDescription:
+        return self.source.description
+
+    def get_ticks(self) -> int:
+        if not self.source.server_info or not self._last:
+            return super().get_ticks()
+        sent, data = self._last
+        if not self._last_ticks or self._last_ticks[0] != sent:
+            # decode only the frames sent before echo requests
+            msg = protocol.unpack(protocol.Buffer(data))
+            ticks = (msg.suffix_data.stamp_transmit
+                     if isinstance(msg, protocol.MoCapData) and msg.suffix_data else None)
+            self._last_ticks = (sent, ticks)
+        ticks = self._last_ticks[1]
+        if ticks is None:
+            return super().get_ticks()
+        frequency = self.source.server_info.high_resolution_clock_frequency
+        elapsed = (time.perf_counter_ns() - sent) * self.speed
+        return ticks + int(elapsed * frequency / 1e9)
+
+    async def _wait_until(self, deadline: int) -> None:
+        delay = (deadline - time.perf_counter_ns()) / 1e9
+        if delay > self.spin:
+            await asyncio.sleep(delay - self.spin)
+        elif delay <= 0:
+            # behind schedule: still let the server answer requests
+            await asyncio.sleep(0)
+        while time.perf_counter_ns() < deadline:
+            pass
+
+    def _send(self, data: bytes | protocol.MoCapData) -> None:
+        if isinstance(data, protocol.MoCapData):
+            self.frame_number += 1
+            data.frame_number = self.frame_number
+            data.suffix_data = self.get_suffix_data()
+            data = protocol.pack(data)
+        elif self.repetition:
+            buffer = bytearray(data)
+            number = FRAME_NUMBER.unpack_from(buffer, FRAME_NUMBER_OFFSET)[0]
+            FRAME_NUMBER.pack_into(buffer, FRAME_NUMBER_OFFSET,
+                                   number + self.repetition * self.source.frame_span)
+            data = bytes(buffer)
+        self._last = (time.perf_counter_ns(), data)
+        self.send_data(data)
+
+    async def replay(self) -> int:
+        """
+        Replays the recording once.
+
+        :returns: The number of frames sent
+        """
+        start = first = 0
+        count = 0
+        for stamp, data in self.source.datagrams():
+            if self.speed > 0:
+                if not count:
+                    start, first = time.perf_counter_ns(), stamp
+                deadline = start + int((stamp - first) / self.speed)
+                await self._wait_until(deadline)
+                self.lateness.add(max(0, time.perf_counter_ns() - deadline))
+            else:
+                # let the server answer requests
+                await asyncio.sleep(0)
+            self._send(data)
+            count += 1
+        return count
+
+    async def stream_mocap_data(self) -> None:
+        if self.wait_for_client and not self.multicast:
+            logging.getLogger().info("Waiting for a client ...")
+            while not self.clients:
+                await asyncio.sleep(0.01)
+        while True:
+            start = time.perf_counter()
+            count = await self.replay()
+            duration = max(1e-9, time.perf_counter() - start)
+            logging.getLogger().info(
+                f"Replayed {count} frames in {duration:.3f} s ({count / duration:.1f} fps)")
+            if not self.loop or not count:
+                return
+            self.repetition += 1
+
+    def close(self) -> None:
+        super().close()
+        self.source.close()
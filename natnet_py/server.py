@@ -1,6 +1,7 @@
 # modified from https://github.com/mje-nz/python_natnet/blob/master/src/natnet/Server.py
 
 import asyncio
+import dataclasses as dc
 import logging
 import re
 import socket
@@ -9,6 +10,21 @@ import time
 from typing import Any, cast
 
 from . import protocol
+from .loopback import LoopbackNetwork
+
+
+@dc.dataclass
+class ClientStats:
+    """Statistics about a client of the server"""
+
+    frames: int = 0
+    """number of frames sent to the client"""
+    bytes: int = 0
+    """number of bytes of frames sent to the client"""
+    requests: int = 0
+    """number of requests received from the client"""
+    last_seen: float = 0.0
+    """when (monotonic time) the last request has been received"""
 
 
 class Server:
@@ -32,7 +48,10 @@ class Server:
                  rate: int,
                  multicast: bool = False,
                  address: str = "127.0.0.1",
-                 natnet_version: tuple[int, int] = (3, 1)):
+                 natnet_version: tuple[int, int] = (3, 1),
+                 command_port: int = 1510,
+                 data_port: int | None = None,
+                 network: LoopbackNetwork | None = None):
         """
         Constructs a new instance.
 
@@ -40,8 +59,18 @@ class Server:
         :param      multicast:       Whether to use multicasting
         :param      address:         The server address
         :param      natnet_version:  The server natnet version (major, minor)
+        :param      command_port:    The command port
+        :param      data_port:       The data port. Defaults to :py:attr:`data_port`.
+        :param      network:         An in-memory network to use instead of sockets
         """
         self.clients: set[str] = set()
+        self.client_stats: dict[str, ClientStats] = {}
+        """Statistics about the clients (or the multicast group) indexed by address"""
+        self.command_port = command_port
+        if data_port is not None:
+            self.data_port = data_port
+        self.transport: asyncio.DatagramTransport | None = None
+        self.network = network
         self._rate = 1
         self.rate = rate
         self.multicast = multicast
@@ -66,27 +95,54 @@ class Server:
     def get_ns(self) -> int:
         return time.time_ns() - self.time_0
 
+    def get_ticks(self) -> int:
+        """The current server time in ticks, used to answer echo requests"""
+        return self.get_ns()
+
+    def get_server_info(self) -> protocol.ServerInfo:
+        connection_info = protocol.ConnectionInfo(
+            data_port=self.data_port,
+            multicast=self.multicast,
+            multicast_address=self.multicast_address)
+        version = protocol.Version((*protocol.get_version(), 0, 0))
+        return protocol.ServerInfo(application_name=u'python_natnet server',
+                                   server_version=version,
+                                   nat_net_stream_version_server=version,
+                                   high_resolution_clock_frequency=1000000000,
+                                   connection_info=connection_info)
+
+    def make_protocol(self) -> 'ServerProtocol':
+        """Overwrite to customize how requests are handled"""
+        return ServerProtocol(self)
+
     async def run(self):
         """
         Run the server
         """
         loop = asyncio.get_running_loop()
-        if self.multicast:
-            self.multicast_sock = socket.socket(socket.AF_INET,
-                                                socket.SOCK_DGRAM,
-                                                socket.IPPROTO_UDP)
-            self.multicast_sock.setsockopt(socket.SOL_SOCKET,
-                                           socket.SO_REUSEADDR, 1)
-            # self.multicast_sock.setsockopt(socket.IPPROTO_IP,
-            #                                socket.IP_MULTICAST_TTL, 32)
-        logging.info(f"Start server on {self.address}:1510")
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.bind(('', 1510))
-        self.transport, self.protocol = await loop.create_datagram_endpoint(
-            lambda: ServerProtocol(self),
-            sock=sock,
-            # local_addr=(self.address, 1510)
-        )
+        logging.info(f"Start server on {self.address}:{self.command_port}")
+        if self.network:
+            self.transport, self.protocol = await self.network.create_datagram_endpoint(
+                self.make_protocol, local_addr=(self.address, self.command_port))
+        else:
+            if self.multicast:
+                self.multicast_sock = socket.socket(socket.AF_INET,
+                                                    socket.SOCK_DGRAM,
+                                                    socket.IPPROTO_UDP)
+                self.multicast_sock.setsockopt(socket.SOL_SOCKET,
+                                               socket.SO_REUSEADDR, 1)
+                # send from the server interface (e.g., to reach local clients on loopback)
+                self.multicast_sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
+                                               socket.inet_aton(self.address))
+                # self.multicast_sock.setsockopt(socket.IPPROTO_IP,
+                #                                socket.IP_MULTICAST_TTL, 32)
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(('', self.command_port))
+            self.transport, self.protocol = await loop.create_datagram_endpoint(
+                self.make_protocol,
+                sock=sock,
+                # local_addr=(self.address, 1510)
+            )
         try:
             await self.stream_mocap_data()
         finally:
@@ -104,6 +160,39 @@ class Server:
             if address not in self.clients:
                 logging.getLogger().info(f"Add client at {address}")
                 self.clients.add(address)
+                self.client_stats.setdefault(address, ClientStats())
+
+    def remove_client(self, address: str) -> None:
+        if address in self.clients:
+            logging.getLogger().info(f"Remove client at {address}")
+            self.clients.discard(address)
+            self.client_stats.pop(address, None)
+
+    def client_seen(self, address: str) -> None:
+        stats = self.client_stats.get(address)
+        if stats:
+            stats.requests += 1
+            stats.last_seen = time.monotonic()
+
+    def send_data(self, data: bytes) -> None:
+        """Sends a frame datagram to all clients"""
+        if not self.transport:
+            return
+        if not self.multicast:
+            for address in self.clients:
+                self.transport.sendto(data, (address, self.data_port))
+                stats = self.client_stats[address]
+                stats.frames += 1
+                stats.bytes += len(data)
+        else:
+            if self.network:
+                self.transport.sendto(data, (self.multicast_address, self.data_port))
+            else:
+                self.multicast_sock.sendto(
+                    data, (self.multicast_address, self.data_port))
+            stats = self.client_stats.setdefault(self.multicast_address, ClientStats())
+            stats.frames += 1
+            stats.bytes += len(data)
 
     def get_rigid_bodies_def(self) -> list[protocol.RigidBodyDescription]:
         """Overwrite to define the MoCap description"""
@@ -117,29 +206,25 @@ class Server:
         return protocol.MoCapDescription(
             rigid_bodies=self.get_rigid_bodies_def())
 
-    def get_mocap_data(self) -> protocol.MoCapData:
+    def get_suffix_data(self) -> protocol.FrameSuffixData:
         ns = self.get_ns()
-        suffix_data = protocol.FrameSuffixData(timecode=0,
-                                               timecode_sub=0,
-                                               timestamp=time.time(),
-                                               stamp_camera_mid_exposure=ns,
-                                               stamp_data_received=ns,
-                                               stamp_transmit=ns)
+        return protocol.FrameSuffixData(timecode=0,
+                                        timecode_sub=0,
+                                        timestamp=time.time(),
+                                        stamp_camera_mid_exposure=ns,
+                                        stamp_data_received=ns,
+                                        stamp_transmit=ns)
+
+    def get_mocap_data(self) -> protocol.MoCapData:
         self.frame_number += 1
         return protocol.MoCapData(frame_number=self.frame_number,
                                   rigid_bodies=self.get_rigid_bodies_data(),
-                                  suffix_data=suffix_data)
+                                  suffix_data=self.get_suffix_data())
 
     async def stream_mocap_data(self):
         while True:
             msg = self.get_mocap_data()
-            data = protocol.pack(msg)
-            if not self.multicast:
-                for address in self.clients:
-                    self.transport.sendto(data, (address, self.data_port))
-            else:
-                self.multicast_sock.sendto(
-                    data, (self.multicast_address, self.data_port))
+            self.send_data(protocol.pack(msg))
             await asyncio.sleep(1.0 / self.rate)
 
 
@@ -151,8 +236,10 @@ class ServerProtocol:
     def connection_made(self, transport: asyncio.BaseTransport):
         self.transport = cast(asyncio.DatagramTransport, transport)
         sock = transport.get_extra_info("socket")
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        # no socket on a loopback network
+        if sock:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
 
     def connection_lost(self, exc: Any) -> None:
         logging.getLogger().warning("Server cmd socket closed")
@@ -160,6 +247,7 @@ class ServerProtocol:
     def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
         logging.getLogger().debug(
             f'Got {len(data)} bytes from {addr[0]}:{addr[1]}')
+        self._server.client_seen(addr[0])
         request = protocol.unpack(protocol.Buffer(data))
         # logging.getLogger().debug(f'Received {request}')
         response: protocol.Msg | None = None
@@ -215,21 +303,12 @@ class ServerProtocol:
         return None
 
     def get_server_info(self) -> protocol.ServerInfo:
-        connection_info = protocol.ConnectionInfo(
-            data_port=self._server.data_port,
-            multicast=self._server.multicast,
-            multicast_address=self._server.multicast_address)
-        version = protocol.Version((*protocol.get_version(), 0, 0))
-        return protocol.ServerInfo(application_name=u'python_natnet server',
-                                   server_version=version,
-                                   nat_net_stream_version_server=version,
-                                   high_resolution_clock_frequency=1000000000,
-                                   connection_info=connection_info)
+        return self._server.get_server_info()
 
     def get_echo_response(
             self, request: protocol.EchoRequest) -> protocol.EchoResponse:
         return protocol.EchoResponse(request_stamp=request.timestamp,
-                                     received_stamp=self._server.get_ns())
+                                     received_stamp=self._server.get_ticks())
 
     def get_framerate(self) -> protocol.Response:
         return protocol.Response(data=struct.pack("<f", self._server.rate))
@@ -0,0 +1,430 @@
+import dataclasses as dc
+import logging
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import TYPE_CHECKING, cast
+
+from . import protocol
+from .buffer import Quaternion, Vector3
+
+if TYPE_CHECKING:
+    from .async_client import AsyncClient
+    from .subscriber import Subscriber
+
+MAGIC = b"NNSM"
+VERSION = 2
+# magic, version, max number of rigid bodies, ring size
+META = struct.Struct("<4sIII")
+# names sequence, ring head
+COUNTER = struct.Struct("<Q")
+NAMES_SEQ_OFFSET = META.size
+HEAD_OFFSET = NAMES_SEQ_OFFSET + COUNTER.size
+HEADER_SIZE = HEAD_OFFSET + COUNTER.size
+# id, name
+NAME = struct.Struct("<i60s")
+# id, tracking valid, x, y, z, qx, qy, qz, qw, error
+POSE = struct.Struct("<i?3x8d")
+# sequence, stamp, frame number
+STATE_HEAD = struct.Struct("<Qqi")
+# sequence, stamp, frame number, number of rigid bodies
+FRAME_HEAD = struct.Struct("<Qqii")
+# Sequence counters are 8-byte aligned, so that they are read and written atomically
+ALIGNMENT = 8
+
+
+def _align(size: int) -> int:
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def _state_size() -> int:
+    return _align(STATE_HEAD.size + POSE.size)
+
+
+def _frame_size(max_rigid_bodies: int) -> int:
+    return _align(FRAME_HEAD.size + max_rigid_bodies * POSE.size)
+
+
+@dc.dataclass
+class RigidBodyState:
+    """The state of a rigid body read from shared memory"""
+
+    id: int
+    """the rigid body identifier"""
+    stamp: int
+    """the receiving time in ns"""
+    frame_number: int
+    """the frame number"""
+    position: Vector3
+    """position"""
+    orientation: Quaternion
+    """orientation"""
+    tracking_valid: bool
+    """whether the rigid body is currently tracked"""
+    error: float
+    """mean marker error (meters)"""
+
+
+@dc.dataclass
+class SharedFrame:
+    """A frame read from shared memory (rigid bodies only)"""
+
+    index: int
+    """the position of the frame in the stream"""
+    stamp: int
+    """the receiving time in ns"""
+    frame_number: int
+    """the frame number"""
+    rigid_bodies: list[RigidBodyState]
+    """rigid bodies"""
+
+
+def _size(max_rigid_bodies: int, ring_size: int) -> int:
+    return (HEADER_SIZE + max_rigid_bodies * (NAME.size + _state_size())
+            + ring_size * _frame_size(max_rigid_bodies))
+
+
+class _Layout:
+
+    def __init__(self, shm: shared_memory.SharedMemory, max_rigid_bodies: int,
+                 ring_size: int):
+        if shm.buf is None:
+            raise ValueError(f"Shared memory block {shm.name} is closed")
+        self.shm = shm
+        self.buf: memoryview = shm.buf
+        self.max_rigid_bodies = max_rigid_bodies
+        self.ring_size = ring_size
+        self.names_offset = HEADER_SIZE
+        self.state_size = _state_size()
+        self.states_offset = self.names_offset + max_rigid_bodies * NAME.size
+        self.frame_size = _frame_size(max_rigid_bodies)
+        self.ring_offset = self.states_offset + max_rigid_bodies * self.state_size
+
+    def counter(self, offset: int) -> int:
+        return COUNTER.unpack_from(self.buf, offset)[0]
+
+    def set_counter(self, offset: int, value: int) -> None:
+        COUNTER.pack_into(self.buf, offset, value)
+
+    def state_offset(self, slot: int) -> int:
+        return self.states_offset + slot * self.state_size
+
+    def frame_offset(self, index: int) -> int:
+        return self.ring_offset + (index % self.ring_size) * self.frame_size
+
+
+class SharedMemoryPublisher:
+    """
+    Publishes the rigid bodies received by a client to other processes on the same host,
+    through a named shared memory block that contains:
+
+    - the latest state of each rigid body, protected by a seqlock;
+    - a ring with the latest ``ring_size`` frames.
+
+    Frames are decoded once by the publisher: readers (:py:class:`SharedMemoryReader`)
+    do not use sockets nor decode NatNet messages.
+
+    Usage:
+
+    >>> publisher = SharedMemoryPublisher("natnet")
+    >>> await publisher.run(client)
+    """
+
+    def __init__(self,
+                 name: str = "natnet",
+                 max_rigid_bodies: int = 32,
+                 ring_size: int = 256,
+                 logger: logging.Logger = logging.getLogger()):
+        """
+        Constructs a new instance, creating the shared memory block.
+
+        :param name:             The name of the shared memory block
+        :param max_rigid_bodies: The maximal number of rigid bodies
+        :param ring_size:        The number of frames kept in the ring
+        :param logger:           The logger to use
+
+        :raises FileExistsError: if a block with the same name exists already
+        """
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=_size(max_rigid_bodies, ring_size))
+        self._layout = _Layout(shm, max_rigid_bodies, ring_size)
+        self._layout.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        META.pack_into(self._layout.buf, 0, MAGIC, VERSION, max_rigid_bodies, ring_size)
+        for slot in range(max_rigid_bodies):
+            NAME.pack_into(
+                self._layout.buf, self._layout.names_offset + slot * NAME.size, -1, b"")
+        self._slots: dict[int, int] = {}
+        self._names: dict[int, str] = {}
+        self._head = 0
+        self._warned = False
+        self._closed = False
+        self._subscriber: 'Subscriber | None' = None
+        self.logger = logger
+
+    @property
+    def name(self) -> str:
+        """The name of the shared memory block"""
+        return self._layout.shm.name
+
+    @property
+    def published(self) -> int:
+        """The number of published frames"""
+        return self._head
+
+    def _slot(self, id: int) -> int | None:
+        slot = self._slots.get(id)
+        if slot is None:
+            if len(self._slots) >= self._layout.max_rigid_bodies:
+                if not self._warned:
+                    self.logger.warning("Too many rigid bodies for the shared memory block")
+                    self._warned = True
+                return None
+            slot = self._slots[id] = len(self._slots)
+            self._write_name(slot, id)
+        return slot
+
+    def _write_name(self, slot: int, id: int) -> None:
+        layout = self._layout
+        seq = layout.counter(NAMES_SEQ_OFFSET)
+        layout.set_counter(NAMES_SEQ_OFFSET, seq + 1)
+        NAME.pack_into(layout.buf, layout.names_offset + slot * NAME.size, id,
+                       self._names.get(id, "").encode()[:NAME.size - 4])
+        layout.set_counter(NAMES_SEQ_OFFSET, seq + 2)
+
+    def set_rigid_body_names(self, names: dict[int, str]) -> None:
+        """
+        Sets the names of the rigid bodies.
+
+        :param names: The names indexed by rigid body identifiers
+        """
+        self._names = dict(names)
+        for id in names:
+            slot = self._slot(id)
+            if slot is not None:
+                self._write_name(slot, id)
+
+    def publish(self, stamp: int, msg: protocol.MoCapData) -> None:
+        """
+        Publishes a frame. Can be used as :py:attr:`natnet_py.AsyncClient.data_callback`.
+        Does nothing once the publisher is closed.
+
+        :param stamp: The receiving time in ns
+        :param msg:   The frame
+        """
+        if self._closed:
+            return
+        layout = self._layout
+        buf = layout.buf
+        index = self._head
+        offset = layout.frame_offset(index)
+        FRAME_HEAD.pack_into(buf, offset, 2 * index + 1, stamp, msg.frame_number, 0)
+        count = 0
+        for rb in msg.rigid_bodies:
+            slot = self._slot(rb.id)
+            if slot is None:
+                continue
+            pose = (rb.id, rb.tracking_valid, *rb.position, *rb.orientation, rb.error)
+            if count < layout.max_rigid_bodies:
+                POSE.pack_into(buf, offset + FRAME_HEAD.size + count * POSE.size, *pose)
+                count += 1
+            state_offset = layout.state_offset(slot)
+            seq = layout.counter(state_offset)
+            layout.set_counter(state_offset, seq + 1)
+            STATE_HEAD.pack_into(buf, state_offset, seq + 1, stamp, msg.frame_number)
+            POSE.pack_into(buf, state_offset + STATE_HEAD.size, *pose)
+            layout.set_counter(state_offset, seq + 2)
+        FRAME_HEAD.pack_into(buf, offset, 2 * index + 2, stamp, msg.frame_number, count)
+        self._head = index + 1
+        layout.set_counter(HEAD_OFFSET, self._head)
+
+    async def run(self, client: 'AsyncClient') -> None:
+        """
+        Publishes all frames received by a client, until the publisher or the client is closed.
+
+        :param client: A connected client
+        """
+        if self._closed:
+            return
+        subscriber = self._subscriber = client.subscribe_local(maxsize=self._layout.ring_size)
+        names: dict[int, str] | None = None
+        try:
+            async for stamp, msg in subscriber:
+                if self._closed:
+                    break
+                if client.rigid_body_names is not names:
+                    names = client.rigid_body_names
+                    self.set_rigid_body_names(names)
+                self.publish(stamp, msg)
+        finally:
+            subscriber.close()
+            self._subscriber = None
+
+    def close(self) -> None:
+        """Stops :py:meth:`run`, then closes and removes the shared memory block"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._subscriber:
+            self._subscriber.close()
+        self._layout.shm.close()
+        self._layout.shm.unlink()
+
+
+class SharedMemoryReader:
+    """
+    Reads the rigid bodies published by a :py:class:`SharedMemoryPublisher`
+    in another process.
+
+    Usage:
+
+    >>> reader = SharedMemoryReader("natnet")
+    >>> state = reader.get("my_rigid_body")
+    """
+
+    def __init__(self, name: str = "natnet"):
+        """
+        Constructs a new instance, attaching to an existing shared memory block.
+
+        :param name: The name of the shared memory block
+
+        :raises FileNotFoundError: if the block does not exist
+        :raises ValueError: if the block has not been created by a publisher
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        # Only the publisher owns the block:
+        # avoid that the resource tracker removes it when this process exits.
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        # the block has just been opened
+        buf = cast(memoryview, shm.buf)
+        magic, version, max_rigid_bodies, ring_size = META.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            shm.close()
+            raise ValueError(f"{name} is not a compatible natnet shared memory block")
+        self._layout = _Layout(shm, max_rigid_bodies, ring_size)
+        self._names_seq = -1
+        self._names: dict[int, str] = {}
+        self._slots: dict[int, int] = {}
+
+    @property
+    def head(self) -> int:
+        """The index of the next frame that will be published"""
+        return self._layout.counter(HEAD_OFFSET)
+
+    def _read_names(self, retries: int = 100) -> None:
+        layout = self._layout
+        for _ in range(retries + 1):
+            seq = layout.counter(NAMES_SEQ_OFFSET)
+            if seq == self._names_seq:
+                return
+            if seq % 2:
+                continue
+            names = {}
+            slots = {}
+            for slot in range(layout.max_rigid_bodies):
+                id, name = NAME.unpack_from(layout.buf, layout.names_offset + slot * NAME.size)
+                if id < 0:
+                    break
+                slots[id] = slot
+                names[id] = name.rstrip(b"\0").decode(errors="replace")
+            if layout.counter(NAMES_SEQ_OFFSET) == seq:
+                self._names_seq = seq
+                self._names = names
+                self._slots = slots
+                return
+
+    @property
+    def rigid_body_names(self) -> dict[int, str]:
+        """The names of the rigid bodies indexed by their identifiers"""
+        self._read_names()
+        return self._names
+
+    def _id(self, key: int | str) -> int | None:
+        self._read_names()
+        if isinstance(key, str):
+            for id, name in self._names.items():
+                if name == key:
+                    return id
+            return None
+        return key if key in self._slots else None
+
+    def get(self, key: int | str, retries: int = 100) -> RigidBodyState | None:
+        """
+        Gets the latest state of a rigid body.
+
+        :param key:     The rigid body name or identifier
+        :param retries: How many times to retry when the state is being written
+
+        :returns: The state or None if not available
+        """
+        id = self._id(key)
+        if id is None:
+            return None
+        layout = self._layout
+        offset = layout.state_offset(self._slots[id])
+        for _ in range(retries + 1):
+            seq, stamp, frame_number = STATE_HEAD.unpack_from(layout.buf, offset)
+            if seq == 0:
+                return None
+            if seq % 2:
+                continue
+            _, valid, x, y, z, qx, qy, qz, qw, error = POSE.unpack_from(
+                layout.buf, offset + STATE_HEAD.size)
+            if layout.counter(offset) == seq:
+                return RigidBodyState(
+                    id, stamp, frame_number, (x, y, z), (qx, qy, qz, qw), valid, error)
+        return None
+
+    def get_all(self) -> dict[str, RigidBodyState]:
+        """
+        Gets the latest state of all rigid bodies.
+
+        :returns: The states indexed by rigid body name
+        """
+        states = {}
+        for id, name in self.rigid_body_names.items():
+            state = self.get(id)
+            if state:
+                states[name or str(id)] = state
+        return states
+
+    def read(self, since: int = -1) -> tuple[list[SharedFrame], int]:
+        """
+        Reads the frames published since a given index.
+
+        Frames that have already been overwritten are skipped.
+
+        :param since: The index of the first frame to read.
+                      Set to a negative value to read only the latest frame.
+
+        :returns: The frames and the index of the next frame to read
+        """
+        layout = self._layout
+        head = self.head
+        if since < 0:
+            since = head - 1
+        since = max(since, head - layout.ring_size, 0)
+        frames = []
+        for index in range(since, head):
+            frame = self._read_frame(index)
+            if frame:
+                frames.append(frame)
+        return frames, head
+
+    def _read_frame(self, index: int) -> SharedFrame | None:
+        layout = self._layout
+        offset = layout.frame_offset(index)
+        seq, stamp, frame_number, count = FRAME_HEAD.unpack_from(layout.buf, offset)
+        if seq != 2 * index + 2:
+            return None
+        rigid_bodies = []
+        for i in range(count):
+            id, valid, x, y, z, qx, qy, qz, qw, error = POSE.unpack_from(
+                layout.buf, offset + FRAME_HEAD.size + i * POSE.size)
+            rigid_bodies.append(RigidBodyState(
+                id, stamp, frame_number, (x, y, z), (qx, qy, qz, qw), valid, error))
+        if layout.counter(offset) != seq:
+            return None
+        return SharedFrame(index, stamp, frame_number, rigid_bodies)
+
+    def close(self) -> None:
+        """Detaches from the shared memory block"""
+        self._layout.shm.close()
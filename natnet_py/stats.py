@@ -0,0 +1,400 @@
+import collections
+import dataclasses as dc
+import enum
+from typing import Callable
+
+
+class FrameAnomaly(enum.Enum):
+    """An irregularity in the sequence of received frames"""
+
+    GAP = 0
+    """some frames are missing"""
+    DUPLICATE = 1
+    """a frame has already been received"""
+    OUT_OF_ORDER = 2
+    """a frame arrived after a newer frame"""
+    RESET = 3
+    """the frame numbers jumped, e.g., because the server restarted"""
+
+
+AnomalyCallback = Callable[[FrameAnomaly, int, int], None]
+
+
+class Histogram:
+    """
+    A histogram of non-negative integers (e.g., durations in ns) with logarithmic buckets,
+    as in HDR histograms: each power of two is split in ``2 ** (precision - 1)`` buckets,
+    so that values are recorded with a relative error below ``2 ** (1 - precision)``,
+    using O(1) time and little memory.
+    """
+
+    def __init__(self, precision: int = 5):
+        """
+        Constructs a new instance.
+
+        :param precision: The number of significant bits of the recorded values
+        """
+        self.precision = precision
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the histogram"""
+        self._counts: dict[int, int] = {}
+        self.count = 0
+        """number of recorded values"""
+        self.total = 0
+        """sum of the recorded values"""
+        self.min: int | None = None
+        """smallest recorded value"""
+        self.max: int | None = None
+        """largest recorded value"""
+
+    def _index(self, value: int) -> int:
+        shift = max(0, value.bit_length() - self.precision)
+        return (shift << (self.precision - 1)) + (value >> shift)
+
+    def _bounds(self, index: int) -> tuple[int, int]:
+        half = 1 << (self.precision - 1)
+        if index < 2 * half:
+            return index, index + 1
+        shift = index // half - 1
+        mantissa = index - shift * half
+        return mantissa << shift, (mantissa + 1) << shift
+
+    def add(self, value: int, count: int = 1) -> None:
+        """
+        Records a value.
+
+        :param value: The value (negative values are recorded as zero)
+        :param count: How many times to record it
+        """
+        value = max(0, int(value))
+        index = self._index(value)
+        self._counts[index] = self._counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: 'Histogram') -> None:
+        """Adds all values recorded by another histogram with the same precision"""
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    @property
+    def mean(self) -> float:
+        """The mean of the recorded values"""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> int:
+        """
+        Computes a percentile.
+
+        :param p: The percentile in [0, 100]
+
+        :returns: The (upper bound of the bucket of the) percentile or 0 if empty
+        """
+        if not self.count or self.max is None:
+            return 0
+        target = max(1, round(p / 100 * self.count))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= target:
+                return min(self._bounds(index)[1] - 1, self.max)
+        return self.max
+
+    def buckets(self) -> list[tuple[int, int, int]]:
+        """The (lower bound, upper bound, count) of the non-empty buckets"""
+        return [(*self._bounds(index), self._counts[index]) for index in sorted(self._counts)]
+
+
+class RollingHistogram:
+    """
+    A histogram of the values recorded during the latest ``window`` seconds.
+
+    The window is split in ``slices``: values expire one slice at a time.
+    """
+
+    def __init__(self, window: float = 60.0, slices: int = 6, precision: int = 5):
+        """
+        Constructs a new instance.
+
+        :param window:    The duration [s] of the window
+        :param slices:    The number of slices of the window
+        :param precision: The number of significant bits of the recorded values
+        """
+        self.slices = max(1, slices)
+        self.precision = precision
+        self._duration = max(1, int(window * 1e9 / self.slices))  # ns
+        self._histograms: collections.deque[tuple[int, Histogram]] = collections.deque()
+
+    def add(self, value: int, stamp: int) -> None:
+        """
+        Records a value.
+
+        :param value: The value
+        :param stamp: The current time [ns]
+        """
+        index = stamp // self._duration
+        if not self._histograms or self._histograms[-1][0] != index:
+            self._histograms.append((index, Histogram(self.precision)))
+            while self._histograms[0][0] <= index - self.slices:
+                self._histograms.popleft()
+        self._histograms[-1][1].add(value)
+
+    def snapshot(self, stamp: int | None = None) -> Histogram:
+        """
+        Merges the histograms of the window.
+
+        :param stamp: The current time [ns]. Defaults to the time of the latest value.
+
+        :returns: A histogram of the values recorded in the window
+        """
+        histogram = Histogram(self.precision)
+        if not self._histograms:
+            return histogram
+        index = self._histograms[-1][0] if stamp is None else stamp // self._duration
+        for i, h in self._histograms:
+            if index - self.slices < i <= index:
+                histogram.merge(h)
+        return histogram
+
+    def reset(self) -> None:
+        """Clear the histogram"""
+        self._histograms.clear()
+
+
+@dc.dataclass
+class LatencySummary:
+    """Percentiles of a latency [ns]"""
+
+    count: int = 0
+    """number of samples"""
+    mean: float = 0.0
+    """mean"""
+    p50: int = 0
+    """median"""
+    p90: int = 0
+    """90th percentile"""
+    p99: int = 0
+    """99th percentile"""
+    max: int = 0
+    """maximum"""
+
+    @classmethod
+    def from_histogram(cls, histogram: Histogram) -> 'LatencySummary':
+        return cls(histogram.count, histogram.mean, histogram.percentile(50),
+                   histogram.percentile(90), histogram.percentile(99), histogram.max or 0)
+
+
+class LatencyStatistics:
+    """
+    Keeps rolling histograms of the latencies of received frames:
+
+    - ``system``: from camera mid exposure to transmission, as measured by the server;
+    - ``network``: from transmission to reception (requires clock synchronization);
+    - ``processing``: from reception to the dispatch of the frame by the client.
+    """
+
+    KINDS = ("system", "network", "processing")
+
+    def __init__(self, window: float = 60.0, slices: int = 6):
+        """
+        Constructs a new instance.
+
+        :param window: The duration [s] of the rolling window
+        :param slices: The number of slices of the window
+        """
+        self.histograms = {kind: RollingHistogram(window, slices) for kind in self.KINDS}
+        """the rolling histograms indexed by kind"""
+
+    def add(self, stamp: int, system: int | None = None, network: int | None = None,
+            processing: int | None = None) -> None:
+        """
+        Records the latencies of a frame.
+
+        :param stamp:      The receiving time [ns]
+        :param system:     The system latency [ns]
+        :param network:    The network latency [ns]
+        :param processing: The processing latency [ns]
+        """
+        for kind, value in zip(self.KINDS, (system, network, processing)):
+            if value is not None:
+                self.histograms[kind].add(value, stamp)
+
+    def snapshot(self, stamp: int | None = None) -> dict[str, LatencySummary]:
+        """
+        Summarizes the latencies in the rolling window.
+
+        :param stamp: The current time [ns]. Defaults to the time of the latest frame.
+
+        :returns: The summary of each kind of latency
+        """
+        return {kind: LatencySummary.from_histogram(h.snapshot(stamp))
+                for kind, h in self.histograms.items()}
+
+    def reset(self) -> None:
+        """Clear the statistics"""
+        for h in self.histograms.values():
+            h.reset()
+
+
+@dc.dataclass
+class FrameStats:
+    """A snapshot of the statistics about received frames"""
+
+    received: int = 0
+    """number of received frames (including duplicates)"""
+    lost: int = 0
+    """number of missing frames (not counting the ones arrived out of order)"""
+    gaps: int = 0
+    """number of gaps, i.e., bursts of consecutive missing frames"""
+    max_burst_loss: int = 0
+    """the longest burst of missing frames"""
+    duplicates: int = 0
+    """number of duplicated frames"""
+    out_of_order: int = 0
+    """number of frames arrived after a newer frame"""
+    resets: int = 0
+    """number of times the frame number jumped"""
+    jitter: float = 0.0
+    """inter-arrival jitter in ns (as in RFC 3550)"""
+    last_frame_number: int = -1
+    """the newest frame number"""
+
+    @property
+    def mean_burst_loss(self) -> float:
+        """The mean length of bursts of missing frames"""
+        if not self.gaps:
+            return 0.0
+        return self.lost / self.gaps
+
+    @property
+    def loss_rate(self) -> float:
+        """The fraction of missing frames"""
+        expected = self.received - self.duplicates + self.lost
+        if expected <= 0:
+            return 0.0
+        return self.lost / expected
+
+
+class FrameStatistics:
+    """
+    Keeps streaming statistics about frame numbers in O(1) per frame.
+
+    It remembers which of the latest ``window`` frames have been received
+    to tell late frames from duplicates.
+    Frame numbers jumping forward by more than ``max_gap``, or backward by more than ``window``
+    (e.g., when the server restarts), are counted as resets, not as gaps or late frames.
+    """
+
+    def __init__(self, window: int = 64, max_gap: int = 10000):
+        """
+        Constructs a new instance.
+
+        :param window:  The number of recent frames to remember,
+                        i.e., the largest jump back in frame numbers that is counted as late frames
+        :param max_gap: The largest jump in frame numbers that is counted as a gap
+        """
+        self.window = window
+        self.max_gap = max_gap
+        self.anomaly_callback: AnomalyCallback | None = None
+        """called with (anomaly, frame number, number of frames) for each anomaly"""
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the statistics"""
+        self._stats = FrameStats()
+        self._mask = (1 << self.window) - 1
+        self._seen = 0
+        self._first = 0
+        self._transit: int | None = None
+
+    def snapshot(self) -> FrameStats:
+        """The current statistics"""
+        return dc.replace(self._stats)
+
+    def _notify(self, anomaly: FrameAnomaly, frame_number: int, count: int) -> None:
+        if self.anomaly_callback:
+            self.anomaly_callback(anomaly, frame_number, count)
+
+    def add(self, frame_number: int, stamp: int, server_stamp: int | None = None) -> None:
+        """
+        Adds a received frame.
+
+        :param frame_number: The frame number
+        :param stamp:        The receiving time in ns
+        :param server_stamp: The server time of the frame in ns, used to compute jitter
+        """
+        stats = self._stats
+        stats.received += 1
+        if not self._seen:
+            self._restart(frame_number, stamp, server_stamp)
+            return
+        delta = frame_number - stats.last_frame_number
+        if 0 < delta <= self.max_gap:
+            missing = delta - 1
+            if missing:
+                stats.lost += missing
+                stats.gaps += 1
+                stats.max_burst_loss = max(stats.max_burst_loss, missing)
+                self._notify(FrameAnomaly.GAP, frame_number, missing)
+            self._seen = ((self._seen << delta) | 1) & self._mask
+            stats.last_frame_number = frame_number
+            self._update_jitter(stamp, server_stamp)
+        elif -self.window < delta <= 0:
+            bit = 1 << -delta
+            if self._seen & bit:
+                stats.duplicates += 1
+                self._notify(FrameAnomaly.DUPLICATE, frame_number, 1)
+            else:
+                self._seen |= bit
+                self._add_late(frame_number, -delta)
+        else:
+            stats.resets += 1
+            self._notify(FrameAnomaly.RESET, frame_number, delta)
+            self._restart(frame_number, stamp, server_stamp)
+
+    def add_duplicate(self, frame_number: int) -> None:
+        """
+        Adds a frame already known to be a duplicate (e.g., discarded by a
+        :py:class:`natnet_py.dedup.Deduplicator`).
+
+        :param frame_number: The frame number
+        """
+        self._stats.received += 1
+        self._stats.duplicates += 1
+        self._notify(FrameAnomaly.DUPLICATE, frame_number, 1)
+
+    def _add_late(self, frame_number: int, age: int) -> None:
+        stats = self._stats
+        # only frames newer than the first one have been counted as lost
+        if frame_number > self._first and stats.lost > 0:
+            stats.lost -= 1
+        stats.out_of_order += 1
+        self._notify(FrameAnomaly.OUT_OF_ORDER, frame_number, age)
+
+    def _restart(self, frame_number: int, stamp: int, server_stamp: int | None) -> None:
+        self._seen = 1
+        self._first = frame_number
+        self._stats.last_frame_number = frame_number
+        self._transit = None
+        self._update_jitter(stamp, server_stamp)
+
+    def _update_jitter(self, stamp: int, server_stamp: int | None) -> None:
+        if server_stamp is None:
+            return
+        transit = stamp - server_stamp
+        if self._transit is not None:
+            d = abs(transit - self._transit)
+            self._stats.jitter += (d - self._stats.jitter) / 16
+        self._transit = transit
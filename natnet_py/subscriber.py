@@ -0,0 +1,170 @@
+import asyncio
+import enum
+import logging
+from typing import Callable
+
+from . import protocol
+
+Data = tuple[int, protocol.MoCapData]
+
+
+class OverflowPolicy(enum.Enum):
+    """What to do with a new item when a bounded queue is full"""
+
+    DROP_OLDEST = 0
+    """discard the oldest queued item to make room for the new one"""
+    DROP_NEWEST = 1
+    """discard the new item"""
+
+
+class Subscriber:
+    """
+    A local subscriber to the mocap data received by a client.
+
+    Each subscriber has its own bounded queue and (optionally) decimates
+    the stream to a target rate, so that a slow consumer does not interfere
+    with the others. Create it using :py:meth:`natnet_py.AsyncClient.subscribe_local`.
+
+    Usage:
+
+    >>> subscriber = client.subscribe_local(maxsize=1, max_rate=30)
+    >>> async for stamp, data in subscriber:
+    ...     print(stamp, data)
+
+    Closing the subscriber (or the client) ends the iteration, once the queued updates
+    have been consumed, and wakes up consumers waiting in :py:meth:`get`.
+    """
+
+    def __init__(self,
+                 maxsize: int = 10,
+                 policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 max_rate: float = 0.0,
+                 on_close: Callable[['Subscriber'], None] | None = None,
+                 logger: logging.Logger = logging.getLogger()):
+        """
+        Constructs a new instance.
+
+        :param maxsize:  The length of the queue. Set to zero or negative for an unbounded queue.
+        :param policy:   What to do when the queue is full
+        :param max_rate: The maximal rate [fps] of the updates.
+                         Set to zero or negative to receive all updates.
+        :param on_close: Called when the subscriber is closed
+        :param logger:   The logger to use
+        """
+        # None is queued to wake up the consumers when closed
+        self._queue: asyncio.Queue[Data | None] = asyncio.Queue(maxsize=max(0, maxsize))
+        self._woken = False
+        self.policy = policy
+        self._period = int(1e9 / max_rate) if max_rate > 0 else 0
+        self._next_stamp = 0
+        self._on_close = on_close
+        self._closed = False
+        self.logger = logger
+        self.received = 0
+        """number of updates received from the client"""
+        self.dropped = 0
+        """number of updates dropped because the queue was full"""
+        self.decimated = 0
+        """number of updates skipped to respect the maximal rate"""
+
+    @property
+    def max_rate(self) -> float:
+        """The maximal rate [fps] of the updates (zero if not limited)"""
+        if self._period:
+            return 1e9 / self._period
+        return 0.0
+
+    @property
+    def closed(self) -> bool:
+        """Whether the subscriber has been closed"""
+        return self._closed
+
+    def put(self, stamp: int, msg: protocol.MoCapData) -> bool:
+        """
+        Offer an update to the subscriber.
+
+        :meta private:
+
+        :returns: True if the update has been queued
+        """
+        if self._closed:
+            return False
+        self.received += 1
+        if self._period:
+            if stamp < self._next_stamp:
+                self.decimated += 1
+                return False
+            # keep the average rate on target, unless we are lagging behind
+            if stamp - self._next_stamp < self._period:
+                self._next_stamp += self._period
+            else:
+                self._next_stamp = stamp + self._period
+        if self._queue.full():
+            self.dropped += 1
+            if self.policy == OverflowPolicy.DROP_NEWEST:
+                return False
+            self._queue.get_nowait()
+        self._queue.put_nowait((stamp, msg))
+        return True
+
+    async def get(self, timeout: float = 0.0, last: bool = False) -> Data | None:
+        """
+        Gets mocap data.
+
+        :param      timeout:  The timeout
+        :param      last:     whether to ignore the queue and fetch only the last data
+
+        :returns:   The (receiving stamp in ns, data) or None if not available
+                    (e.g., if the subscriber is closed)
+        """
+        if not self._queue.empty() and last:
+            value: Data | None = None
+            # the wake up, if any, is last and requeued when consumed
+            for _ in range(self._queue.qsize()):
+                value = self._unwrap(self._queue.get_nowait()) or value
+            return value
+        if self._closed and self._queue.empty():
+            return None
+        if timeout > 0:
+            try:
+                return self._unwrap(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.exceptions.TimeoutError:
+                self.logger.warning("Timed out")
+                return None
+        return self._unwrap(await self._queue.get())
+
+    def _wake(self) -> None:
+        # A full queue has no consumers waiting
+        if not self._woken and not self._queue.full():
+            self._queue.put_nowait(None)
+            self._woken = True
+
+    def _unwrap(self, value: Data | None) -> Data | None:
+        if value is None:
+            self._woken = False
+            # pass the wake up to the other waiting consumers
+            self._wake()
+        return value
+
+    def qsize(self) -> int:
+        """The number of queued updates"""
+        return self._queue.qsize() - self._woken
+
+    def close(self) -> None:
+        """Stop receiving updates"""
+        if not self._closed:
+            self._closed = True
+            self._wake()
+            if self._on_close:
+                self._on_close(self)
+
+    def __aiter__(self) -> 'Subscriber':
+        return self
+
+    async def __anext__(self) -> Data:
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+        value = self._unwrap(await self._queue.get())
+        if value is None:
+            raise StopAsyncIteration
+        return value
@@ -3,10 +3,18 @@ import asyncio
 import time
 from threading import Thread, current_thread
 from functools import wraps
-from typing import Callable
+from typing import Any, Callable, Iterable, Type, TypeVar
 
 from . import protocol
-from .async_client import AsyncClient, DataCallback
+from .async_client import AsyncClient, DataCallback, RetryPolicy
+from .capture import CaptureReader
+from .clock import ClockEstimator, ClockTelemetry
+from .executor import CallbackExecutor, CallbackTimings
+from .loopback import LoopbackNetwork
+from .stats import FrameStatistics, LatencyStatistics, LatencySummary
+from .subscriber import OverflowPolicy, Subscriber
+
+T = TypeVar("T")
 
 
 def block(f):
@@ -40,6 +48,52 @@ def client(f):
     return g
 
 
+class SyncSubscriber:
+    """
+    A blocking interface to a :py:class:`natnet_py.subscriber.Subscriber`.
+
+    Create it using :py:meth:`SyncClient.subscribe_local`.
+    """
+
+    def __init__(self, subscriber: Subscriber, loop: asyncio.AbstractEventLoop):
+        self._subscriber = subscriber
+        self._loop = loop
+
+    @property
+    def received(self) -> int:
+        """number of updates received from the client"""
+        return self._subscriber.received
+
+    @property
+    def dropped(self) -> int:
+        """number of updates dropped because the queue was full"""
+        return self._subscriber.dropped
+
+    @property
+    def decimated(self) -> int:
+        """number of updates skipped to respect the maximal rate"""
+        return self._subscriber.decimated
+
+    def get(
+        self, timeout: float = 0.0, last: bool = False
+    ) -> tuple[int, protocol.MoCapData] | None:
+        """
+        Gets mocap data.
+
+        :param      timeout:  The timeout
+        :param      last:     whether to ignore the queue and fetch only the last data
+
+        :returns:   The (receiving stamp in ns, data) or None if not available
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._subscriber.get(timeout=timeout, last=last), self._loop)
+        return future.result()
+
+    def close(self) -> None:
+        """Stop receiving updates"""
+        self._loop.call_soon_threadsafe(self._subscriber.close)
+
+
 class SyncClient(Thread):
     """
     This class describes a Natnet client.
@@ -87,6 +141,16 @@ class SyncClient(Thread):
         logger: logging.Logger = logging.getLogger(),
         now: Callable[[], int] = time.time_ns,
         sync: bool = True,
+        retry: RetryPolicy | None = None,
+        auto_reconnect: bool = False,
+        reconnect_timeout: float = 2.0,
+        max_reconnect_period: float = 10.0,
+        dedup_window: int = 32,
+        callback_executor: CallbackExecutor | None = None,
+        clock_estimator: ClockEstimator = ClockEstimator.FILTER,
+        latency_window: float = 0.0,
+        kernel_timestamps: bool = False,
+        network: LoopbackNetwork | None = None,
     ):
         """
         Construct an instance
@@ -98,11 +162,35 @@ class SyncClient(Thread):
         :param logger: the logger to use
         :param now: a function used to stamp incoming messages
         :param sync: whether to sync the client and server clocks upon connection
+        :param retry: how to retry unanswered commands. Defaults to no retries.
+        :param auto_reconnect: whether to automatically reconnect to the server
+                               when the connection is lost
+        :param reconnect_timeout: how long [s] without receiving data before
+                                  considering the connection lost
+        :param max_reconnect_period: the maximal period [s] between reconnection attempts
+        :param dedup_window: how many recent frames to remember to discard duplicates
+                             (e.g., received both on the data and command sockets).
+                             Set to zero to disable.
+        :param callback_executor: how to execute the data callback.
+                                  Defaults to executing it on the event loop thread.
+        :param clock_estimator: how to synchronize the client and server clocks
+        :param latency_window: the duration [s] of the rolling window of latency statistics.
+                               Set to zero to not compute latencies.
+        :param kernel_timestamps: whether to stamp frames with the time they were received
+                                  by the kernel (``SO_TIMESTAMPNS``, Linux only)
+                                  instead of the time they are processed.
+        :param network: an in-memory network to use instead of sockets
+                        (e.g., to test or benchmark the client with a local server).
         """
         super().__init__()
         self._client = AsyncClient(
             address=address, command_port=command_port, queue=queue,
-            logger=logger, now=now, sync=sync)
+            logger=logger, now=now, sync=sync, retry=retry,
+            auto_reconnect=auto_reconnect, reconnect_timeout=reconnect_timeout,
+            max_reconnect_period=max_reconnect_period, dedup_window=dedup_window,
+            callback_executor=callback_executor, clock_estimator=clock_estimator,
+            latency_window=latency_window, kernel_timestamps=kernel_timestamps,
+            network=network)
         self._loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self._loop)
         self.start()
@@ -155,6 +243,26 @@ class SyncClient(Thread):
     def rigid_body_names(self) -> dict[int, str]:  # type: ignore[empty-body]
         ...
 
+    @property
+    def callback_timings(self) -> CallbackTimings:
+        """Statistics about the execution of the data callback"""
+        return self._client.callback_timings
+
+    @property
+    def clock_telemetry(self) -> ClockTelemetry:
+        """Monitors the quality of the clock synchronization"""
+        return self._client.clock_telemetry
+
+    @property
+    def latency_statistics(self) -> LatencyStatistics | None:
+        """Rolling histograms of system, network and processing latencies"""
+        return self._client.latency_statistics
+
+    @property
+    def frame_statistics(self) -> FrameStatistics:
+        """Statistics about the received frames (gaps, duplicates, jitter, ...)"""
+        return self._client.frame_statistics
+
     @property
     @client
     def use_multicast(self) -> bool:  # type: ignore[empty-body]
@@ -185,6 +293,33 @@ class SyncClient(Thread):
     def connected(self) -> bool:  # type: ignore[empty-body]
         ...
 
+    @property
+    @client
+    def lost(self) -> bool:  # type: ignore[empty-body]
+        ...
+
+    def subscribe_local(
+        self,
+        maxsize: int = 10,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        max_rate: float = 0.0,
+    ) -> SyncSubscriber:
+        """
+        Adds an independent local subscriber to the mocap data.
+
+        :param      maxsize:   The length of the subscriber queue
+        :param      policy:    What to do when the subscriber queue is full
+        :param      max_rate:  The maximal rate [fps] of updates.
+                               Set to zero to receive all updates.
+
+        :returns:   The subscriber. Call :py:meth:`SyncSubscriber.close` to unsubscribe.
+        """
+        async def subscribe() -> Subscriber:
+            return self._client.subscribe_local(maxsize, policy, max_rate)
+
+        future = asyncio.run_coroutine_threadsafe(subscribe(), self._loop)
+        return SyncSubscriber(future.result(), self._loop)
+
     @client
     def server_ticks_to_client_ns_time(self, ticks: int) -> int:  # type: ignore[empty-body]
         ...
@@ -195,6 +330,43 @@ class SyncClient(Thread):
     ) -> protocol.Response | None:  # type: ignore[empty-body]
         ...
 
+    @block
+    def play_capture(  # type: ignore[empty-body]
+        self, capture: CaptureReader | str, start: int = 0, stop: int | None = None,
+        wait_for_queue: bool = False, batch: int = 256
+    ) -> int:
+        ...
+
+    @block
+    def get_latencies(  # type: ignore[empty-body]
+        self
+    ) -> dict[str, LatencySummary] | None:
+        ...
+
+    @block
+    def set_properties(  # type: ignore[empty-body]
+        self, properties: Iterable[tuple[bytes, bytes, Any]], timeout: float = 0.0
+    ) -> list[bool]:
+        ...
+
+    @block
+    def get_properties(  # type: ignore[empty-body]
+        self, nodes: Iterable[bytes], name: bytes, kind: Type[T], timeout: float = 0.0
+    ) -> list[T | None]:
+        ...
+
+    @block
+    def enable_assets(  # type: ignore[empty-body]
+        self, names: Iterable[bytes], timeout: float = 0.0
+    ) -> list[bool]:
+        ...
+
+    @block
+    def disable_assets(  # type: ignore[empty-body]
+        self, names: Iterable[bytes], timeout: float = 0.0
+    ) -> list[bool]:
+        ...
+
     @block
     def get_data(
         self, timeout: float = 0.0, last: bool = False
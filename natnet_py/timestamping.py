@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import socket
+import struct
+import sys
+from typing import Any, Callable
+
+# Not exported by the socket module: Linux value on x86 and ARM
+SO_TIMESTAMPNS: int | None = getattr(socket, "SO_TIMESTAMPNS", 35 if sys.platform == "linux"
+                                     else None)
+MAX_DATAGRAM_SIZE = 65536
+# the number of datagrams read each time the socket is ready, to not starve the loop
+MAX_READS = 32
+
+# any protocol with datagram_received(data, addr, stamp) and error_received(exc)
+ProtocolFactory = Callable[[], asyncio.BaseProtocol]
+
+
+def enable_kernel_timestamps(sock: socket.socket) -> bool:
+    """
+    Asks the kernel to stamp the datagrams received by a socket.
+
+    :returns: True if supported
+    """
+    if SO_TIMESTAMPNS is None:
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+    except OSError:
+        return False
+    return True
+
+
+def parse_kernel_timestamp(ancdata: list[tuple[int, int, bytes]]) -> int | None:
+    """
+    Extracts the kernel timestamp from the ancillary data returned by ``recvmsg``.
+
+    :returns: The receiving time [ns since epoch] or None if missing
+    """
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS:
+            # struct timespec, with 32 or 64 bits fields
+            seconds, nanoseconds = struct.unpack("@qq" if len(data) >= 16 else "@ii",
+                                                 data[:16])
+            return seconds * 1_000_000_000 + nanoseconds
+    return None
+
+
+class TimestampingDatagramTransport(asyncio.DatagramTransport):
+    """
+    A datagram transport that reads a socket with ``recvmsg``
+    and passes the kernel receiving time to the protocol, as
+    ``protocol.datagram_received(data, addr, stamp)``
+    (``stamp`` is None if the kernel did not stamp the datagram).
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, sock: socket.socket,
+                 protocol: asyncio.BaseProtocol):
+        super().__init__(extra={'socket': sock, 'sockname': sock.getsockname()})
+        self._loop = loop
+        self._sock = sock
+        self._protocol = protocol
+        self._closing = False
+        self._ancbufsize = socket.CMSG_SPACE(16)
+        sock.setblocking(False)
+        loop.add_reader(sock.fileno(), self._read_ready)
+        loop.call_soon(protocol.connection_made, self)
+
+    def _read_ready(self) -> None:
+        for _ in range(MAX_READS):
+            try:
+                data, ancdata, _, addr = self._sock.recvmsg(MAX_DATAGRAM_SIZE, self._ancbufsize)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                self._protocol.error_received(e)  # type: ignore[attr-defined]
+                return
+            self._protocol.datagram_received(  # type: ignore[attr-defined]
+                data, addr, parse_kernel_timestamp(ancdata))
+
+    def sendto(self, data: Any, addr: Any = None) -> None:
+        self._sock.sendto(data, addr)
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def close(self) -> None:
+        if self._closing:
+            return
+        self._closing = True
+        self._loop.remove_reader(self._sock.fileno())
+        self._loop.call_soon(self._connection_lost)
+
+    def abort(self) -> None:
+        self.close()
+
+    def _connection_lost(self) -> None:
+        try:
+            self._protocol.connection_lost(None)
+        finally:
+            self._sock.close()
+
+
+async def create_timestamping_endpoint(
+        protocol_factory: ProtocolFactory, sock: socket.socket,
+        logger: logging.Logger = logging.getLogger()
+) -> tuple[TimestampingDatagramTransport, asyncio.BaseProtocol] | None:
+    """
+    Like :py:meth:`asyncio.loop.create_datagram_endpoint` but with kernel receiving times.
+
+    :param protocol_factory: The protocol factory
+    :param sock:             The (bound) socket
+    :param logger:           The logger to use
+
+    :returns: The transport and protocol or None if kernel timestamps are not supported,
+              in which case the socket can still be used with a regular transport
+    """
+    loop = asyncio.get_running_loop()
+    if not enable_kernel_timestamps(sock):
+        logger.warning("Kernel timestamps are not supported on this platform")
+        return None
+    protocol = protocol_factory()
+    try:
+        transport = TimestampingDatagramTransport(loop, sock, protocol)
+    except NotImplementedError:
+        # e.g., proactor event loops do not support add_reader
+        logger.warning("Kernel timestamps are not supported by this event loop")
+        return None
+    return transport, protocol
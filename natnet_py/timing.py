@@ -0,0 +1,106 @@
+from typing import Iterable
+
+import numpy as np
+import numpy.typing as npt
+
+from .clock import ClockModel
+
+Ticks = npt.ArrayLike
+Times = npt.NDArray[np.int64]
+
+
+class PiecewiseClockModel:
+    """
+    Converts arrays of server ticks to client times in bulk, using one clock model per
+    synchronization update (see :py:attr:`natnet_py.clock.SynchronizedClock.history`).
+
+    Each stamp is converted with the model that was valid at that (server) time,
+    like when converting it live, but without any per-frame Python work.
+
+    Usage:
+
+    >>> model = PiecewiseClockModel(client.clock.history)
+    >>> times = model.server_ticks_to_client_time(ticks)
+    """
+
+    def __init__(self, models: Iterable[ClockModel]):
+        """
+        Constructs a new instance.
+
+        :param models: The clock models, sorted by :py:attr:`natnet_py.clock.ClockModel.since`
+
+        :raises ValueError: if there are no models
+        """
+        models = list(models)
+        if not models:
+            raise ValueError("At least one clock model is required")
+        frequencies = {model.frequency for model in models}
+        if len(frequencies) > 1:
+            raise ValueError("Clock models with different frequencies")
+        self.frequency = frequencies.pop()
+        self.since = np.array([model.since for model in models], dtype=np.int64)
+        self.since[0] = np.iinfo(np.int64).min
+        self.t2_c = np.array([model.t2_c for model in models], dtype=np.int64)
+        self.t2_s = np.array([model.t2_s for model in models], dtype=np.int64)
+        self.scale = 1 / (1 + np.array([model.beta for model in models], dtype=np.float64))
+
+    @classmethod
+    def frozen(cls, model: ClockModel) -> 'PiecewiseClockModel':
+        """A model that uses the same clock model for all stamps"""
+        return cls([model])
+
+    def ticks_to_nanoseconds(self, ticks: Ticks) -> Times:
+        """
+        Converts server ticks to server times.
+
+        :param ticks: The server ticks
+
+        :returns: The server times [ns]
+        """
+        ticks = np.asarray(ticks, dtype=np.int64)
+        # avoid overflows and loss of precision of ticks * 1e9
+        seconds, rest = np.divmod(ticks, self.frequency)
+        return seconds * 1_000_000_000 + rest * 1_000_000_000 // self.frequency
+
+    def server_to_client_time(self, t_s: Ticks) -> Times:
+        """
+        Converts server times to client times.
+
+        :param t_s: The server times [ns]
+
+        :returns: The client times [ns]
+        """
+        t_s = np.asarray(t_s, dtype=np.int64)
+        index = np.searchsorted(self.since, t_s, side='right') - 1
+        dt = (t_s - self.t2_s[index]).astype(np.float64) * self.scale[index]
+        return self.t2_c[index] + np.rint(dt).astype(np.int64)
+
+    def server_ticks_to_client_time(self, ticks: Ticks) -> Times:
+        """
+        Converts server ticks to client times.
+
+        :param ticks: The server ticks (e.g., ``stamp_camera_mid_exposure``)
+
+        :returns: The client times [ns]
+        """
+        return self.server_to_client_time(self.ticks_to_nanoseconds(ticks))
+
+    def compute_latencies(self, camera_mid_exposure: Ticks, transmit: Ticks,
+                          received: Ticks) -> tuple[Times, Times]:
+        """
+        Computes the latencies of many frames,
+        like :py:meth:`natnet_py.clock.SynchronizedClock.compute_latencies`.
+
+        :param camera_mid_exposure: The server ticks at mid exposure
+        :param transmit:            The server ticks at transmission
+        :param received:            The client receiving times [ns]
+
+        :returns: The system latencies (exposure to transmission)
+                  and the transmit latencies (transmission to reception) [ns]
+        """
+        camera = np.asarray(camera_mid_exposure, dtype=np.int64)
+        transmit = np.asarray(transmit, dtype=np.int64)
+        system = self.ticks_to_nanoseconds(transmit - camera)
+        network = np.asarray(received, dtype=np.int64) - self.server_ticks_to_client_time(
+            transmit)
+        return system, network
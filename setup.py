@@ -19,7 +19,16 @@ setup(
             'websockets',
             'numpy',
             'numpy-quaternion',
-        ]
+        ],
+        'dump': [
+            'h5py',
+            'hdf5plugin',
+            'netifaces',
+            'numpy',
+        ],
+        'arrow': [
+            'pyarrow',
+        ],
     },
     entry_points={
         'console_scripts': [
@@ -27,6 +36,9 @@ setup(
             'natnet_discover = natnet_py.natnet_discover:main',
             'natnet_gui = natnet_py.natnet_gui:main',
             'natnet_dump = natnet_py.natnet_dump:main',
+            'natnet_relay = natnet_py.natnet_relay:main',
+            'natnet_replay = natnet_py.natnet_replay:main',
+            'natnet_export = natnet_py.natnet_export:main',
         ],
     },
 )